@@ -11,6 +11,8 @@ from packages.api.tools.balance_series import BalanceSeriesAnalyticsTool
 from packages.api.tools.balance_transfers import BalanceTransfersTool
 from packages.api.tools.money_flow import MoneyFlowTool
 from packages.api.tools.similarity_search import SimilaritySearchTool
+from packages.api.services.balance_series_service import BalanceSeriesService
+from packages.api.services.balance_transfers_service import BalanceTransferService
 from packages.indexers.base import (
     get_clickhouse_connection_string, setup_metrics, get_metrics_registry,
     setup_enhanced_logger, ErrorContextManager, log_service_start, log_service_stop, classify_error
@@ -473,9 +475,11 @@ ORDER BY community ASC
   - `free_balance`, `reserved_balance`, `staked_balance`, `total_balance`: Different balance types
   - `free_balance_change`, `reserved_balance_change`, `staked_balance_change`, `total_balance_change`: Absolute change since previous period
   - `total_balance_percent_change`: Percentage change in total balance
+- `balance_series_by_address`: The same snapshots ordered by `(asset, address, period_start_timestamp)`. Prefer it for per-address history.
 
 **Available Views**:
 - `balance_series_latest_view`: Latest balance snapshot for each address and asset
+- `balance_series_rollup_view`: End-of-bucket balances at 4-hour (`resolution_hours = 4`) and daily (`resolution_hours = 24`) resolutions; prefer it over `balance_series` for long ranges
 - `balance_series_daily_view`: Daily balance aggregations with end-of-day balances and daily changes
 - `balance_series_weekly_view`: Weekly balance statistics with end-of-week balances and weekly changes
 - `balance_series_monthly_view`: Monthly balance statistics with end-of-month balances and monthly changes
@@ -543,6 +547,7 @@ WHERE address = '5GrwvaEF5zXb26Fz9rcQpDWS57CtERHpNehXCPcNoHGKutQY'
   - `asset`: Token or currency being transferred
   - `amount`: Value transferred
   - `fee`: Transaction cost
+- `balance_transfers_by_address`: The same transfers stored once per participant (`address`, `direction` = 'in'/'out', `counterparty`) and ordered by `(address, block_height)`. Prefer it for per-address history.
 
 **Key View Categories**:
 
@@ -613,6 +618,20 @@ WHERE from_address = '5GrwvaEF5zXb26Fz9rcQpDWS57CtERHpNehXCPcNoHGKutQY'
 ORDER BY block_timestamp DESC
 LIMIT 50;
 
+-- Same history as a primary key range read on the address-ordered table
+SELECT
+    block_timestamp,
+    block_height,
+    direction,
+    counterparty,
+    asset,
+    amount,
+    fee
+FROM balance_transfers_by_address
+WHERE address = '5GrwvaEF5zXb26Fz9rcQpDWS57CtERHpNehXCPcNoHGKutQY'
+ORDER BY block_height DESC
+LIMIT 50;
+
 -- Analyze address behavior profile
 SELECT * FROM balance_transfers_address_analytics_view
 WHERE address = '5GrwvaEF5zXb26Fz9rcQpDWS57CtERHpNehXCPcNoHGKutQY'
@@ -1064,6 +1083,146 @@ async def execute_balance_transfers_query(query: Annotated[str, Field(
         )
         raise
 
+
+@session_rate_limit
+@mcp.tool(
+    name="balance_transfers_address_history",
+    description="Page through the transfer history of an address, newest first, using keyset cursors.",
+    tags={"balance transfers", "transaction analysis", "address behavior", "pagination"},
+    annotations={
+        "title": "Page through an address transfer history",
+        "readOnlyHint": True,
+        "idempotentHint": True,
+        "openWorldHint": False
+    }
+)
+async def balance_transfers_address_history(
+    address: Annotated[str, Field(description="Address whose transfers should be returned")],
+    cursor: Annotated[Optional[str], Field(description="next_cursor from a previous call; omit for the first page")] = None,
+    page_size: Annotated[int, Field(description="Number of transfers per page", ge=1, le=100)] = 50,
+    assets: Annotated[Optional[str], Field(description="Optional comma-separated list of assets to filter by. ")] = None,
+    include_total: Annotated[bool, Field(description="Whether to return the total number of transfers")] = False
+) -> dict:
+    """
+    Page through the transfer history of an address without OFFSET scans.
+
+    Args:
+        address: Address whose transfers should be returned
+        cursor: next_cursor from a previous call, or None for the first page
+        page_size: Number of transfers per page
+        assets: Optional comma-separated list of assets to filter by
+        include_total: Whether to return the total number of transfers
+
+    Returns:
+        dict: Transfers page with next_cursor (None on the last page)
+    """
+
+    start_time = time.time()
+    tool_name = "balance_transfers_address_history"
+
+    try:
+        assets = assets.split(",") if assets else [get_network_asset(network)]
+
+        balance_transfer_service = BalanceTransferService(get_clickhouse_connection_string(network))
+        try:
+            result = balance_transfer_service.get_address_transactions(
+                address, None, 1, page_size, assets, cursor, include_total
+            )
+        finally:
+            balance_transfer_service.close()
+
+        duration = time.time() - start_time
+        mcp_metrics.record_tool_call(tool_name, duration, True)
+        mcp_metrics.record_database_operation("clickhouse", "address_transactions", duration)
+
+        return result
+
+    except Exception as e:
+        duration = time.time() - start_time
+        mcp_metrics.record_tool_call(tool_name, duration, False, "query_error")
+
+        error_ctx.log_error(
+            f"MCP tool query failed: {tool_name}",
+            error=e,
+            operation="mcp_tool_query",
+            tool_name=tool_name,
+            address=address,
+            cursor=cursor,
+            duration=duration,
+            error_category=classify_error(e)
+        )
+        raise
+
+
+@session_rate_limit
+@mcp.tool(
+    name="balance_series_address_history",
+    description="Page through the 4-hour balance snapshots of an address, newest first, using keyset cursors.",
+    tags={"balance series", "balance tracking", "address behavior", "pagination"},
+    annotations={
+        "title": "Page through an address balance history",
+        "readOnlyHint": True,
+        "idempotentHint": True,
+        "openWorldHint": False
+    }
+)
+async def balance_series_address_history(
+    address: Annotated[str, Field(description="Address whose balance snapshots should be returned")],
+    cursor: Annotated[Optional[str], Field(description="next_cursor from a previous call; omit for the first page")] = None,
+    page_size: Annotated[int, Field(description="Number of snapshots per page", ge=1, le=100)] = 50,
+    assets: Annotated[Optional[str], Field(description="Optional comma-separated list of assets to filter by. ")] = None,
+    include_total: Annotated[bool, Field(description="Whether to return the total number of snapshots")] = False
+) -> dict:
+    """
+    Page through the balance snapshots of an address without OFFSET scans.
+
+    Args:
+        address: Address whose balance snapshots should be returned
+        cursor: next_cursor from a previous call, or None for the first page
+        page_size: Number of snapshots per page
+        assets: Optional comma-separated list of assets to filter by
+        include_total: Whether to return the total number of snapshots
+
+    Returns:
+        dict: Balance snapshots page with next_cursor (None on the last page)
+    """
+
+    start_time = time.time()
+    tool_name = "balance_series_address_history"
+
+    try:
+        assets = assets.split(",") if assets else [get_network_asset(network)]
+
+        balance_series_service = BalanceSeriesService(get_clickhouse_connection_string(network))
+        try:
+            result = balance_series_service.get_address_balance_series(
+                address, 1, page_size, assets, cursor=cursor, include_total=include_total
+            )
+        finally:
+            balance_series_service.close()
+
+        duration = time.time() - start_time
+        mcp_metrics.record_tool_call(tool_name, duration, True)
+        mcp_metrics.record_database_operation("clickhouse", "address_balance_series", duration)
+
+        return result
+
+    except Exception as e:
+        duration = time.time() - start_time
+        mcp_metrics.record_tool_call(tool_name, duration, False, "query_error")
+
+        error_ctx.log_error(
+            f"MCP tool query failed: {tool_name}",
+            error=e,
+            operation="mcp_tool_query",
+            tool_name=tool_name,
+            address=address,
+            cursor=cursor,
+            duration=duration,
+            error_category=classify_error(e)
+        )
+        raise
+
  
 if __name__ == "__main__":
     try:
@@ -21,11 +21,13 @@ router = APIRouter(
         "Retrieves historical balance snapshots for a specific address on a blockchain network.\n\n"
         "This endpoint provides a paginated list of balance snapshots at fixed 4-hour intervals, "
         "showing free, reserved, staked, and total balances along with changes between periods. "
-        "Optionally filter by time range and assets."
+        "Optionally filter by time range and assets. "
+        "For deep pagination pass the `next_cursor` of a response as `cursor` instead of increasing `page`."
     ),
     response_description="Address balance history with pagination",
     responses={
         200: {"description": "Balance history retrieved successfully"},
+        400: {"description": "Invalid cursor"},
         404: {"description": "Address not found"},
         500: {"description": "Internal server error"}
     }
@@ -50,6 +52,14 @@ async def get_address_balance_history(
             None,
             description="End timestamp in milliseconds (Unix timestamp)",
             example=1641081600000
+        ),
+        cursor: Optional[str] = Query(
+            None,
+            description="Cursor returned as next_cursor by a previous call; takes precedence over page"
+        ),
+        include_total: bool = Query(
+            True,
+            description="Whether to compute total_items/total_pages (cached briefly); disable for faster deep paging"
         )
 ):
     # Handle assets parameter - default to network's native asset if not provided
@@ -59,10 +69,73 @@ async def get_address_balance_history(
     try:
         balance_service = BalanceSeriesService(get_clickhouse_connection_string(network))
         result = balance_service.get_address_balance_series(
-            address, page, page_size, assets, start_timestamp, end_timestamp
+            address, page, page_size, assets, start_timestamp, end_timestamp, cursor, include_total
         )
         balance_service.close()
         return result
+    except ValueError as ve:
+        raise HTTPException(status_code=400, detail=str(ve))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+
+
+@router.get(
+    "/{network}/balance-series/address/{address}/chart",
+    summary="Get Address Balance Chart",
+    description=(
+        "Retrieves the balance history of a specific address for charting.\n\n"
+        "The resolution is picked automatically as the cheapest one covering the requested range with "
+        "at most `max_points` snapshots per asset: raw snapshots for short ranges, 4-hour or daily "
+        "rollups for longer ones. Pass `resolution` to force one. Snapshots are returned in "
+        "chronological order with changes between consecutive snapshots of the selected resolution."
+    ),
+    response_description="Address balance history at the selected resolution",
+    responses={
+        200: {"description": "Balance chart retrieved successfully"},
+        400: {"description": "Invalid resolution"},
+        500: {"description": "Internal server error"}
+    }
+)
+async def get_address_balance_chart(
+        network: str = Path(..., description="The blockchain network identifier", example="torus"),
+        address: str = Path(..., description="The blockchain address to query",
+                            example="5C4n8kb3mno7i8vQmqNgsQbwZozHvPyou8TAfZfZ7msTkS5f"),
+        assets: List[str] = Query(
+            None,
+            description="List of assets to filter by. Use ['all'] for all assets. Defaults to network's native asset.",
+            example=["TOR"]
+        ),
+        start_timestamp: Optional[int] = Query(
+            None,
+            description="Start timestamp in milliseconds (Unix timestamp)",
+            example=1640995200000
+        ),
+        end_timestamp: Optional[int] = Query(
+            None,
+            description="End timestamp in milliseconds (Unix timestamp), defaults to now",
+            example=1641081600000
+        ),
+        max_points: int = Query(500, description="Maximum number of snapshots per asset", ge=10, le=5000),
+        resolution: str = Query(
+            "auto",
+            description="Resolution of the snapshots",
+            regex="^(auto|raw|4h|1d)$",
+            example="auto"
+        )
+):
+    # Handle assets parameter - default to network's native asset if not provided
+    if assets is None:
+        assets = [get_network_asset(network)]
+
+    try:
+        balance_service = BalanceSeriesService(get_clickhouse_connection_string(network))
+        result = balance_service.get_address_balance_chart(
+            address, assets, start_timestamp, end_timestamp, max_points, resolution
+        )
+        balance_service.close()
+        return result
+    except ValueError as ve:
+        raise HTTPException(status_code=400, detail=str(ve))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
 
@@ -220,11 +293,13 @@ async def get_balance_aggregations(
         "This endpoint provides aggregated balance activity data showing the volume of balance changes "
         "across all addresses for each time period. It includes metrics like active addresses count, "
         "total balance change volumes, and breakdowns by balance type (free, reserved, staked). "
-        "Results are grouped by time periods and assets, useful for analyzing network-wide balance activity trends."
+        "Results are grouped by time periods and assets, useful for analyzing network-wide balance activity trends. "
+        "Pass the `next_cursor` of a response as `cursor` to page without OFFSET scans."
     ),
     response_description="Balance volume series with pagination",
     responses={
         200: {"description": "Balance volume series retrieved successfully"},
+        400: {"description": "Invalid cursor"},
         500: {"description": "Internal server error"}
     }
 )
@@ -246,6 +321,14 @@ async def get_balance_volume_series(
             None,
             description="End timestamp in milliseconds (Unix timestamp)",
             example=1641081600000
+        ),
+        cursor: Optional[str] = Query(
+            None,
+            description="Cursor returned as next_cursor by a previous call; takes precedence over page"
+        ),
+        include_total: bool = Query(
+            True,
+            description="Whether to compute total_items/total_pages (cached briefly); disable for faster deep paging"
         )
 ):
     # Handle assets parameter - default to network's native asset if not provided
@@ -255,9 +338,11 @@ async def get_balance_volume_series(
     try:
         balance_service = BalanceSeriesService(get_clickhouse_connection_string(network))
         result = balance_service.get_balance_volume_series(
-            page, page_size, assets, start_timestamp, end_timestamp
+            page, page_size, assets, start_timestamp, end_timestamp, cursor, include_total
         )
         balance_service.close()
         return result
+    except ValueError as ve:
+        raise HTTPException(status_code=400, detail=str(ve))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
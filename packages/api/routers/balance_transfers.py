@@ -25,11 +25,13 @@ router = APIRouter(
             "Retrieves transaction history for a specific address on a blockchain network.\n\n"
             "This endpoint provides a paginated list of transactions involving the specified address, "
             "either as sender or receiver. Optionally, you can filter transactions between the specified "
-            "address and a target address."
+            "address and a target address.\n\n"
+            "For deep pagination pass the `next_cursor` of a response as `cursor` instead of increasing `page`."
     ),
     response_description="Address transaction history",
     responses={
         200: {"description": "Transaction history retrieved successfully"},
+        400: {"description": "Invalid cursor"},
         404: {"description": "Address not found"},
         500: {"description": "Internal server error"}
     }
@@ -46,6 +48,14 @@ async def get_address_transactions(
             None,
             description="List of assets to filter by. Use ['all'] for all assets. Defaults to network's native asset.",
             example=["TOR"]
+        ),
+        cursor: Optional[str] = Query(
+            None,
+            description="Cursor returned as next_cursor by a previous call; takes precedence over page"
+        ),
+        include_total: bool = Query(
+            True,
+            description="Whether to compute total_items/total_pages (cached briefly); disable for faster deep paging"
         )
 ):
     # Handle assets parameter - default to network's native asset if not provided
@@ -54,11 +64,15 @@ async def get_address_transactions(
 
     try:
         balance_service = BalanceTransferService(get_clickhouse_connection_string(network))
-        result = balance_service.get_address_transactions(address, target_address, page, page_size, assets)
+        result = balance_service.get_address_transactions(
+            address, target_address, page, page_size, assets, cursor, include_total
+        )
 
         # No need to convert amounts as they're already in human-readable format
 
         return result
+    except ValueError as ve:
+        raise HTTPException(status_code=400, detail=str(ve))
     except Exception as e:
         logger.error(
             "Balance transfers address transactions query failed",
@@ -71,7 +85,8 @@ async def get_address_transactions(
                 "target_address": target_address,
                 "page": page,
                 "page_size": page_size,
-                "assets": assets
+                "assets": assets,
+                "cursor": cursor
             }))
 
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
@@ -85,12 +100,13 @@ async def get_address_transactions(
         "This endpoint provides paginated balance transfers volume series data showing network activity "
         "metrics like transaction counts per period, transfer volumes per period, "
         "active addresses per period, and other network activity indicators. "
-        "Supports different time aggregations (4-hour, daily, weekly, monthly) and filtering by assets and time range."
+        "Supports different time aggregations (4-hour, daily, weekly, monthly) and filtering by assets and time range. "
+        "Pass the `next_cursor` of a response as `cursor` to page without OFFSET scans."
     ),
     response_description="Balance transfers volume series data with pagination",
     responses={
         200: {"description": "Balance transfers volume series retrieved successfully"},
-        400: {"description": "Invalid period type specified"},
+        400: {"description": "Invalid period type or cursor specified"},
         500: {"description": "Internal server error"}
     }
 )
@@ -119,6 +135,14 @@ async def get_balance_transfers_volume_series(
             description="Period type for aggregation",
             regex="^(4hour|daily|weekly|monthly)$",
             example="4hour"
+        ),
+        cursor: Optional[str] = Query(
+            None,
+            description="Cursor returned as next_cursor by a previous call; takes precedence over page"
+        ),
+        include_total: bool = Query(
+            True,
+            description="Whether to compute total_items/total_pages (cached briefly); disable for faster deep paging"
         )
 ):
     # Handle assets parameter - default to network's native asset if not provided
@@ -132,10 +156,12 @@ async def get_balance_transfers_volume_series(
     try:
         balance_service = BalanceTransferService(get_clickhouse_connection_string(network))
         result = balance_service.get_balance_volume_series(
-            page, page_size, assets, start_timestamp, end_timestamp, period_type
+            page, page_size, assets, start_timestamp, end_timestamp, period_type, cursor, include_total
         )
         balance_service.close()
         return result
+    except ValueError as ve:
+        raise HTTPException(status_code=400, detail=str(ve))
     except Exception as e:
 
         logger.error(
@@ -150,7 +176,8 @@ async def get_balance_transfers_volume_series(
                 "assets": assets,
                 "start_timestamp": start_timestamp,
                 "end_timestamp": end_timestamp,
-                "period_type": period_type
+                "period_type": period_type,
+                "cursor": cursor
             }))
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
 
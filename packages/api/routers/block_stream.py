@@ -1,4 +1,6 @@
+from typing import Optional
 from fastapi import APIRouter, Path, Query, HTTPException
+from packages.api.services.balance_utils import encode_cursor, decode_cursor
 from packages.api.services.block_stream_service import BlockStreamService
 from packages.indexers.base import get_clickhouse_connection_string
 
@@ -95,11 +97,14 @@ async def get_latest_block_height(
     description=(
         "Retrieves blocks that contain transactions involving the specified address.\n\n"
         "This endpoint provides detailed information about blocks where the specified address "
-        "was involved in transactions, either as sender or receiver."
+        "was involved in transactions, either as sender or receiver.\n\n"
+        "Pass the `next_cursor` of a response as `cursor` to fetch the following (older) blocks; "
+        "this avoids deep OFFSET scans on addresses with long histories."
     ),
     response_description="List of blocks involving the address",
     responses={
         200: {"description": "Blocks retrieved successfully"},
+        400: {"description": "Invalid cursor"},
         500: {"description": "Internal server error"}
     }
 )
@@ -107,18 +112,31 @@ async def get_blocks_by_address(
     network: str = Path(..., description="The blockchain network identifier", example="torus"),
     address: str = Path(..., description="The blockchain address to query", example="5C4n8kb3mno7i8vQmqNgsQbwZozHvPyou8TAfZfZ7msTkS5f"),
     limit: int = Query(100, description="Maximum number of blocks to return", ge=1, le=100),
-    offset: int = Query(0, description="Offset for pagination", ge=0)
+    offset: int = Query(0, description="Offset for pagination", ge=0),
+    cursor: Optional[str] = Query(None, description="Cursor returned as next_cursor by a previous call; takes precedence over offset")
 ):
     try:
+        before_height = None
+        if cursor:
+            before_height = int(decode_cursor(cursor, ["block_height"])["block_height"])
+
         block_stream_service = BlockStreamService(get_clickhouse_connection_string(network), network)
-        blocks = block_stream_service.get_blocks_by_address(address, limit, offset)
+        blocks = block_stream_service.get_blocks_by_address(address, limit, offset, before_height)
+
+        block_heights = {block['block_height'] for block in blocks}
+        next_cursor = None
+        if len(block_heights) >= limit:
+            next_cursor = encode_cursor({"block_height": min(block_heights)})
         
         return {
             "network": network,
             "address": address,
             "block_count": len(blocks),
-            "blocks": blocks
+            "blocks": blocks,
+            "next_cursor": next_cursor
         }
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
 
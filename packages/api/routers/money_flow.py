@@ -1,4 +1,4 @@
-from typing import Annotated, Optional, List
+from typing import Annotated, Optional, List, Tuple
 from fastapi import APIRouter, Query, Path, HTTPException
 from packages.api.routers import get_memgraph_driver
 from packages.api.services.balance_series_service import BalanceSeriesService
@@ -17,6 +17,17 @@ router = APIRouter(
     }
 )
 
+def validate_period(start_timestamp: Optional[int], end_timestamp: Optional[int]) -> Optional[Tuple[int, int]]:
+    """Validate optional period bounds, returning None when no period was requested"""
+    if start_timestamp is None and end_timestamp is None:
+        return None
+    if start_timestamp is None or end_timestamp is None:
+        raise HTTPException(status_code=400, detail="Both start_timestamp and end_timestamp are required for a period")
+    if start_timestamp >= end_timestamp:
+        raise HTTPException(status_code=400, detail="start_timestamp must be before end_timestamp")
+    return start_timestamp, end_timestamp
+
+
 @router.get(
     "/{network}/money-flow/path/shortest",
     summary="Retrieve the shortest path money flow between two addresses",
@@ -50,20 +61,36 @@ async def get_money_flow_by_path_shortest(
             None,
             description="List of assets to filter by. Use ['all'] for all assets. Defaults to network's native asset.",
             example=["TOR"]
+        ),
+        start_timestamp: Optional[int] = Query(
+            None,
+            description="Only follow transfers from this timestamp in milliseconds (requires period edges, monthly granularity)",
+            example=1735689600000
+        ),
+        end_timestamp: Optional[int] = Query(
+            None,
+            description="Only follow transfers before this timestamp in milliseconds (requires period edges, monthly granularity)",
+            example=1738368000000
         )
 ):
     # Handle assets parameter - default to network's native asset if not provided
     if assets is None:
         assets = [get_network_asset(network)]
+    period = validate_period(start_timestamp, end_timestamp)
     
     memgraph_driver = get_memgraph_driver(network)
     try:
         money_flow_service = MoneyFlowService(memgraph_driver)
-        result = money_flow_service.get_money_flow_by_path_shortest(
-            source_address=source_address,
-            target_address=target_address,
-            assets=assets
-        )
+        if period:
+            result = money_flow_service.get_money_flow_by_path_shortest_period(
+                source_address, target_address, period[0], period[1], assets
+            )
+        else:
+            result = money_flow_service.get_money_flow_by_path_shortest(
+                source_address=source_address,
+                target_address=target_address,
+                assets=assets
+            )
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
     if not result:
@@ -106,21 +133,37 @@ async def get_money_flow_by_path_explore_address(
             None,
             description="List of assets to filter by. Use ['all'] for all assets. Defaults to network's native asset.",
             example=["TOR"]
+        ),
+        start_timestamp: Optional[int] = Query(
+            None,
+            description="Only follow transfers from this timestamp in milliseconds (requires period edges, monthly granularity)",
+            example=1735689600000
+        ),
+        end_timestamp: Optional[int] = Query(
+            None,
+            description="Only follow transfers before this timestamp in milliseconds (requires period edges, monthly granularity)",
+            example=1738368000000
         )
 ):
     # Handle assets parameter - default to network's native asset if not provided
     if assets is None:
         assets = [get_network_asset(network)]
+    period = validate_period(start_timestamp, end_timestamp)
     
     memgraph_driver = get_memgraph_driver(network)
     try:
         money_flow_service = MoneyFlowService(memgraph_driver)
-        result = money_flow_service.get_money_flow_by_path_explore(
-            addresses,
-            depth_level,
-            direction,
-            assets
-        )
+        if period:
+            result = money_flow_service.get_money_flow_by_path_period(
+                addresses, depth_level, direction, period[0], period[1], assets
+            )
+        else:
+            result = money_flow_service.get_money_flow_by_path_explore(
+                addresses,
+                depth_level,
+                direction,
+                assets
+            )
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
 
@@ -1,7 +1,18 @@
+import time
 from typing import Any, Dict, Optional, List
 import clickhouse_connect
 
-from packages.api.services.balance_utils import format_paginated_response
+from packages.api.services.balance_utils import (
+    format_paginated_response,
+    format_cursor_response,
+    decode_cursor,
+    next_cursor_from_items,
+    query_total_count,
+    latest_version_rows,
+    derived_balance_changes,
+    preceding_snapshot_start,
+    FINAL_READ_SETTINGS
+)
 
 
 def get_balance_series_tables() -> List[str]:
@@ -12,7 +23,9 @@ def get_balance_series_tables() -> List[str]:
     """
     return [
         "balance_series",
+        "balance_series_by_address",
         "balance_series_latest_view",
+        "balance_series_rollup_view",
         "balance_series_daily_view",
         "balance_series_weekly_view",
         "balance_series_monthly_view",
@@ -47,11 +60,61 @@ def create_balance_series_schema(schema: Dict[str, Any], assets: List[str] = Non
             "Multi-balance type support (free, reserved, staked, total)",
             "Change tracking between periods with both absolute and percentage metrics",
             "Multi-level time aggregation (4-hour, daily, weekly, monthly)",
+            "End-of-bucket balance rollups at 4-hour and daily resolutions (balance_series_rollup_view)",
             "Optimized views for efficient querying at different time scales"
         ]
     }
 
 
+# Resolutions of balance_series_rollup in hours, finest first
+BALANCE_ROLLUP_RESOLUTIONS = [4, 24]
+
+# Resolutions accepted by the balance chart, None being the raw balance_series snapshots
+BALANCE_CHART_RESOLUTIONS = {"raw": None, "4h": 4, "1d": 24}
+
+# Finest period the balance series consumer accepts (--period-hours 1), assumed before any snapshot exists
+MIN_PERIOD_MS = 60 * 60 * 1000
+
+# Period of the recorded balance series by database, it only changes when the consumer is reconfigured
+_period_ms_by_database: Dict[str, int] = {}
+
+
+def get_rollup_resolutions(period_ms: int) -> List[int]:
+    """Rollup resolutions in hours maintained for balance series recorded every period_ms
+
+    The indexer only maintains rollups coarser than its period, mirroring rollup_resolutions
+    of the balance series indexer.
+    """
+    return [hours for hours in BALANCE_ROLLUP_RESOLUTIONS if hours * 60 * 60 * 1000 > period_ms]
+
+
+def select_balance_resolution(start_timestamp: Optional[int], end_timestamp: int, max_points: int,
+                              period_ms: int = MIN_PERIOD_MS) -> Optional[int]:
+    """Pick the cheapest resolution returning at most max_points snapshots per address and asset
+
+    Args:
+        start_timestamp: Start of the range in milliseconds, None for the whole history
+        end_timestamp: End of the range in milliseconds
+        max_points: Maximum number of snapshots per address and asset
+        period_ms: Period the raw balance series are recorded at
+
+    Returns:
+        None to read raw balance_series snapshots, otherwise a rollup resolution in hours
+    """
+    rollup_resolutions = get_rollup_resolutions(period_ms)
+    if start_timestamp is None:
+        return rollup_resolutions[-1] if rollup_resolutions else None
+
+    span = max(end_timestamp - start_timestamp, 0)
+    if span <= max_points * period_ms:
+        return None
+
+    for resolution_hours in rollup_resolutions:
+        if span <= max_points * resolution_hours * 60 * 60 * 1000:
+            return resolution_hours
+    return rollup_resolutions[-1] if rollup_resolutions else None
+
+
 class BalanceSeriesService:
     def __init__(self, connection_params: Dict[str, Any]):
         """Initialize the Balance Series Service with database connection
@@ -59,6 +122,7 @@ class BalanceSeriesService:
         Args:
             connection_params: Dictionary with ClickHouse connection parameters
         """
+        self.database = connection_params['database']
         self.client = clickhouse_connect.get_client(
             host=connection_params['host'],
             port=int(connection_params['port']),
@@ -78,21 +142,45 @@ class BalanceSeriesService:
         if hasattr(self, 'client'):
             self.client.close()
 
+    def get_period_ms(self) -> int:
+        """Period the balance series are recorded at, read from the latest snapshots
+
+        Returns:
+            Period in milliseconds, MIN_PERIOD_MS while no snapshot has been recorded
+        """
+        period_ms = _period_ms_by_database.get(self.database)
+        if period_ms is not None:
+            return period_ms
+
+        result = self.client.query("""
+            SELECT max(period_end_timestamp - period_start_timestamp)
+            FROM (SELECT period_start_timestamp, period_end_timestamp FROM balance_series_latest LIMIT 100)
+        """)
+        period_ms = result.result_rows[0][0] if result.result_rows else 0
+        if not period_ms:
+            return MIN_PERIOD_MS
+
+        _period_ms_by_database[self.database] = period_ms
+        return period_ms
+
     def get_address_balance_series(self, address: str, page: int, page_size: int, assets: List[str] = None, 
-                                 start_timestamp: Optional[int] = None, end_timestamp: Optional[int] = None):
+                                 start_timestamp: Optional[int] = None, end_timestamp: Optional[int] = None,
+                                 cursor: Optional[str] = None, include_total: bool = True):
         """
         Returns historical balance snapshots for a specific address with pagination
 
         Args:
             address: The blockchain address to query
-            page: Page number for pagination
+            page: Page number for pagination, ignored when a cursor is given
             page_size: Number of items per page
             assets: List of assets to filter by
             start_timestamp: Optional start timestamp in milliseconds
             end_timestamp: Optional end timestamp in milliseconds
+            cursor: Optional cursor from a previous response to continue after its last snapshot
+            include_total: Whether to return the (cached) total number of snapshots
 
         Returns:
-            Dictionary with paginated balance history
+            Dictionary with paginated balance history and the cursor for the next page
         """
         # Build asset filter
         asset_filter = ""
@@ -100,18 +188,43 @@ class BalanceSeriesService:
             asset_conditions = " OR ".join([f"asset = '{asset}'" for asset in assets])
             asset_filter = f" AND ({asset_conditions})"
         
-        # Build timestamp filter
-        timestamp_filter = ""
+        # Build timestamp filters
+        start_filter = ""
+        end_filter = ""
         if start_timestamp:
-            timestamp_filter += f" AND period_start_timestamp >= {start_timestamp}"
+            start_filter = f" AND period_start_timestamp >= {start_timestamp}"
         if end_timestamp:
-            timestamp_filter += f" AND period_end_timestamp <= {end_timestamp}"
-
+            end_filter = f" AND period_end_timestamp <= {end_timestamp}"
+        timestamp_filter = start_filter + end_filter
+
+        # Keyset pagination over (period_start_timestamp, asset), newest first
+        cursor_keys = ["period_start_timestamp", "asset"]
+        cursor_filter = ""
+        data_params = {'address': address, 'limit': page_size, 'offset': (page - 1) * page_size}
+        if cursor:
+            cursor_values = decode_cursor(cursor, cursor_keys)
+            cursor_filter = (" AND period_start_timestamp <= {cursor_period:UInt64}"
+                             " AND (period_start_timestamp, asset) < ({cursor_period:UInt64}, {cursor_asset:String})")
+            data_params.update({
+                'cursor_period': cursor_values['period_start_timestamp'],
+                'cursor_asset': cursor_values['asset'],
+                'offset': 0
+            })
+
+        # Versions of one snapshot share (period_start_timestamp, asset), so counting distinct
+        # keys gives the deduplicated total without FINAL; the address-ordered copy makes the
+        # address a sorting key prefix
         count_query = f"""
-                      SELECT COUNT(*) AS total
-                      FROM balance_series FINAL
+                      SELECT uniqExact(period_start_timestamp, asset) AS total
+                      FROM balance_series_by_address
                       WHERE address = {{address:String}}{asset_filter}{timestamp_filter}
                       """
+
+        balance_series_rows = latest_version_rows(
+            "balance_series_by_address",
+            ["asset", "address", "period_start_timestamp"],
+            "address = {address:String}" + asset_filter + timestamp_filter + cursor_filter
+        )
         
         data_query = f"""
                      SELECT bs.period_start_timestamp,
@@ -128,20 +241,16 @@ class BalanceSeriesService:
                             bs.staked_balance_change,
                             bs.total_balance_change,
                             bs.total_balance_percent_change
-                     FROM (SELECT * FROM balance_series FINAL) AS bs
-                     WHERE bs.address = {{address:String}}{asset_filter}{timestamp_filter}
-                     ORDER BY bs.period_start_timestamp DESC
+                     FROM {balance_series_rows} AS bs
+                     ORDER BY bs.period_start_timestamp DESC, bs.asset DESC
                      LIMIT {{limit:Int}} OFFSET {{offset:Int}}
                      """
 
-        count_result = self.client.query(count_query, {'address': address}).result_rows
-        total_count = count_result[0][0] if count_result else 0
-
-        # Calculate pagination parameters
-        offset = (page - 1) * page_size
+        total_count = None
+        if include_total:
+            total_count = query_total_count(self.client, self.database, count_query, {'address': address})
 
         # Query to fetch paginated balance series data
-        data_params = {'address': address, 'limit': page_size, 'offset': offset}
         query_result = self.client.query(data_query, data_params)
         rows = query_result.result_rows
 
@@ -166,17 +275,165 @@ class BalanceSeriesService:
         # Map each row (a list of values) into a dictionary using the column names
         balance_series = [dict(zip(columns, row)) for row in rows]
 
-        # Use the standardized format_paginated_response utility function
-        return format_paginated_response(
+        return format_cursor_response(
             items=balance_series,
-            page=page,
             page_size=page_size,
-            total_items=total_count
+            next_cursor=next_cursor_from_items(balance_series, page_size, cursor_keys),
+            total_items=total_count,
+            page=None if cursor else page
         )
 
+    def get_address_balance_chart(self, address: str, assets: List[str] = None,
+                                  start_timestamp: Optional[int] = None, end_timestamp: Optional[int] = None,
+                                  max_points: int = 500, resolution: str = "auto"):
+        """
+        Returns the balance history of an address at the cheapest resolution covering the range
+
+        Short ranges are read from the raw balance_series snapshots, longer ones from the
+        4h or 1d rollups coarser than the recorded period, so the number of rows read stays
+        bounded by max_points instead of growing with the length of the range. Raw snapshots carry their stored changes;
+        rollups keep no change columns, so bucket changes are derived between consecutive
+        buckets of the selected resolution.
+
+        Args:
+            address: The blockchain address to query
+            assets: List of assets to filter by
+            start_timestamp: Optional start timestamp in milliseconds
+            end_timestamp: Optional end timestamp in milliseconds, defaults to now
+            max_points: Maximum number of snapshots per asset used to select the resolution
+            resolution: 'auto', 'raw', '4h' or '1d'
+
+        Returns:
+            Dictionary with the selected resolution and the snapshots in chronological order
+        """
+        period_ms = self.get_period_ms()
+        if resolution == "auto":
+            if end_timestamp is None:
+                end_timestamp = int(time.time() * 1000)
+            resolution_hours = select_balance_resolution(start_timestamp, end_timestamp, max_points, period_ms)
+        elif resolution in BALANCE_CHART_RESOLUTIONS:
+            resolution_hours = BALANCE_CHART_RESOLUTIONS[resolution]
+            if resolution_hours is not None and resolution_hours not in get_rollup_resolutions(period_ms):
+                raise ValueError(f"Resolution '{resolution}' is not maintained for balance series recorded every "
+                                 f"{period_ms // (60 * 60 * 1000)} hours, use 'raw'")
+        else:
+            raise ValueError("Resolution must be 'auto', 'raw', '4h' or '1d'")
+
+        # Build asset filter
+        asset_filter = ""
+        if assets and assets != ["all"]:
+            asset_conditions = " OR ".join([f"asset = '{asset}'" for asset in assets])
+            asset_filter = f" AND ({asset_conditions})"
+
+        params = {'address': address}
+        if resolution_hours is not None and start_timestamp:
+            # Include the bucket the range starts in
+            bucket_ms = resolution_hours * 60 * 60 * 1000
+            start_timestamp = start_timestamp // bucket_ms * bucket_ms
+
+        # Build timestamp filter
+        timestamp_filter = ""
+        if start_timestamp:
+            timestamp_filter += " AND period_start_timestamp >= {start_timestamp:UInt64}"
+            params['start_timestamp'] = start_timestamp
+        if end_timestamp:
+            timestamp_filter += " AND period_start_timestamp < {end_timestamp:UInt64}"
+            params['end_timestamp'] = end_timestamp
+
+        key_filter = "address = {address:String}" + asset_filter
+        if resolution_hours is None:
+            snapshot_rows = latest_version_rows(
+                "balance_series_by_address",
+                ["asset", "address", "period_start_timestamp"],
+                key_filter + timestamp_filter
+            )
+        else:
+            # The window covers the range and the bucket preceding it in each asset
+            params['resolution_hours'] = resolution_hours
+            key_filter = "resolution_hours = {resolution_hours:UInt16} AND " + key_filter
+            window_filter = key_filter
+            if start_timestamp:
+                window_start = preceding_snapshot_start(
+                    "balance_series_rollup", "bucket_start_timestamp", key_filter, "{start_timestamp:UInt64}"
+                )
+                window_filter += f" AND bucket_start_timestamp >= {window_start}"
+            if end_timestamp:
+                window_filter += " AND bucket_start_timestamp < {end_timestamp:UInt64}"
+
+            # Rollups keep no change columns, the first bucket of an address reports zero changes
+            snapshot_rows = derived_balance_changes(f"""(
+                SELECT bucket_start_timestamp AS period_start_timestamp,
+                       argMaxMerge(period_end_timestamp) AS period_end_timestamp,
+                       argMaxMerge(block_height) AS block_height,
+                       address,
+                       asset,
+                       argMaxMerge(free_balance) AS free_balance,
+                       argMaxMerge(reserved_balance) AS reserved_balance,
+                       argMaxMerge(staked_balance) AS staked_balance,
+                       argMaxMerge(total_balance) AS total_balance,
+                       toDecimal128(0, 18) AS free_balance_change,
+                       toDecimal128(0, 18) AS reserved_balance_change,
+                       toDecimal128(0, 18) AS staked_balance_change,
+                       toDecimal128(0, 18) AS total_balance_change,
+                       toDecimal64(0, 6) AS total_balance_percent_change
+                FROM balance_series_rollup
+                WHERE {window_filter}
+                GROUP BY bucket_start_timestamp, address, asset
+            )""")
+
+        query = f"""
+                SELECT bs.period_start_timestamp,
+                       bs.period_end_timestamp,
+                       bs.block_height,
+                       bs.address,
+                       bs.asset,
+                       bs.free_balance,
+                       bs.reserved_balance,
+                       bs.staked_balance,
+                       bs.total_balance,
+                       bs.free_balance_change,
+                       bs.reserved_balance_change,
+                       bs.staked_balance_change,
+                       bs.total_balance_change,
+                       bs.total_balance_percent_change
+                FROM {snapshot_rows} AS bs
+                WHERE bs.address = {{address:String}}{timestamp_filter}
+                ORDER BY bs.asset, bs.period_start_timestamp
+                """
+
+        query_result = self.client.query(query, params)
+        rows = query_result.result_rows
+
+        # Define the column names
+        columns = [
+            "period_start_timestamp",
+            "period_end_timestamp",
+            "block_height",
+            "address",
+            "asset",
+            "free_balance",
+            "reserved_balance",
+            "staked_balance",
+            "total_balance",
+            "free_balance_change",
+            "reserved_balance_change",
+            "staked_balance_change",
+            "total_balance_change",
+            "total_balance_percent_change"
+        ]
+
+        # Map each row into a dictionary
+        balance_series = [dict(zip(columns, row)) for row in rows]
+
+        return {
+            "resolution": next(name for name, hours in BALANCE_CHART_RESOLUTIONS.items() if hours == resolution_hours),
+            "items": balance_series,
+            "total_items": len(balance_series)
+        }
+
     def get_current_balances(self, addresses: List[str], assets: List[str] = None):
         """
-        Returns latest balance for addresses using balance_series_latest_view
+        Returns latest balance for addresses using balance_series_latest
 
         Args:
             addresses: List of blockchain addresses to query
@@ -190,27 +447,25 @@ class BalanceSeriesService:
         if assets and assets != ["all"]:
             asset_conditions = " OR ".join([f"asset = '{asset}'" for asset in assets])
             asset_filter = f" AND ({asset_conditions})"
-        
-        # Build address filter
-        address_conditions = " OR ".join([f"address = '{addr}'" for addr in addresses])
-        address_filter = f"({address_conditions})"
 
+        # Addresses are bound as one array parameter and matched as a set against the
+        # (asset, address) sorting key of the table
         query = f"""
-                SELECT bslv.address,
-                       bslv.asset,
-                       bslv.latest_period_start,
-                       bslv.latest_period_end,
-                       bslv.latest_block_height,
-                       bslv.free_balance,
-                       bslv.reserved_balance,
-                       bslv.staked_balance,
-                       bslv.total_balance
-                FROM balance_series_latest_view bslv
-                WHERE {address_filter}{asset_filter}
-                ORDER BY bslv.address, bslv.asset
+                SELECT bsl.address,
+                       bsl.asset,
+                       bsl.latest_period_start,
+                       bsl.latest_period_end,
+                       bsl.latest_block_height,
+                       bsl.free_balance,
+                       bsl.reserved_balance,
+                       bsl.staked_balance,
+                       bsl.total_balance
+                FROM balance_series_latest AS bsl FINAL
+                WHERE bsl.address IN (SELECT arrayJoin({{addresses:Array(String)}})){asset_filter}
+                ORDER BY bsl.address, bsl.asset
                 """
 
-        query_result = self.client.query(query)
+        query_result = self.client.query(query, {'addresses': addresses})
         rows = query_result.result_rows
 
         # Define the column names
@@ -260,11 +515,17 @@ class BalanceSeriesService:
         if min_change_threshold is not None:
             threshold_filter = f" AND abs(total_balance_change) >= {min_change_threshold}"
 
+        # Change columns differ between versions of a snapshot, so change filters apply after deduplication
+        balance_series_rows = latest_version_rows(
+            "balance_series_by_address",
+            ["asset", "address", "period_start_timestamp"],
+            "address = {address:String}" + asset_filter
+        )
+
         count_query = f"""
                       SELECT COUNT(*) AS total
-                      FROM balance_series FINAL
-                      WHERE address = {{address:String}} 
-                        AND total_balance_change != 0{asset_filter}{threshold_filter}
+                      FROM {balance_series_rows} AS bs
+                      WHERE bs.total_balance_change != 0{threshold_filter}
                       """
         
         data_query = f"""
@@ -279,9 +540,8 @@ class BalanceSeriesService:
                             bs.staked_balance_change,
                             bs.total_balance_change,
                             bs.total_balance_percent_change
-                     FROM (SELECT * FROM balance_series FINAL) AS bs
-                     WHERE bs.address = {{address:String}} 
-                       AND bs.total_balance_change != 0{asset_filter}{threshold_filter}
+                     FROM {balance_series_rows} AS bs
+                     WHERE bs.total_balance_change != 0{threshold_filter}
                      ORDER BY abs(bs.total_balance_change) DESC, bs.period_start_timestamp DESC
                      LIMIT {{limit:Int}} OFFSET {{offset:Int}}
                      """
@@ -461,19 +721,22 @@ class BalanceSeriesService:
         }
 
     def get_balance_volume_series(self, page: int = 1, page_size: int = 20, assets: List[str] = None,
-                                start_timestamp: Optional[int] = None, end_timestamp: Optional[int] = None):
+                                start_timestamp: Optional[int] = None, end_timestamp: Optional[int] = None,
+                                cursor: Optional[str] = None, include_total: bool = True):
         """
         Returns balance volume series showing network-wide balance activity metrics over time
         
         Args:
-            page: Page number for pagination
+            page: Page number for pagination, ignored when a cursor is given
             page_size: Number of items per page
             assets: List of assets to filter by
             start_timestamp: Optional start timestamp in milliseconds
             end_timestamp: Optional end timestamp in milliseconds
+            cursor: Optional cursor from a previous response to continue after its last period
+            include_total: Whether to return the (cached) total number of periods
             
         Returns:
-            Dictionary with paginated balance volume series data
+            Dictionary with paginated balance volume series data and the cursor for the next page
         """
         # Build asset filter
         asset_filter = ""
@@ -488,10 +751,24 @@ class BalanceSeriesService:
         if end_timestamp:
             timestamp_filter += f" AND period_end_timestamp <= {end_timestamp}"
 
-        # Count query for pagination
+        # Keyset pagination over (period_start_timestamp, asset), newest first
+        cursor_keys = ["period_start_timestamp", "asset"]
+        cursor_filter = ""
+        data_params = {'limit': page_size, 'offset': (page - 1) * page_size}
+        if cursor:
+            cursor_values = decode_cursor(cursor, cursor_keys)
+            cursor_filter = (" AND period_start_timestamp <= {cursor_period:UInt64}"
+                             " AND (period_start_timestamp, asset) < ({cursor_period:UInt64}, {cursor_asset:String})")
+            data_params.update({
+                'cursor_period': cursor_values['period_start_timestamp'],
+                'cursor_asset': cursor_values['asset'],
+                'offset': 0
+            })
+
+        # Count query for pagination; distinct keys are unaffected by duplicate versions
         count_query = f"""
                       SELECT COUNT(DISTINCT period_start_timestamp, asset) AS total
-                      FROM balance_series FINAL
+                      FROM balance_series
                       WHERE 1=1{asset_filter}{timestamp_filter}
                       """
         
@@ -506,22 +783,19 @@ class BalanceSeriesService:
                          SUM(ABS(free_balance_change)) as total_free_balance_changes,
                          SUM(ABS(reserved_balance_change)) as total_reserved_balance_changes,
                          SUM(ABS(staked_balance_change)) as total_staked_balance_changes
-                     FROM (SELECT * FROM balance_series FINAL) AS bs
-                     WHERE 1=1{asset_filter}{timestamp_filter}
+                     FROM balance_series AS bs FINAL
+                     WHERE 1=1{asset_filter}{timestamp_filter}{cursor_filter}
                      GROUP BY period_start_timestamp, period_end_timestamp, asset
-                     ORDER BY period_start_timestamp DESC, asset
+                     ORDER BY period_start_timestamp DESC, asset DESC
                      LIMIT {{limit:Int}} OFFSET {{offset:Int}}
                      """
 
-        count_result = self.client.query(count_query).result_rows
-        total_count = count_result[0][0] if count_result else 0
-
-        # Calculate pagination parameters
-        offset = (page - 1) * page_size
+        total_count = None
+        if include_total:
+            total_count = query_total_count(self.client, self.database, count_query)
 
-        # Query to fetch paginated balance volume series data
-        data_params = {'limit': page_size, 'offset': offset}
-        query_result = self.client.query(data_query, data_params)
+        # Network-wide aggregation: FINAL is restricted to the filtered key range and merged per partition
+        query_result = self.client.query(data_query, data_params, settings=FINAL_READ_SETTINGS)
         rows = query_result.result_rows
 
         # Define the column names in the order they appear in the SELECT clause
@@ -539,10 +813,10 @@ class BalanceSeriesService:
         # Map each row into a dictionary
         volume_series = [dict(zip(columns, row)) for row in rows]
 
-        # Use the standardized format_paginated_response utility function
-        return format_paginated_response(
+        return format_cursor_response(
             items=volume_series,
-            page=page,
             page_size=page_size,
-            total_items=total_count
-        )
\ No newline at end of file
+            next_cursor=next_cursor_from_items(volume_series, page_size, cursor_keys),
+            total_items=total_count,
+            page=None if cursor else page
+        )
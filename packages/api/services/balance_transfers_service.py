@@ -1,7 +1,14 @@
 from typing import Any, Dict, Optional, List
 import clickhouse_connect
 
-from packages.api.services.balance_utils import format_paginated_response
+from packages.api.services.balance_utils import (
+    format_paginated_response,
+    format_cursor_response,
+    decode_cursor,
+    next_cursor_from_items,
+    query_total_count,
+    FINAL_READ_SETTINGS
+)
 
 
 def get_balance_transfers_tables() -> List[str]:
@@ -12,6 +19,7 @@ def get_balance_transfers_tables() -> List[str]:
     """
     return [
         "balance_transfers",
+        "balance_transfers_by_address",
         "balance_transfers_volume_series_view",
         "balance_transfers_volume_daily_view",
         "balance_transfers_volume_weekly_view",
@@ -64,6 +72,7 @@ class BalanceTransferService:
         Args:
             connection_params: Dictionary with ClickHouse connection parameters
         """
+        self.database = connection_params['database']
         self.client = clickhouse_connect.get_client(
             host=connection_params['host'],
             port=int(connection_params['port']),
@@ -83,18 +92,22 @@ class BalanceTransferService:
         if hasattr(self, 'client'):
             self.client.close()
 
-    def get_address_transactions(self, address, target_address: Optional[str], page, page_size, assets: List[str] = None):
+    def get_address_transactions(self, address, target_address: Optional[str], page, page_size, assets: List[str] = None,
+                                 cursor: Optional[str] = None, include_total: bool = True):
         """
         Returns transaction history for a specific address with pagination
 
         Args:
             address: The blockchain address to query
             target_address: Optional target address to filter transactions
-            page: Page number for pagination
+            page: Page number for pagination, ignored when a cursor is given
             page_size: Number of items per page
+            assets: List of assets to filter by
+            cursor: Optional cursor from a previous response to continue after its last transaction
+            include_total: Whether to return the (cached) total number of transactions
 
         Returns:
-            Dictionary with paginated transaction history
+            Dictionary with paginated transaction history and the cursor for the next page
         """
         # Build asset filter
         asset_filter = ""
@@ -102,60 +115,62 @@ class BalanceTransferService:
             asset_conditions = " OR ".join([f"asset = '{asset}'" for asset in assets])
             asset_filter = f" AND ({asset_conditions})"
         
+        # Per-address history is served from balance_transfers_by_address, which is ordered by
+        # (address, block_height) so both queries are primary key range reads.
         if target_address:
-            count_query = f"""
-                          SELECT COUNT(*) AS total
-                          FROM balance_transfers FINAL
-                          WHERE from_address = {{address:String}} AND to_address = {{target_address:String}}{asset_filter}
-                          """
-            data_query = f"""
-                         SELECT bt.extrinsic_id,
-                                bt.event_idx,
-                                bt.block_height,
-                                bt.from_address,
-                                bt.to_address,
-                                bt.amount,
-                                bt.fee,
-                                bt.block_timestamp,
-                                bt.asset
-                         FROM (SELECT * FROM balance_transfers FINAL) AS bt
-                         WHERE bt.from_address = {{address:String}} AND bt.to_address = {{target_address:String}}{asset_filter}
-                         ORDER BY bt.block_height DESC
-                         LIMIT {{limit:Int}} OFFSET {{offset:Int}}
-                         """
-            count_result = self.client.query(count_query,
-                                             {'address': address, 'target_address': target_address}).result_rows
-            total_count = count_result[0][0] if count_result else 0
+            address_filter = "address = {address:String} AND direction = 'out' AND counterparty = {target_address:String}"
+        else:
+            # Self-transfers are stored once per direction; keep only the outgoing row
+            address_filter = "address = {address:String} AND NOT (direction = 'in' AND counterparty = address)"
+
+        data_params = {'address': address, 'limit': page_size, 'target_address': target_address}
+
+        # Keyset pagination continues strictly after the last row of the previous page
+        cursor_keys = ["block_height", "event_idx", "asset"]
+        cursor_filter = ""
+        if cursor:
+            cursor_values = decode_cursor(cursor, cursor_keys)
+            cursor_filter = (" AND block_height <= {cursor_block_height:UInt32}"
+                             " AND (block_height, event_idx, asset) < "
+                             "({cursor_block_height:UInt32}, {cursor_event_idx:String}, {cursor_asset:String})")
+            data_params.update({
+                'cursor_block_height': cursor_values['block_height'],
+                'cursor_event_idx': cursor_values['event_idx'],
+                'cursor_asset': cursor_values['asset']
+            })
+            data_params['offset'] = 0
         else:
+            data_params['offset'] = (page - 1) * page_size
+
+        data_query = f"""
+                     SELECT extrinsic_id,
+                            event_idx,
+                            block_height,
+                            if(direction = 'out', address, counterparty) AS from_address,
+                            if(direction = 'out', counterparty, address) AS to_address,
+                            amount,
+                            fee,
+                            block_timestamp,
+                            asset
+                     FROM balance_transfers_by_address FINAL
+                     WHERE {address_filter}{asset_filter}{cursor_filter}
+                     ORDER BY block_height DESC, event_idx DESC, asset DESC
+                     LIMIT {{limit:Int}} OFFSET {{offset:Int}}
+                     """
+
+        total_count = None
+        if include_total:
+            # Versions of one row share its sorting key, so counting distinct keys avoids FINAL
             count_query = f"""
-                          SELECT COUNT(*) AS total
-                          FROM balance_transfers FINAL
-                          WHERE (from_address = {{address:String}} OR to_address = {{address:String}}){asset_filter}
+                          SELECT uniqExact(block_height, event_idx, asset, direction) AS total
+                          FROM balance_transfers_by_address
+                          WHERE {address_filter}{asset_filter}
                           """
-            data_query = f"""
-                         SELECT bt.extrinsic_id,
-                                bt.event_idx,
-                                bt.block_height,
-                                bt.from_address,
-                                bt.to_address,
-                                bt.amount,
-                                bt.fee,
-                                bt.block_timestamp,
-                                bt.asset
-                         FROM (SELECT * FROM balance_transfers FINAL) AS bt
-                         WHERE (bt.from_address = {{address:String}} OR bt.to_address = {{address:String}}){asset_filter}
-                         ORDER BY bt.block_height DESC
-                         LIMIT {{limit:Int}} OFFSET {{offset:Int}}
-                         """
-            count_result = self.client.query(count_query, {'address': address}).result_rows
-            total_count = count_result[0][0] if count_result else 0
-
-        # Calculate pagination parameters.
-        offset = (page - 1) * page_size
+            total_count = query_total_count(self.client, self.database, count_query,
+                                            {'address': address, 'target_address': target_address})
 
-        # Query to fetch paginated transactions joined with blocks for the block timestamp.
-        data_params = {'address': address, 'limit': page_size, 'offset': offset, 'target_address': target_address}
-        query_result = self.client.query(data_query, data_params)
+        # The address filter is a sorting key prefix, so FINAL only merges that address's range
+        query_result = self.client.query(data_query, data_params, settings=FINAL_READ_SETTINGS)
         rows = query_result.result_rows
 
         # Define the column names in the order they appear in the SELECT clause.
@@ -174,12 +189,12 @@ class BalanceTransferService:
         # Map each row (a list of values) into a dictionary using the column names.
         transactions = [dict(zip(columns, row)) for row in rows]
 
-        # Use the standardized format_paginated_response utility function
-        return format_paginated_response(
+        return format_cursor_response(
             items=transactions,
-            page=page,
             page_size=page_size,
-            total_items=total_count
+            next_cursor=next_cursor_from_items(transactions, page_size, cursor_keys),
+            total_items=total_count,
+            page=None if cursor else page
         )
 
     def get_addresses_from_transaction_id(self, transaction_id: str, assets: List[str] = None):
@@ -192,7 +207,7 @@ class BalanceTransferService:
         count_query = f"""
                       SELECT DISTINCT address
                       FROM (SELECT arrayJoin([from_address, to_address]) AS address
-                            FROM balance_transfers FINAL
+                            FROM balance_transfers
                             WHERE extrinsic_id = {{extrinsic_id:String}}{asset_filter})
                       """
         result = self.client.query(count_query, {'extrinsic_id': transaction_id}).result_rows
@@ -202,20 +217,22 @@ class BalanceTransferService:
 
     def get_balance_volume_series(self, page: int = 1, page_size: int = 20, assets: List[str] = None,
                                 start_timestamp: Optional[int] = None, end_timestamp: Optional[int] = None,
-                                period_type: str = "4hour"):
+                                period_type: str = "4hour", cursor: Optional[str] = None, include_total: bool = True):
         """
         Returns balance transfers volume series data providing network-wide transfer activity metrics
         
         Args:
-            page: Page number for pagination
+            page: Page number for pagination, ignored when a cursor is given
             page_size: Number of items per page
             assets: List of assets to filter by
             start_timestamp: Optional start timestamp in milliseconds
             end_timestamp: Optional end timestamp in milliseconds
             period_type: Period type for aggregation ("4hour", "daily", "weekly", "monthly")
+            cursor: Optional cursor from a previous response to continue after its last period
+            include_total: Whether to return the (cached) total number of periods
             
         Returns:
-            Dictionary with paginated balance volume series data
+            Dictionary with paginated balance volume series data and the cursor for the next page
         """
         # Build asset filter
         asset_filter = ""
@@ -223,6 +240,21 @@ class BalanceTransferService:
             asset_conditions = " OR ".join([f"asset = '{asset}'" for asset in assets])
             asset_filter = f" AND ({asset_conditions})"
         
+        # Keyset pagination over (period, asset), newest first
+        period_column, period_type_name = ("period_start", "DateTime") if period_type == "4hour" else ("period", "Date")
+        cursor_keys = [period_column, "asset"]
+        cursor_filter = ""
+        data_params = {'limit': page_size, 'offset': (page - 1) * page_size}
+        if cursor:
+            cursor_values = decode_cursor(cursor, cursor_keys)
+            cursor_filter = (f" AND {period_column} <= {{cursor_period:{period_type_name}}}"
+                             f" AND ({period_column}, asset) < ({{cursor_period:{period_type_name}}}, {{cursor_asset:String}})")
+            data_params.update({
+                'cursor_period': cursor_values[period_column],
+                'cursor_asset': cursor_values['asset'],
+                'offset': 0
+            })
+
         # Build timestamp filter based on period type
         timestamp_filter = ""
         if period_type == "4hour":
@@ -231,7 +263,7 @@ class BalanceTransferService:
             if start_timestamp:
                 timestamp_filter += f" AND period_start >= toDateTime({start_timestamp}/1000)"
             if end_timestamp:
-                timestamp_filter += f" AND period_end <= toDateTime({end_timestamp}/1000)"
+                timestamp_filter += f" AND period_start <= toDateTime({end_timestamp}/1000) - INTERVAL 4 HOUR"
                 
             count_query = f"""
                           SELECT COUNT(*) AS total
@@ -274,8 +306,8 @@ class BalanceTransferService:
                                 volume_1k_to_10k,
                                 volume_gte_10k
                          FROM {table}
-                         WHERE 1=1{asset_filter}{timestamp_filter}
-                         ORDER BY period_start DESC
+                         WHERE 1=1{asset_filter}{timestamp_filter}{cursor_filter}
+                         ORDER BY period_start DESC, asset DESC
                          LIMIT {{limit:Int}} OFFSET {{offset:Int}}
                          """
             
@@ -330,8 +362,8 @@ class BalanceTransferService:
                                 tx_count_1k_to_10k,
                                 tx_count_gte_10k
                          FROM {table}
-                         WHERE 1=1{asset_filter}{timestamp_filter}
-                         ORDER BY period DESC
+                         WHERE 1=1{asset_filter}{timestamp_filter}{cursor_filter}
+                         ORDER BY period DESC, asset DESC
                          LIMIT {{limit:Int}} OFFSET {{offset:Int}}
                          """
             
@@ -383,8 +415,8 @@ class BalanceTransferService:
                                 tx_count_1k_to_10k,
                                 tx_count_gte_10k
                          FROM {table}
-                         WHERE 1=1{asset_filter}{timestamp_filter}
-                         ORDER BY period DESC
+                         WHERE 1=1{asset_filter}{timestamp_filter}{cursor_filter}
+                         ORDER BY period DESC, asset DESC
                          LIMIT {{limit:Int}} OFFSET {{offset:Int}}
                          """
             
@@ -439,8 +471,8 @@ class BalanceTransferService:
                                 tx_count_1k_to_10k,
                                 tx_count_gte_10k
                          FROM {table}
-                         WHERE 1=1{asset_filter}{timestamp_filter}
-                         ORDER BY period DESC
+                         WHERE 1=1{asset_filter}{timestamp_filter}{cursor_filter}
+                         ORDER BY period DESC, asset DESC
                          LIMIT {{limit:Int}} OFFSET {{offset:Int}}
                          """
             
@@ -456,27 +488,23 @@ class BalanceTransferService:
         else:
             raise ValueError("Period type must be '4hour', 'daily', 'weekly', or 'monthly'")
 
-        # Execute count query
-        count_result = self.client.query(count_query).result_rows
-        total_count = count_result[0][0] if count_result else 0
-
-        # Calculate pagination parameters
-        offset = (page - 1) * page_size
+        total_count = None
+        if include_total:
+            total_count = query_total_count(self.client, self.database, count_query)
 
         # Execute data query
-        data_params = {'limit': page_size, 'offset': offset}
         query_result = self.client.query(data_query, data_params)
         rows = query_result.result_rows
 
         # Map each row into a dictionary
         volume_series = [dict(zip(columns, row)) for row in rows]
 
-        # Use the standardized format_paginated_response utility function
-        return format_paginated_response(
+        return format_cursor_response(
             items=volume_series,
-            page=page,
             page_size=page_size,
-            total_items=total_count
+            next_cursor=next_cursor_from_items(volume_series, page_size, cursor_keys),
+            total_items=total_count,
+            page=None if cursor else page
         )
 
     def get_network_analytics(self, period: str, page: int = 1, page_size: int = 20, assets: List[str] = None,
@@ -788,7 +816,7 @@ class BalanceTransferService:
         count_query = f"""
                       SELECT DISTINCT address
                       FROM (SELECT arrayJoin([from_address, to_address]) AS address
-                            FROM balance_transfers FINAL
+                            FROM balance_transfers
                             WHERE block_height = {{block_height: Int}}{asset_filter})
                       """
         result = self.client.query(count_query, {'block_height': block_height}).result_rows
@@ -798,7 +826,8 @@ class BalanceTransferService:
 
     def get_addresses_time_volume_metrics(self, addresses: List[str], assets: List[str] = None):
         """
-        Returns time-based volume metrics (24h, 7d, 30d, 60d, 90d) for addresses using address-level time-series views
+        Returns time-based volume metrics (24h, 7d, 30d, 60d, 90d) for addresses in a single query
+        over the per-address daily aggregate table
         
         Args:
             addresses: List of blockchain addresses to query
@@ -810,109 +839,55 @@ class BalanceTransferService:
         if not addresses:
             return {}
         
-        # Build address filter
-        address_conditions = " OR ".join([f"address = '{addr}'" for addr in addresses])
-        address_filter = f"({address_conditions})"
-        
         # Build asset filter
         asset_filter = ""
         if assets and assets != ["all"]:
             asset_conditions = " OR ".join([f"asset = '{asset}'" for asset in assets])
             asset_filter = f" AND ({asset_conditions})"
         
-        results = {}
-        
-        # 24 hours - use daily view with last 1 day (single day, simple select)
-        query_24h = f"""
-                    SELECT address, asset,
-                           volume_in,
-                           volume_out,
-                           net_volume
-                    FROM balance_transfers_address_daily_view
-                    WHERE {address_filter}{asset_filter}
-                    AND date >= today() - 1
-                    ORDER BY address, asset
-                    """
-        
-        # 7 days - sum across multiple days from daily view
-        query_7d = f"""
-                   SELECT address, asset,
-                          sum(volume_in) as volume_in,
-                          sum(volume_out) as volume_out,
-                          sum(net_volume) as net_volume
-                   FROM balance_transfers_address_daily_view
-                   WHERE {address_filter}{asset_filter}
-                   AND date >= today() - 7
-                   GROUP BY address, asset
-                   ORDER BY address, asset
-                   """
-        
-        # 30 days - sum across multiple days from daily view
-        query_30d = f"""
-                    SELECT address, asset,
-                           sum(volume_in) as volume_in,
-                           sum(volume_out) as volume_out,
-                           sum(net_volume) as net_volume
-                    FROM balance_transfers_address_daily_view
-                    WHERE {address_filter}{asset_filter}
-                    AND date >= today() - 30
-                    GROUP BY address, asset
-                    ORDER BY address, asset
-                    """
+        # Window name -> number of days back from today
+        time_windows = {
+            'last_24h': 1,
+            'last_7d': 7,
+            'last_30d': 30,
+            'last_60d': 60,
+            'last_90d': 90
+        }
         
-        # 60 days - sum across multiple weeks from weekly view
-        query_60d = f"""
-                    SELECT address, asset,
-                           sum(volume_in) as volume_in,
-                           sum(volume_out) as volume_out,
-                           sum(net_volume) as net_volume
-                    FROM balance_transfers_address_weekly_view
-                    WHERE {address_filter}{asset_filter}
-                    AND week_start >= toStartOfWeek(today() - 60)
-                    GROUP BY address, asset
-                    ORDER BY address, asset
-                    """
+        window_columns = ",\n".join([
+            f"sumIf(volume_in, date >= today() - {days}) AS {period_name}_volume_in, "
+            f"sumIf(volume_out, date >= today() - {days}) AS {period_name}_volume_out"
+            for period_name, days in time_windows.items()
+        ])
         
-        # 90 days - sum across multiple weeks from weekly view
-        query_90d = f"""
-                    SELECT address, asset,
-                           sum(volume_in) as volume_in,
-                           sum(volume_out) as volume_out,
-                           sum(net_volume) as net_volume
-                    FROM balance_transfers_address_weekly_view
-                    WHERE {address_filter}{asset_filter}
-                    AND week_start >= toStartOfWeek(today() - 90)
-                    GROUP BY address, asset
-                    ORDER BY address, asset
-                    """
+        query = f"""
+                SELECT address, asset,
+                       {window_columns}
+                FROM balance_transfers_address_daily_agg_internal
+                WHERE address IN (SELECT arrayJoin({{addresses:Array(String)}})){asset_filter}
+                AND date >= today() - {max(time_windows.values())}
+                GROUP BY address, asset
+                ORDER BY address, asset
+                """
         
-        # Execute queries for each time period
-        time_queries = {
-            'last_24h': query_24h,
-            'last_7d': query_7d,
-            'last_30d': query_30d,
-            'last_60d': query_60d,
-            'last_90d': query_90d
-        }
+        query_result = self.client.query(query, {'addresses': list(addresses)})
         
-        for period_name, query in time_queries.items():
-            query_result = self.client.query(query)
-            rows = query_result.result_rows
+        results = {}
+        for row in query_result.result_rows:
+            address, asset = row[0], row[1]
+            if address not in results:
+                results[address] = {}
             
-            # Process results for this time period
-            for row in rows:
-                address, asset, volume_in, volume_out, net_volume = row
-                
-                if address not in results:
-                    results[address] = {}
-                if asset not in results[address]:
-                    results[address][asset] = {}
-                
-                results[address][asset][period_name] = {
+            period_metrics = {}
+            for i, period_name in enumerate(time_windows):
+                volume_in = row[2 + i * 2]
+                volume_out = row[3 + i * 2]
+                period_metrics[period_name] = {
                     'volume_in': str(volume_in),
                     'volume_out': str(volume_out),
-                    'net_volume': str(net_volume)
+                    'net_volume': str(volume_out - volume_in)
                 }
+            results[address][asset] = period_metrics
         
         return results
 
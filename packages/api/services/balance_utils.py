@@ -1,5 +1,10 @@
+import base64
+import json
+import threading
+import time
+from collections import OrderedDict
 from dataclasses import dataclass
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Callable, Tuple
 
 
 @dataclass
@@ -107,3 +112,236 @@ def format_paginated_response(items, page, page_size, total_items):
         "total_pages": total_pages,
         "total_items": total_items
     }
+
+
+def format_cursor_response(items, page_size, next_cursor, total_items=None, page=None):
+    """Format response for endpoints supporting keyset (cursor) pagination
+
+    Args:
+        items: List of items to include in the response
+        page_size: Number of items per page
+        next_cursor: Opaque cursor for the next page, or None on the last page
+        total_items: Total number of items available, or None when not requested
+        page: Current page number when offset pagination was used
+
+    Returns:
+        Dictionary with pagination metadata and the next cursor
+    """
+    total_pages = None
+    if total_items is not None:
+        total_pages = (total_items + page_size - 1) // page_size if page_size > 0 else 0
+    return {
+        "items": items,
+        "page": page,
+        "page_size": page_size,
+        "total_pages": total_pages,
+        "total_items": total_items,
+        "next_cursor": next_cursor
+    }
+
+
+def encode_cursor(values: Dict[str, Any]) -> str:
+    """Encode the sort key of the last returned row into an opaque cursor
+
+    Args:
+        values: Mapping of sort key column to value
+
+    Returns:
+        URL-safe cursor string
+    """
+    payload = json.dumps(values, default=str, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str, keys: List[str]) -> Dict[str, Any]:
+    """Decode a cursor produced by encode_cursor
+
+    Args:
+        cursor: Cursor string received from the client
+        keys: Sort key columns the cursor must contain
+
+    Returns:
+        Mapping of sort key column to value
+
+    Raises:
+        ValueError: If the cursor is malformed or does not match the expected keys
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except ValueError:
+        raise ValueError("Invalid cursor")
+
+    if not isinstance(values, dict) or any(key not in values for key in keys):
+        raise ValueError("Invalid cursor")
+    return values
+
+
+def next_cursor_from_items(items: List[Dict[str, Any]], page_size: int, keys: List[str]) -> Optional[str]:
+    """Build the cursor pointing after the last item of a full page
+
+    Args:
+        items: Items of the current page
+        page_size: Requested page size
+        keys: Sort key columns to encode
+
+    Returns:
+        Cursor string, or None if the page is not full
+    """
+    if not items or len(items) < page_size:
+        return None
+    last_item = items[-1]
+    return encode_cursor({key: last_item[key] for key in keys})
+
+
+class TotalCountCache:
+    """In-process TTL cache for pagination totals
+
+    Clients crawling a history page by page repeat the same COUNT query on every page;
+    the total rarely changes within a few seconds, so it is served from memory.
+    """
+
+    def __init__(self, ttl_seconds: int = 60, max_entries: int = 1024):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_compute(self, key: Tuple, compute: Callable[[], int]) -> int:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] > now:
+                self._entries.move_to_end(key)
+                return entry[0]
+
+        value = compute()
+
+        with self._lock:
+            self._entries[key] = (value, now + self.ttl_seconds)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return value
+
+
+_total_count_cache = TotalCountCache()
+
+
+def query_total_count(client, database: str, count_query: str, params: Optional[Dict[str, Any]] = None) -> int:
+    """Run a COUNT query through the shared total count cache
+
+    Args:
+        client: ClickHouse client instance
+        database: Database name, part of the cache key so networks do not collide
+        count_query: Query returning a single count value
+        params: Query parameters
+
+    Returns:
+        Total number of items
+    """
+    params = params or {}
+    key = (database, count_query, tuple(sorted((k, str(v)) for k, v in params.items())))
+
+    def compute() -> int:
+        result = client.query(count_query, params).result_rows
+        return result[0][0] if result else 0
+
+    return _total_count_cache.get_or_compute(key, compute)
+
+
+# Settings for FINAL reads of ReplacingMergeTree tables whose partition key is derived
+# from the sorting key: duplicates never span partitions, so each partition is merged
+# on read independently and partitions that were already optimized are not re-merged.
+FINAL_READ_SETTINGS = {'do_not_merge_across_partitions_select_final': 1}
+
+
+def latest_version_rows(table: str, key_columns: List[str], key_filter: str,
+                        version_column: str = "_version") -> str:
+    """
+    Build a subquery returning the latest version of each row of a ReplacingMergeTree
+    table among the rows matching key_filter.
+
+    The filter is applied before deduplication, so the cost scales with the matching rows
+    rather than with the table size as with FINAL over the whole table, provided it bounds
+    a prefix of the table's sorting key (e.g. read per-address history from an address
+    ordered table). key_filter must only reference columns that are equal across the
+    versions of a row, such as sorting key columns, so all versions match or miss together.
+
+    Args:
+        table: ReplacingMergeTree table name
+        key_columns: Sorting key columns identifying a row, in sorting key order
+        key_filter: SQL condition on columns equal across versions
+        version_column: Version column of the table
+
+    Returns:
+        Parenthesized subquery usable in a FROM clause
+    """
+    keys = ", ".join(key_columns)
+    return (f"(SELECT * FROM {table} WHERE {key_filter} "
+            f"ORDER BY {keys}, {version_column} DESC LIMIT 1 BY {keys})")
+
+
+def preceding_snapshot_start(table: str, timestamp_column: str, key_filter: str, before: str) -> str:
+    """
+    Build a scalar subquery returning where a window over balance snapshots has to start
+    so every asset keeps the snapshot preceding `before`.
+
+    That is the earliest, across assets, of the last snapshot start before `before`, or
+    `before` itself when no asset has an earlier snapshot. Only the snapshot start column
+    is read and no rows are sorted.
+
+    Args:
+        table: Snapshot table name
+        timestamp_column: Snapshot start column of the table
+        key_filter: SQL condition selecting the address and assets of the window
+        before: SQL expression of the first snapshot start of interest
+
+    Returns:
+        Parenthesized scalar subquery
+    """
+    return (f"(SELECT ifNull(minOrNull(previous_start), {before}) FROM ("
+            f"SELECT max({timestamp_column}) AS previous_start FROM {table} "
+            f"WHERE {key_filter} AND {timestamp_column} < {before} GROUP BY asset))")
+
+
+def derived_balance_changes(balance_rows: str) -> str:
+    """
+    Build a subquery deriving the change columns of balance snapshots that keep none, such
+    as the rollup buckets, from their absolute balances.
+
+    Each snapshot is compared with the preceding snapshot of the same address and asset
+    with lagInFrame. The first snapshot of each address and asset in balance_rows keeps
+    the change columns of balance_rows. balance_rows must be bounded to the requested
+    addresses and start one snapshot per asset before the first row of interest (see
+    preceding_snapshot_start); filters cutting that snapshot belong outside the returned
+    subquery.
+
+    Args:
+        balance_rows: Parenthesized subquery of balance snapshots with zero change columns
+
+    Returns:
+        Parenthesized subquery usable in a FROM clause
+    """
+    return f"""(
+        SELECT period_start_timestamp, period_end_timestamp, block_height, address, asset,
+               free_balance, reserved_balance, staked_balance, total_balance,
+               ifNull(free_balance - prev_free_balance, free_balance_change) AS free_balance_change,
+               ifNull(reserved_balance - prev_reserved_balance, reserved_balance_change) AS reserved_balance_change,
+               ifNull(staked_balance - prev_staked_balance, staked_balance_change) AS staked_balance_change,
+               ifNull(total_balance - prev_total_balance, total_balance_change) AS total_balance_change,
+               if(prev_total_balance IS NULL, total_balance_percent_change,
+                  toDecimal64(least(greatest(if(prev_total_balance > 0,
+                                                toFloat64(total_balance - prev_total_balance) * 100 / toFloat64(prev_total_balance),
+                                                0), -999999999999.999), 999999999999.999), 6)) AS total_balance_percent_change
+        FROM (
+            SELECT *,
+                   lagInFrame(toNullable(free_balance)) OVER w AS prev_free_balance,
+                   lagInFrame(toNullable(reserved_balance)) OVER w AS prev_reserved_balance,
+                   lagInFrame(toNullable(staked_balance)) OVER w AS prev_staked_balance,
+                   lagInFrame(toNullable(total_balance)) OVER w AS prev_total_balance
+            FROM {balance_rows}
+            WINDOW w AS (PARTITION BY address, asset ORDER BY period_start_timestamp
+                         ROWS BETWEEN UNBOUNDED PRECEDING AND CURRENT ROW)
+        )
+    )"""
@@ -1,5 +1,5 @@
 import json
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 import clickhouse_connect
 from loguru import logger
 from packages.indexers.base import terminate_event
@@ -163,24 +163,31 @@ class BlockStreamService:
             logger.error(f"Error querying blocks by range: {e}")
             raise
     
-    def get_blocks_by_address(self, address: str, limit: int = 100, offset: int = 0) -> List[Dict[str, Any]]:
+    def get_blocks_by_address(self, address: str, limit: int = 100, offset: int = 0,
+                              before_height: Optional[int] = None) -> List[Dict[str, Any]]:
         """
         Get blocks that contain transactions involving the specified address.
         
         Args:
             address: The blockchain address to query
             limit: Maximum number of blocks to return
-            offset: Offset for pagination
+            offset: Offset for pagination, ignored when before_height is given
+            before_height: Optional keyset cursor; only blocks strictly below this height are returned
             
         Returns:
             List of block dictionaries in the same format as the Kafka implementation
         """
         try:
             # First, find block heights that contain the address
+            height_filter = ""
+            if before_height is not None:
+                height_filter = f" AND block_height < {int(before_height)}"
+                offset = 0
+
             height_query = f"""
                 SELECT block_height
                 FROM block_stream
-                WHERE hasAny(addresses, ['{address}'])
+                WHERE hasAny(addresses, ['{address}']){height_filter}
                 ORDER BY block_height DESC
                 LIMIT {limit} OFFSET {offset}
             """
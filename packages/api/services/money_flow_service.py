@@ -212,6 +212,159 @@ class MoneyFlowService:
             logger.error(f"Error querying graph database: {str(e)}")
             return None
             
+    def get_money_flow_by_path_shortest_period(self,
+                                              source_address: str,
+                                              target_address: str,
+                                              start_timestamp: int,
+                                              end_timestamp: int,
+                                              assets: List[str] = None):
+        """
+        Retrieves the shortest money flow path between two addresses using only transfers of a period.
+
+        Traverses the monthly and yearly TO_PERIOD edges overlapping the period, so results
+        follow bucket granularity, and requires the indexer to maintain period edges.
+
+        Args:
+            source_address: Address the path starts from
+            target_address: Address the path ends at
+            start_timestamp: Start of the period in milliseconds (inclusive)
+            end_timestamp: End of the period in milliseconds (exclusive)
+            assets: Assets to filter by, ["all"] or None for all assets
+
+        Returns:
+            List of nodes and edges with the volume of the period
+        """
+        params = {'source_address': source_address, 'target_address': target_address}
+        match_clause = f"""
+            MATCH path = (start:Address {{address: $source_address}})-[:TO_PERIOD *BFS ({self._period_filter(params, start_timestamp, end_timestamp, assets)})]->(target:Address {{address: $target_address}})
+        """
+        return self._get_period_flows(match_clause, params)
+
+    def get_money_flow_by_path_period(self,
+                                      addresses: List[str],
+                                      depth_level: int,
+                                      direction: Direction,
+                                      start_timestamp: int,
+                                      end_timestamp: int,
+                                      assets: List[str] = None):
+        """
+        Retrieves money flows for addresses using only transfers of a period.
+
+        Explores breadth first over the monthly and yearly TO_PERIOD edges overlapping the
+        period, one path per reached address, and sums the volume of the period per address
+        pair. Requires the indexer to maintain period edges.
+
+        Args:
+            addresses: List of wallet addresses to start the exploration from
+            depth_level: Number of hops to explore from the starting addresses
+            direction: Direction of the relationships to follow
+            start_timestamp: Start of the period in milliseconds (inclusive)
+            end_timestamp: End of the period in milliseconds (exclusive)
+            assets: Assets to filter by, ["all"] or None for all assets
+
+        Returns:
+            List of nodes and edges with the volume of the period
+        """
+        params = {'addresses': addresses}
+        relation = f"[:TO_PERIOD *BFS ..{int(depth_level)} ({self._period_filter(params, start_timestamp, end_timestamp, assets)})]"
+        if direction.value == Direction.in_:
+            pattern = f"(a)<-{relation}-(b:Address)"
+        elif direction.value == Direction.out_:
+            pattern = f"(a)-{relation}->(b:Address)"
+        else:
+            pattern = f"(a)-{relation}-(b:Address)"
+
+        match_clause = f"""
+            MATCH (a:Address) WHERE a.address IN $addresses
+            MATCH path = {pattern}
+        """
+        return self._get_period_flows(match_clause, params)
+
+    def _period_filter(self, params: Dict[str, Any], start_timestamp: int, end_timestamp: int, assets: List[str] = None) -> str:
+        """Build the edge filter of TO_PERIOD buckets overlapping a period and add its parameters"""
+        params['start_timestamp'] = start_timestamp
+        params['end_timestamp'] = end_timestamp
+        condition = "r.period_start < $end_timestamp AND r.period_end > $start_timestamp"
+        if assets and assets != ["all"]:
+            params['assets'] = assets
+            condition += " AND r.asset IN $assets"
+        return f"r, n | {condition}"
+
+    def _get_period_flows(self, match_clause: str, params: Dict[str, Any]):
+        """Sum the period buckets of every address pair on the matched paths and build graph elements"""
+        asset_filter = "AND bucket.asset IN $assets" if 'assets' in params else ""
+        query = f"""
+            {match_clause}
+            UNWIND relationships(path) AS rel
+            WITH DISTINCT startNode(rel) AS sender, endNode(rel) AS receiver
+            MATCH (sender)-[bucket:TO_PERIOD]->(receiver)
+            WHERE bucket.period_start < $end_timestamp AND bucket.period_end > $start_timestamp {asset_filter}
+            WITH sender, receiver,
+                 sum(bucket.volume) AS volume,
+                 sum(bucket.transfer_count) AS transfer_count,
+                 min(bucket.first_activity_block_height) AS first_activity_block_height,
+                 min(bucket.first_activity_timestamp) AS first_activity_timestamp,
+                 max(bucket.last_activity_block_height) AS last_activity_block_height,
+                 max(bucket.last_activity_timestamp) AS last_activity_timestamp
+            RETURN
+                 {{
+                     address: sender.address,
+                     transfer_count: sender.transfer_count,
+                     neighbor_count: sender.neighbor_count,
+                     first_activity_block_height: sender.first_activity_block_height,
+                     first_activity_timestamp: sender.first_activity_timestamp,
+                     last_activity_block_height: sender.last_activity_block_height,
+                     last_activity_timestamp: sender.last_activity_timestamp,
+                     badges: coalesce(sender.labels, []),
+                     community_id: coalesce(sender.community_id, 0),
+                     community_page_rank: coalesce(sender.community_page_rank, 0.0)
+                 }} AS sender,
+                 {{
+                     address: receiver.address,
+                     transfer_count: receiver.transfer_count,
+                     neighbor_count: receiver.neighbor_count,
+                     first_activity_block_height: receiver.first_activity_block_height,
+                     first_activity_timestamp: receiver.first_activity_timestamp,
+                     last_activity_block_height: receiver.last_activity_block_height,
+                     last_activity_timestamp: receiver.last_activity_timestamp,
+                     badges: coalesce(receiver.labels, []),
+                     community_id: coalesce(receiver.community_id, 0),
+                     community_page_rank: coalesce(receiver.community_page_rank, 0.0)
+                 }} AS receiver,
+                 volume, transfer_count,
+                 first_activity_block_height, first_activity_timestamp,
+                 last_activity_block_height, last_activity_timestamp
+        """
+
+        try:
+            with self.graph_database.session() as session:
+                records = session.run(query, params).data()
+        except Exception as e:
+            logger.error(f"Error querying graph database: {str(e)}")
+            return None
+
+        nodes = {}
+        edges = []
+        for record in records:
+            for node in (record['sender'], record['receiver']):
+                if node['address'] not in nodes:
+                    nodes[node['address']] = {'element': {'id': node['address'], 'type': 'node', 'label': 'address', **node}}
+            edges.append({'element': {
+                'id': record['sender']['address'] + '-' + record['receiver']['address'],
+                'type': 'edge',
+                'from_id': record['sender']['address'],
+                'to_id': record['receiver']['address'],
+                'volume': record['volume'],
+                'transfer_count': record['transfer_count'],
+                'first_activity_block_height': record['first_activity_block_height'],
+                'first_activity_timestamp': record['first_activity_timestamp'],
+                'last_activity_block_height': record['last_activity_block_height'],
+                'last_activity_timestamp': record['last_activity_timestamp']
+            }})
+
+        result = list(nodes.values()) + edges
+        return result if result else None
+
     def _remove_duplicate_elements(self, result):
         """
         Remove duplicate elements from the result based on element ID.
@@ -39,6 +39,9 @@ class BalanceTransfersTool:
             # Core table
             "balance_transfers",
             
+            # Address-ordered copy of the core table
+            "balance_transfers_by_address",
+            
             # Volume series (4-hour intervals)
             "balance_transfers_volume_series_view",
             
@@ -177,6 +180,15 @@ class BalanceTransfersTool:
             if "balance_transfers_network_monthly_view" in schema:
                 schema["balance_transfers_network_monthly_view"]["description"] = "Monthly network analytics with transaction counts, volumes, participant metrics, and fee statistics"
                 
+            if "balance_transfers_by_address" in schema:
+                schema["balance_transfers_by_address"]["description"] = "Transfers stored once per participant and ordered by (address, block_height); use it for per-address history instead of filtering balance_transfers by from_address/to_address"
+                
+                if "direction" in schema["balance_transfers_by_address"]["columns"]:
+                    schema["balance_transfers_by_address"]["columns"]["direction"]["description"] = "'out' when address is the sender, 'in' when address is the receiver"
+                
+                if "counterparty" in schema["balance_transfers_by_address"]["columns"]:
+                    schema["balance_transfers_by_address"]["columns"]["counterparty"]["description"] = "The other side of the transfer"
+                
             # Add descriptions for address analytics view
             if "balance_transfers_address_analytics_view" in schema:
                 schema["balance_transfers_address_analytics_view"]["description"] = "Comprehensive address analytics with transaction counts, volumes, temporal patterns, and behavioral classification"
@@ -59,6 +59,12 @@ def enrich_nodes_with_balances(balance_service: BalanceSeriesService, result: Li
     if not addresses:
         return result
     
+    # Every node gets a balance, zero unless a recorded balance is found below
+    for node in address_to_node.values():
+        if 'balance' not in node:
+            node['balance'] = 0
+            node['balance_timestamp'] = 0
+
     # Process addresses in batches
     batch_size = 10000
     address_batches = [addresses[i:i + batch_size] for i in range(0, len(addresses), batch_size)]
@@ -66,22 +72,13 @@ def enrich_nodes_with_balances(balance_service: BalanceSeriesService, result: Li
     # Query balances for each batch and add to nodes
     for batch in address_batches:
         balances = balance_service.get_current_balances(batch, assets)
-        
-        # First ensure all nodes have a balance property initialized to 0
-        for address in addresses:
-            if address in address_to_node and 'balance' not in address_to_node[address]:
-                address_to_node[address]['balance'] = 0
-                address_to_node[address]['balance_timestamp'] = 0
-        
+
         # Add balance to each node that has data
-        for address, balance_data in balances.items():
-            if address in address_to_node:
+        for balance_data in balances['items']:
+            node = address_to_node.get(balance_data['address'])
+            if node is not None:
                 # Use balance directly as it's already in human-readable format
-                balance = balance_data.get('balance', 0)
-                timestamp = balance_data.get('timestamp', 0)
-                
-                # Add balance to node
-                address_to_node[address]['balance'] = balance
-                address_to_node[address]['balance_timestamp'] = timestamp
+                node['balance'] = balance_data['total_balance']
+                node['balance_timestamp'] = balance_data['latest_period_end']
     
-    return result
\ No newline at end of file
+    return result
@@ -144,6 +144,7 @@ class MetricsRegistry:
         for network in ['torus', 'bittensor', 'polkadot']:
             service_env_mapping[f'substrate-{network}-balance-transfers'] = 'BALANCE_TRANSFERS_METRICS_PORT'
             service_env_mapping[f'substrate-{network}-balance-series'] = 'BALANCE_SERIES_METRICS_PORT'
+            service_env_mapping[f'substrate-{network}-money-flow-analytics'] = 'MONEY_FLOW_ANALYTICS_METRICS_PORT'
             service_env_mapping[f'substrate-{network}-money-flow'] = 'MONEY_FLOW_METRICS_PORT'
             service_env_mapping[f'substrate-{network}-block-stream'] = 'BLOCK_STREAM_METRICS_PORT'
             
@@ -179,6 +180,7 @@ class MetricsRegistry:
         for network in ['torus', 'bittensor', 'polkadot']:
             port_mapping[f'substrate-{network}-balance-transfers'] = 9101
             port_mapping[f'substrate-{network}-balance-series'] = 9102
+            port_mapping[f'substrate-{network}-money-flow-analytics'] = 9105
             port_mapping[f'substrate-{network}-money-flow'] = 9103
             port_mapping[f'substrate-{network}-block-stream'] = 9104
             
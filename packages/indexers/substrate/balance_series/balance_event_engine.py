@@ -0,0 +1,247 @@
+import random
+from typing import Dict, Any, List, Set, Iterable, Tuple
+
+import numpy as np
+from loguru import logger
+
+# Columns of the balance arrays
+FREE, RESERVED, STAKED = 0, 1, 2
+
+
+class BalanceEventEngine:
+    """
+    Event-sourced balance state for the balance series.
+
+    Replays Balances pallet events from block_stream into running per-address balances
+    instead of querying account state over RPC for every active address. Balances are
+    held in raw chain units in numpy int64 arrays indexed by a dense address id, each
+    balance split into a high and a low part of BALANCE_UNIT since planck amounts
+    overflow a single int64.
+
+    Events whose effect on free/reserved/staked balances cannot be derived from their
+    attributes (slashes, staking, unknown Balances events) mark the involved addresses
+    for reconciliation against on-chain state at the end of the period.
+    """
+
+    # Balances events that do not change free or reserved balances
+    IGNORED_BALANCES_EVENTS = {
+        'Balances.Locked', 'Balances.Unlocked', 'Balances.Frozen', 'Balances.Thawed',
+        'Balances.Issued', 'Balances.Rescinded', 'Balances.Upgraded', 'Balances.TotalIssuanceForced'
+    }
+
+    # Events of other modules that change balances in ways only on-chain state can tell
+    RECONCILED_EVENTS = {
+        'Torus0.StakeAdded', 'Torus0.StakeRemoved', 'Torus0.StakeMoved',
+        'SubtensorModule.StakeAdded', 'SubtensorModule.StakeRemoved', 'SubtensorModule.StakeMoved',
+        'Staking.Bonded', 'Staking.Unbonded', 'Staking.Withdrawn', 'Staking.Rewarded', 'Staking.Slashed'
+    }
+
+    # Balance = high * BALANCE_UNIT + low, with 0 <= low < BALANCE_UNIT
+    BALANCE_UNIT = 1 << 62
+
+    initial_capacity = 1024
+
+    def __init__(self):
+        self._address_ids: Dict[str, int] = {}
+        self._addresses: List[str] = []
+        self._high = np.zeros((self.initial_capacity, 3), dtype=np.int64)
+        self._low = np.zeros((self.initial_capacity, 3), dtype=np.int64)
+
+        self._touched: Set[int] = set()  # Address ids changed since the last drain
+        self._needs_reconcile: Set[int] = set()  # Address ids whose state must be read on chain
+
+        self.last_applied_height = 0
+
+    def __len__(self):
+        return len(self._addresses)
+
+    def _address_id(self, address: str) -> int:
+        address_id = self._address_ids.get(address)
+        if address_id is None:
+            address_id = len(self._addresses)
+            self._address_ids[address] = address_id
+            self._addresses.append(address)
+            if address_id == len(self._high):
+                self._high = np.concatenate([self._high, np.zeros_like(self._high)])
+                self._low = np.concatenate([self._low, np.zeros_like(self._low)])
+        return address_id
+
+    def _get(self, address_id: int, column: int) -> int:
+        return int(self._high[address_id, column]) * self.BALANCE_UNIT + int(self._low[address_id, column])
+
+    def _set(self, address_id: int, column: int, value: int):
+        self._high[address_id, column], self._low[address_id, column] = divmod(value, self.BALANCE_UNIT)
+
+    def _balances(self, address_ids: np.ndarray) -> np.ndarray:
+        """Balances of address ids as Python integers, one (free, reserved, staked) row per id"""
+        return self._high[address_ids].astype(object) * self.BALANCE_UNIT + self._low[address_ids].astype(object)
+
+    def load(self, balances: Iterable[Tuple[str, int, int, int]], last_applied_height: int):
+        """Load the starting state
+
+        Args:
+            balances: Iterable of (address, free, reserved, staked) in raw chain units
+            last_applied_height: Height of the block the state corresponds to
+        """
+        address_ids, values = [], []
+        for address, free, reserved, staked in balances:
+            address_ids.append(self._address_id(address))
+            values.append((free, reserved, staked))
+
+        if values:
+            values = np.array(values, dtype=object)
+            self._high[address_ids] = (values // self.BALANCE_UNIT).astype(np.int64)
+            self._low[address_ids] = (values % self.BALANCE_UNIT).astype(np.int64)
+
+        self._touched.clear()
+        self._needs_reconcile.clear()
+        self.last_applied_height = last_applied_height
+        logger.info(
+            "Balance event engine state loaded",
+            extra={"addresses": len(self._addresses), "last_applied_height": last_applied_height}
+        )
+
+    def apply_blocks(self, blocks: List[Dict[str, Any]]):
+        """Apply the events of consecutive blocks in order
+
+        Args:
+            blocks: Blocks from block_stream, starting right after last_applied_height
+        """
+        for block in blocks:
+            if block['block_height'] != self.last_applied_height + 1:
+                raise ValueError(
+                    f"Non-contiguous block {block['block_height']}, expected {self.last_applied_height + 1}"
+                )
+
+            block_addresses = set(block.get('addresses', []))
+            for event in sorted(block['events'], key=lambda e: e.get('event_index', 0)):
+                self.apply_event(event, block_addresses)
+
+            self.last_applied_height = block['block_height']
+
+    def apply_event(self, event: Dict[str, Any], block_addresses: Set[str] = None):
+        """Apply a single event to the running balances"""
+        key = f"{event['module_id']}.{event['event_id']}"
+        attributes = event['attributes']
+
+        if key == 'Balances.Transfer':
+            if attributes['from'] != attributes['to']:
+                self._add(attributes['from'], free=-int(attributes['amount']))
+                self._add(attributes['to'], free=int(attributes['amount']))
+        elif key == 'Balances.Endowed':
+            self._add(attributes['account'], free=int(attributes['free_balance']))
+        elif key in ('Balances.Deposit', 'Balances.Minted'):
+            self._add(attributes['who'], free=int(attributes['amount']))
+        elif key in ('Balances.Withdraw', 'Balances.Burned'):
+            self._add(attributes['who'], free=-int(attributes['amount']))
+        elif key == 'Balances.DustLost':
+            self._add(attributes['account'], free=-int(attributes['amount']))
+        elif key == 'Balances.Reserved':
+            amount = int(attributes['amount'])
+            self._add(attributes['who'], free=-amount, reserved=amount)
+        elif key == 'Balances.Unreserved':
+            amount = int(attributes['amount'])
+            self._add(attributes['who'], free=amount, reserved=-amount)
+        elif key == 'Balances.ReserveRepatriated':
+            amount = int(attributes['amount'])
+            self._add(attributes['from'], reserved=-amount)
+            if attributes.get('destination_status') == 'Reserved':
+                self._add(attributes['to'], reserved=amount)
+            else:
+                self._add(attributes['to'], free=amount)
+        elif key == 'Balances.BalanceSet':
+            address_id = self._address_id(attributes['who'])
+            self._set(address_id, FREE, int(attributes['free']))
+            if 'reserved' in attributes:
+                self._set(address_id, RESERVED, int(attributes['reserved']))
+            self._touched.add(address_id)
+        elif key in self.IGNORED_BALANCES_EVENTS:
+            pass
+        elif key in self.RECONCILED_EVENTS or event['module_id'] == 'Balances':
+            self._mark_for_reconcile(attributes, block_addresses or set())
+
+    def _add(self, address: str, free: int = 0, reserved: int = 0, staked: int = 0):
+        address_id = self._address_id(address)
+        for column, amount in ((FREE, free), (RESERVED, reserved), (STAKED, staked)):
+            if amount:
+                self._set(address_id, column, self._get(address_id, column) + amount)
+        self._touched.add(address_id)
+
+        # The low part is never negative, so a negative balance has a negative high part
+        if self._high[address_id, FREE] < 0 or self._high[address_id, RESERVED] < 0:
+            # State drifted from the chain, e.g. an event this engine does not model
+            self._needs_reconcile.add(address_id)
+
+    def _mark_for_reconcile(self, attributes: Any, block_addresses: Set[str]):
+        """Mark every known address mentioned in the attributes of an event"""
+        if isinstance(attributes, dict):
+            values = attributes.values()
+        elif isinstance(attributes, (list, tuple)):
+            values = attributes
+        else:
+            values = [attributes]
+
+        for value in values:
+            if isinstance(value, str):
+                if value in block_addresses or value in self._address_ids:
+                    address_id = self._address_id(value)
+                    self._touched.add(address_id)
+                    self._needs_reconcile.add(address_id)
+            elif isinstance(value, (dict, list, tuple)):
+                self._mark_for_reconcile(value, block_addresses)
+
+    def reconcile_candidates(self, sample_size: int) -> List[str]:
+        """Addresses to verify on chain: all flagged ones plus a random sample of touched ones"""
+        candidates = set(self._needs_reconcile)
+        remaining = list(self._touched - candidates)
+        if sample_size and remaining:
+            candidates.update(random.sample(remaining, min(sample_size, len(remaining))))
+        return [self._addresses[address_id] for address_id in candidates]
+
+    def reconcile(self, on_chain_balances: Dict[str, Dict[str, int]], addresses: List[str]) -> int:
+        """Overwrite engine state with on-chain balances
+
+        Args:
+            on_chain_balances: {address: {'free_balance', 'reserved_balance', 'staked_balance'}} at the
+                               last applied block; queried addresses missing here have no account
+            addresses: Addresses that were queried
+
+        Returns:
+            Number of addresses whose engine state differed from the chain
+        """
+        mismatches = 0
+        for address in addresses:
+            address_id = self._address_id(address)
+            balances = on_chain_balances.get(address, {})
+            free = balances.get('free_balance', 0)
+            reserved = balances.get('reserved_balance', 0)
+            staked = balances.get('staked_balance', 0)
+
+            engine_balances = (self._get(address_id, FREE), self._get(address_id, RESERVED), self._get(address_id, STAKED))
+            if (free, reserved, staked) != engine_balances:
+                mismatches += 1
+                self._set(address_id, FREE, free)
+                self._set(address_id, RESERVED, reserved)
+                self._set(address_id, STAKED, staked)
+                self._touched.add(address_id)
+
+        self._needs_reconcile.clear()
+        return mismatches
+
+    def drain_touched_balances(self) -> Dict[str, Dict[str, int]]:
+        """Return the balances of addresses changed since the last drain and reset the change set
+
+        Returns:
+            Dictionary in the format expected by record_balance_series
+        """
+        address_ids = np.fromiter(self._touched, dtype=np.int64, count=len(self._touched))
+        result = {}
+        for address_id, (free, reserved, staked) in zip(address_ids.tolist(), self._balances(address_ids).tolist()):
+            result[self._addresses[address_id]] = {
+                'free_balance': free,
+                'reserved_balance': reserved,
+                'staked_balance': staked,
+                'total_balance': free + reserved + staked
+            }
+        self._touched.clear()
+        return result
@@ -1,9 +1,12 @@
 import argparse
+import queue
+import threading
 import traceback
 import time
 import signal
+from concurrent.futures import ThreadPoolExecutor
 from loguru import logger
-from typing import Dict, Set
+from typing import Dict, Set, Optional, Tuple
 from datetime import datetime
 
 from packages.indexers.base import (
@@ -11,6 +14,7 @@ from packages.indexers.base import (
     setup_metrics, get_metrics_registry, setup_logger, IndexerMetrics,
 )
 from packages.indexers.substrate import get_substrate_node_url, networks,  Network
+from packages.indexers.substrate.balance_series.balance_event_engine import BalanceEventEngine
 from packages.indexers.substrate.balance_series.balance_series_indexer_base import BalanceSeriesIndexerBase
 from packages.indexers.substrate.balance_series.balance_series_indexer_torus import TorusBalanceSeriesIndexer
 from packages.indexers.substrate.balance_series.balance_series_indexer_bittensor import BittensorBalanceSeriesIndexer
@@ -56,7 +60,12 @@ class BalanceSeriesConsumer:
             terminate_event,
             network: str,
             period_hours: int = 4,
-            batch_size: int = 100
+            batch_size: int = 100,
+            full_snapshot_interval: int = 0,
+            full_snapshot_min_addresses: int = 0,
+            engine: str = 'rpc',
+            reconcile_sample_size: int = 100,
+            backfill_workers: int = 1
     ):
         """Initialize the Balance Series Consumer
 
@@ -68,6 +77,14 @@ class BalanceSeriesConsumer:
             network: Network identifier (e.g., 'torus', 'polkadot')
             period_hours: Number of hours in each period (default: 4)
             batch_size: Number of addresses to query in a single blockchain request
+            full_snapshot_interval: Record a full snapshot of all accounts every N periods (0 disables)
+            full_snapshot_min_addresses: Record a full snapshot instead of querying active addresses
+                                         when a period has at least this many of them (0 disables)
+            engine: 'rpc' to query balances of active addresses on chain, 'events' to replay
+                    block_stream events into running balances
+            reconcile_sample_size: Number of changed addresses verified on chain per period in 'events' mode
+            backfill_workers: Number of periods fetched concurrently while catching up in 'rpc' mode;
+                              change columns are then derived in ClickHouse (1 disables)
         """
         self.block_stream_manager = block_stream_manager
         self.substrate_node = substrate_node
@@ -77,6 +94,18 @@ class BalanceSeriesConsumer:
         self.period_hours = period_hours
         self.period_ms = period_hours * 60 * 60 * 1000  # Convert hours to milliseconds
         self.batch_size = batch_size
+        self.full_snapshot_interval = full_snapshot_interval
+        self.full_snapshot_min_addresses = full_snapshot_min_addresses
+        self.snapshot_page_size = 1000  # Accounts read per storage map page
+        self.snapshot_write_size = 10000  # Accounts recorded per insert during a full snapshot
+        self.engine = engine
+        self.reconcile_sample_size = reconcile_sample_size
+        self.event_replay_batch_blocks = 1000  # Blocks read from block_stream per replay query
+        self._event_engine = None  # Loaded lazily from balance_series in 'events' mode
+        self.backfill_workers = backfill_workers
+        self.backfill_chunk_periods = backfill_workers * 4  # Periods recorded between change recomputations
+        self._backfill_nodes: Optional[queue.Queue] = None  # One SubstrateNode per backfill worker
+        self._clickhouse_lock = threading.Lock()  # ClickHouse clients do not allow concurrent queries
         
         # Metrics will be passed from main function
         self.metrics_registry = None
@@ -144,11 +173,24 @@ class BalanceSeriesConsumer:
                 }
             )
 
+            if self._backfill_enabled() and last_processed_timestamp > 0:
+                # A previous run may have stopped between recording a chunk and deriving its changes;
+                # only snapshots of that chunk still recorded without changes are rewritten
+                self.balance_series_indexer.recompute_balance_changes(
+                    last_processed_timestamp - self.backfill_chunk_periods * self.period_ms, last_processed_timestamp
+                )
+
             while not self.terminate_event.is_set():
                 try:
                     current_time = int(datetime.now().timestamp() * 1000)
 
-                    if next_period_end <= current_time:
+                    pending_periods = (current_time - next_period_start) // self.period_ms
+                    if self._backfill_enabled() and pending_periods > 1:
+                        next_period_start = self._backfill_periods(
+                            next_period_start, min(pending_periods, self.backfill_chunk_periods)
+                        )
+                        next_period_end = next_period_start + self.period_ms
+                    elif next_period_end <= current_time:
                         self._process_period(next_period_start, next_period_end)
                         next_period_start = next_period_end
                         next_period_end = next_period_start + self.period_ms
@@ -238,9 +280,23 @@ class BalanceSeriesConsumer:
             block_hash = end_block['block_hash']
             block_timestamp = end_block['timestamp']
 
+            # Periodic full snapshots are aligned to the period index so restarts keep the cadence
+            if self.full_snapshot_interval and (period_start // self.period_ms) % self.full_snapshot_interval == 0:
+                addresses_recorded = self._record_full_snapshot(period_start, period_end, block_height, block_hash)
+                self._record_period_metrics(labels, start_time, block_height, addresses_recorded)
+                return
+
+            if self.engine == 'events':
+                address_balances = self._replay_period_events(block_height, block_hash)
+                self.balance_series_indexer.record_balance_series(
+                    period_start, period_end, block_height, address_balances
+                )
+                self._record_period_metrics(labels, start_time, block_height, len(address_balances))
+                return
+
             # Get all active addresses during this period
-            active_addresses = self.block_stream_manager.get_blocks_by_block_timestamp_range(period_start, period_end, only_with_addresses=True)
-            if not active_addresses:
+            all_addresses = self.block_stream_manager.get_active_addresses(period_start, period_end)
+            if not all_addresses:
                 # Business decision logging for empty periods
                 logger.info(
                     "Skipping empty period",
@@ -254,27 +310,11 @@ class BalanceSeriesConsumer:
                 )
                 return
 
-            all_addresses = set()
-            for block in active_addresses:
-                all_addresses.update(block['addresses'])
-
-            if not all_addresses:
-                if self.consumer_errors_total:
-                    self.consumer_errors_total.labels(**labels, error_type='no_addresses_found').inc()
-                
-                # Error logging with context
-                logger.error(
-                    "No addresses found despite active blocks",
-                    error=ValueError("Address extraction failed"),
-                    traceback=traceback.format_exc(),
-                    extra={
-                        "operation": "extract_active_addresses",
-                        "period_start": period_start,
-                        "period_end": period_end,
-                        "active_blocks_count": len(active_addresses)
-                    }
-                )
-                raise ValueError(f"No addresses found for period {period_start}-{period_end}")
+            if self.full_snapshot_min_addresses and len(all_addresses) >= self.full_snapshot_min_addresses:
+                # Paging through the whole account map is cheaper than looking up this many keys
+                addresses_recorded = self._record_full_snapshot(period_start, period_end, block_height, block_hash)
+                self._record_period_metrics(labels, start_time, block_height, addresses_recorded)
+                return
 
             # Query balances for all addresses at the end block
             address_balances = self._query_blockchain_balances(all_addresses, block_hash)
@@ -284,35 +324,12 @@ class BalanceSeriesConsumer:
                 period_start, period_end, block_height, address_balances
             )
 
-            # Record metrics
-            processing_time = time.time() - start_time
-            if self.period_processing_duration:
-                self.period_processing_duration.labels(**labels).observe(processing_time)
-            if self.addresses_processed_total:
-                self.addresses_processed_total.labels(**labels).inc(len(address_balances))
-            if self.periods_processed_total:
-                self.periods_processed_total.labels(**labels).inc()
-            if self.indexer_metrics:
-                self.indexer_metrics.record_block_processed(block_height, processing_time)
-
-            # Log milestone progress every 10 periods
-            if hasattr(self, '_periods_processed'):
-                self._periods_processed += 1
-            else:
-                self._periods_processed = 1
-                
-            if self._periods_processed % 10 == 0:
-                logger.info(
-                    "Period processing milestone",
-                    extra={
-                        "periods_processed": self._periods_processed,
-                        "addresses_in_period": len(address_balances),
-                        "block_height": block_height,
-                        "processing_time": round(processing_time, 2)
-                    }
-                )
+            self._record_period_metrics(labels, start_time, block_height, len(address_balances))
 
         except Exception as e:
+            # Engine state may be ahead of what was recorded, reload it from balance_series on retry
+            self._event_engine = None
+
             if self.consumer_errors_total:
                 self.consumer_errors_total.labels(**labels, error_type='processing_error').inc()
             
@@ -332,69 +349,286 @@ class BalanceSeriesConsumer:
             )
             raise
 
-    def _query_blockchain_balances(self, addresses: Set[str], block_hash: str) -> Dict[str, Dict[str, int]]:
+    def _backfill_enabled(self) -> bool:
+        """Whether catch-up periods are fetched concurrently"""
+        return self.backfill_workers > 1 and self.engine == 'rpc' and not self.full_snapshot_interval
+
+    def _backfill_periods(self, first_period_start: int, periods_count: int) -> int:
+        """Record a chunk of past periods with balances fetched concurrently
+
+        Absolute balances of every period are fetched by a pool of workers, each with its
+        own node connection, and recorded without change columns. The changes of the whole
+        chunk are then derived in one pass in ClickHouse.
+
+        Args:
+            first_period_start: Start timestamp of the first period of the chunk (milliseconds)
+            periods_count: Number of consecutive periods to record
+
+        Returns:
+            Start timestamp of the first period after the chunk
+        """
+        start_time = time.time()
+        labels = {'network': self.network, 'indexer': 'balance_series'}
+        period_starts = [first_period_start + i * self.period_ms for i in range(periods_count)]
+        chunk_end = period_starts[-1] + self.period_ms
+
+        if self._backfill_nodes is None:
+            self._backfill_nodes = queue.Queue()
+            for _ in range(self.backfill_workers):
+                self._backfill_nodes.put(SubstrateNode(self.network, self.substrate_node.node_ws_url, self.terminate_event))
+
+        with ThreadPoolExecutor(max_workers=self.backfill_workers) as executor:
+            futures = [
+                executor.submit(self._fetch_period_balances, period_start, period_start + self.period_ms)
+                for period_start in period_starts
+            ]
+            results = [future.result() for future in futures]
+
+        for period_start, result in zip(period_starts, results):
+            if result is None:
+                continue
+            block_height, address_balances = result
+            self.balance_series_indexer.record_balance_series(
+                period_start, period_start + self.period_ms, block_height, address_balances, compute_changes=False
+            )
+            self._record_period_metrics(labels, start_time, block_height, len(address_balances))
+
+        self.balance_series_indexer.recompute_balance_changes(first_period_start, chunk_end)
+
+        logger.info(
+            "Backfilled periods",
+            extra={
+                "period_start": first_period_start,
+                "period_end": chunk_end,
+                "periods": periods_count,
+                "workers": self.backfill_workers,
+                "processing_time": round(time.time() - start_time, 2)
+            }
+        )
+        return chunk_end
+
+    def _fetch_period_balances(self, period_start: int, period_end: int) -> Optional[Tuple[int, Dict[str, Dict[str, int]]]]:
+        """Fetch the end block height and active address balances of a period on a backfill worker
+
+        Returns:
+            Tuple of (block_height, address_balances) or None if the period has no active addresses
+        """
+        with self._clickhouse_lock:
+            end_block = self.block_stream_manager.get_block_by_nearest_timestamp(period_end)
+            if not end_block:
+                raise ValueError(f"No block found for period end timestamp {period_end}")
+
+            all_addresses = self.block_stream_manager.get_active_addresses(period_start, period_end)
+
+        if not all_addresses:
+            return None
+
+        substrate_node = self._backfill_nodes.get()
+        try:
+            address_balances = self._query_blockchain_balances(all_addresses, end_block['block_hash'], substrate_node)
+        finally:
+            self._backfill_nodes.put(substrate_node)
+
+        return end_block['block_height'], address_balances
+
+    def _record_period_metrics(self, labels: Dict[str, str], start_time: float, block_height: int, addresses_count: int):
+        """Record metrics and milestone logs for a processed period"""
+        processing_time = time.time() - start_time
+        if self.period_processing_duration:
+            self.period_processing_duration.labels(**labels).observe(processing_time)
+        if self.addresses_processed_total:
+            self.addresses_processed_total.labels(**labels).inc(addresses_count)
+        if self.periods_processed_total:
+            self.periods_processed_total.labels(**labels).inc()
+        if self.indexer_metrics:
+            self.indexer_metrics.record_block_processed(block_height, processing_time)
+
+        # Log milestone progress every 10 periods
+        if hasattr(self, '_periods_processed'):
+            self._periods_processed += 1
+        else:
+            self._periods_processed = 1
+
+        if self._periods_processed % 10 == 0:
+            logger.info(
+                "Period processing milestone",
+                extra={
+                    "periods_processed": self._periods_processed,
+                    "addresses_in_period": addresses_count,
+                    "block_height": block_height,
+                    "processing_time": round(processing_time, 2)
+                }
+            )
+
+    def _record_full_snapshot(self, period_start: int, period_end: int, block_height: int, block_hash: str) -> int:
+        """Record the balances of every account on chain for a period
+
+        The System.Account map is streamed page by page at the period end block and
+        recorded in chunks, so memory stays bounded regardless of the number of accounts.
+
+        Args:
+            period_start: Start timestamp of the period (milliseconds)
+            period_end: End timestamp of the period (milliseconds)
+            block_height: Block height at the end of the period
+            block_hash: Block hash at the end of the period
+
+        Returns:
+            Number of accounts recorded
+        """
+        snapshot_start = time.time()
+        logger.info(
+            "Recording full balance snapshot",
+            extra={
+                "period_start": period_start,
+                "period_end": period_end,
+                "block_height": block_height
+            }
+        )
+
+        staked_balances = self.substrate_node.get_staked_balances_at_block(block_hash)
+
+        addresses_recorded = 0
+        address_balances = {}
+        start_key = None
+        while True:
+            if self.terminate_event.is_set():
+                raise RuntimeError("Full snapshot terminated")
+
+            accounts, start_key = self.substrate_node.get_accounts_page_at_block(
+                block_hash, start_key, self.snapshot_page_size
+            )
+
+            for address, account_data in accounts:
+                free = int(account_data.get('data', {}).get('free', 0))
+                reserved = int(account_data.get('data', {}).get('reserved', 0))
+                staked = int(staked_balances.get(address, 0))
+
+                address_balances[address] = {
+                    'free_balance': free,
+                    'reserved_balance': reserved,
+                    'staked_balance': staked,
+                    'total_balance': free + reserved + staked
+                }
+
+            if len(address_balances) >= self.snapshot_write_size or (start_key is None and address_balances):
+                self.balance_series_indexer.record_balance_series(
+                    period_start, period_end, block_height, address_balances
+                )
+                addresses_recorded += len(address_balances)
+                address_balances = {}
+
+            if start_key is None:
+                break
+
+        # The snapshot supersedes any replayed state
+        self._event_engine = None
+
+        logger.info(
+            "Full balance snapshot recorded",
+            extra={
+                "period_start": period_start,
+                "block_height": block_height,
+                "addresses_recorded": addresses_recorded,
+                "duration_seconds": round(time.time() - snapshot_start, 2)
+            }
+        )
+        return addresses_recorded
+
+    def _replay_period_events(self, block_height: int, block_hash: str) -> Dict[str, Dict[str, int]]:
+        """Advance the event engine to the period end block and return the changed balances
+
+        Args:
+            block_height: Block height at the end of the period
+            block_hash: Block hash at the end of the period
+
+        Returns:
+            Dictionary mapping changed addresses to their balance information
+        """
+        if self._event_engine is None:
+            _, last_block_height = self.balance_series_indexer.get_latest_processed_period()
+            self._event_engine = BalanceEventEngine()
+            self._event_engine.load(self.balance_series_indexer.iter_latest_balances(), last_block_height)
+
+        engine = self._event_engine
+        for start_height in range(engine.last_applied_height + 1, block_height + 1, self.event_replay_batch_blocks):
+            if self.terminate_event.is_set():
+                raise RuntimeError("Event replay terminated")
+
+            end_height = min(start_height + self.event_replay_batch_blocks - 1, block_height)
+            blocks = self.block_stream_manager.get_blocks_by_block_height_range(start_height, end_height)
+            engine.apply_blocks(blocks)
+
+        if engine.last_applied_height != block_height:
+            raise ValueError(f"Block stream incomplete, replayed up to {engine.last_applied_height} of {block_height}")
+
+        # Verify flagged addresses and a sample of changed ones against on-chain state
+        reconcile_addresses = engine.reconcile_candidates(self.reconcile_sample_size)
+        if reconcile_addresses:
+            on_chain_balances = self._query_blockchain_balances(set(reconcile_addresses), block_hash)
+            mismatches = engine.reconcile(on_chain_balances, reconcile_addresses)
+            if mismatches:
+                logger.warning(
+                    "Replayed balances differed from chain state",
+                    extra={
+                        "block_height": block_height,
+                        "reconciled_addresses": len(reconcile_addresses),
+                        "mismatches": mismatches
+                    }
+                )
+
+        return engine.drain_touched_balances()
+
+    def _query_blockchain_balances(self, addresses: Set[str], block_hash: str,
+                                   substrate_node: SubstrateNode = None) -> Dict[str, Dict[str, int]]:
         """Query balances for multiple addresses from the blockchain
 
         Args:
             addresses: Set of addresses to query
             block_hash: Block hash to query at
+            substrate_node: Node to query, defaults to the consumer's node
 
         Returns:
             Dictionary mapping addresses to their balance information
         """
         result = {}
-        address_list = list(addresses)
 
-        for i in range(0, len(address_list), self.batch_size):
+        # get_balances_at_block_bulk has infinite retry built-in and reads batch_size storage keys per request
+        try:
+            accounts = (substrate_node or self.substrate_node).get_balances_at_block_bulk(
+                block_hash=block_hash,
+                addresses=list(addresses),
+                batch_size=self.batch_size
+            )
+        except Exception as e:
+            # This should only happen if termination was requested
             if self.terminate_event.is_set():
                 logger.info("Termination requested during balance query")
-                break
-
-            batch = address_list[i:i + self.batch_size]
-
-            for address in batch:
-                # The get_balances_at_block method now has infinite retry built-in
-                # It will only return if successful or if termination is requested
-                try:
-                    account_data = self.substrate_node.get_balances_at_block(
-                        block_hash=block_hash,
-                        params=[address]
-                    )
-
-                    if account_data:
-                        free = int(account_data.get('data', {}).get('free', 0))
-                        reserved = int(account_data.get('data', {}).get('reserved', 0))
-                        staked = int(account_data.get('data', {}).get('staked', 0))
-                        total = free + reserved + staked
-
-                        result[address] = {
-                            'free_balance': free,
-                            'reserved_balance': reserved,
-                            'staked_balance': staked,
-                            'total_balance': total
-                        }
-                except Exception as e:
-                    # This should only happen if termination was requested
-                    if self.terminate_event.is_set():
-                        break
-                    else:
-                        # Error logging with context
-                        logger.error(
-                            "Unexpected balance query error",
-                            error=e,
-                            traceback=traceback.format_exc(),
-                            extra={
-                                "operation": "query_blockchain_balances",
-                                "address": address,
-                                "block_hash": block_hash,
-                                "batch_index": i//self.batch_size + 1
-                            }
-                        )
-                        raise  # Fail fast instead of continuing
+                return result
 
-            # Brief pause between batches
-            if i + self.batch_size < len(address_list) and not self.terminate_event.is_set():
-                time.sleep(0.1)
+            logger.error(
+                "Unexpected balance query error",
+                error=e,
+                traceback=traceback.format_exc(),
+                extra={
+                    "operation": "query_blockchain_balances",
+                    "addresses_count": len(addresses),
+                    "block_hash": block_hash
+                }
+            )
+            raise  # Fail fast instead of continuing
+
+        for address, account_data in accounts.items():
+            free = int(account_data.get('data', {}).get('free', 0))
+            reserved = int(account_data.get('data', {}).get('reserved', 0))
+            staked = int(account_data.get('data', {}).get('staked', 0))
+            total = free + reserved + staked
+
+            result[address] = {
+                'free_balance': free,
+                'reserved_balance': reserved,
+                'staked_balance': staked,
+                'total_balance': total
+            }
 
         return result
 
@@ -442,7 +676,9 @@ if __name__ == "__main__":
         '--period-hours',
         type=int,
         default=4,
-        help='Number of hours in each period (default: 4)'
+        help='Number of hours in each period, at most 24 (default: 4). 4-hour and daily rollups coarser '
+             'than the period are maintained by ClickHouse, so 1 records hourly detail without slowing '
+             'down long-range reads'
     )
     parser.add_argument(
         '--batch-size',
@@ -450,7 +686,40 @@ if __name__ == "__main__":
         default=100,
         help='Number of addresses to query in a single blockchain request'
     )
+    parser.add_argument(
+        '--engine',
+        type=str,
+        default='rpc',
+        choices=['rpc', 'events'],
+        help="Balance source: 'rpc' queries active addresses on chain, 'events' replays block stream events (default: rpc)"
+    )
+    parser.add_argument(
+        '--reconcile-sample-size',
+        type=int,
+        default=100,
+        help="Changed addresses verified on chain per period with --engine events (default: 100)"
+    )
+    parser.add_argument(
+        '--backfill-workers',
+        type=int,
+        default=1,
+        help='Periods fetched concurrently while catching up with --engine rpc (default: 1, serial)'
+    )
+    parser.add_argument(
+        '--full-snapshot-interval',
+        type=int,
+        default=0,
+        help='Record a full snapshot of all accounts every N periods (default: 0, disabled)'
+    )
+    parser.add_argument(
+        '--full-snapshot-min-addresses',
+        type=int,
+        default=0,
+        help='Record a full snapshot when a period has at least this many active addresses (default: 0, disabled)'
+    )
     args = parser.parse_args()
+    if not 0 < args.period_hours <= 24:
+        parser.error('--period-hours must be between 1 and 24 so every daily rollup bucket receives a snapshot')
 
     service_name = f'substrate-{args.network}-balance-series'
     setup_logger(service_name)
@@ -510,7 +779,12 @@ if __name__ == "__main__":
             terminate_event,
             args.network,
             args.period_hours,
-            args.batch_size
+            args.batch_size,
+            args.full_snapshot_interval,
+            args.full_snapshot_min_addresses,
+            args.engine,
+            args.reconcile_sample_size,
+            args.backfill_workers
         )
 
         consumer.set_metrics(metrics_registry, indexer_metrics)
@@ -1,16 +1,51 @@
 import os
 import time
 import traceback
-from typing import Dict, Any, Tuple, Optional, List
+from collections import OrderedDict
+from typing import Dict, Any, Tuple, Optional, List, Iterable
 import clickhouse_connect
+import numpy as np
 from decimal import Decimal
 from loguru import logger
-from packages.indexers.base.decimal_utils import convert_to_decimal_units
+from packages.indexers.base.decimal_utils import convert_from_decimal_units, get_network_token_decimals
 from packages.indexers.substrate import get_network_asset
 from packages.indexers.base.metrics import IndexerMetrics
 
+BALANCE_SERIES_COLUMNS = [
+    'period_start_timestamp', 'period_end_timestamp', 'block_height',
+    'address', 'asset', 'free_balance', 'reserved_balance', 'staked_balance', 'total_balance',
+    'free_balance_change', 'reserved_balance_change', 'staked_balance_change', 'total_balance_change',
+    'total_balance_percent_change', '_version'
+]
+
+# Largest absolute value of the Decimal64(6) percent change column (18 digits, 12 before the point),
+# scaled by 10^6 as sent in the insert
+MAX_PERCENT_CHANGE_SCALED = 999_999_999_999_999_999
+
+
+def raw_balance_array(values: Iterable) -> np.ndarray:
+    """Build an array of exact integer balances in raw chain units
+
+    Balances are u128 and overflow int64, so the array holds Python integers. Operations
+    on it are still evaluated one Python integer at a time; the array keeps the column-wise
+    code short and exact, it does not make the arithmetic SIMD fast.
+    """
+    return np.array([int(value) for value in values], dtype=object)
+
+
+def raw_to_decimal_units(values: np.ndarray, decimals: int) -> List[Decimal]:
+    """Convert raw chain units to decimal units by shifting the exponent instead of dividing"""
+    return [Decimal(value).scaleb(-decimals) for value in values]
+
 
 class BalanceSeriesIndexerBase:
+    # Number of addresses bound into a single previous-balances lookup query
+    previous_balances_batch_size = 2000
+    # Maximum number of addresses whose last recorded balances are kept in memory
+    last_balances_cache_size = 500000
+    # Materialized views of schema.sql feeding balance_series_rollup, by resolution in hours
+    rollup_views = {4: 'balance_series_rollup_4h_mv_internal', 24: 'balance_series_rollup_1d_mv_internal'}
+
     def __init__(self, connection_params: Dict[str, Any], metrics: IndexerMetrics, network: str, period_hours: int = 4):
         """Initialize the Balance Series Indexer with a database connection
         
@@ -24,8 +59,13 @@ class BalanceSeriesIndexerBase:
         self.asset = get_network_asset(network)
         self.period_hours = period_hours
         self.period_ms = period_hours * 60 * 60 * 1000  # Convert hours to milliseconds
+        # Rollups no coarser than the period would repeat the raw snapshots
+        self.rollup_resolutions = [hours for hours in self.rollup_views if hours > period_hours]
         self.first_block_timestamp = None  # Will be set by the consumer if available
         self.metrics = metrics
+
+        # LRU of the last recorded balances per address: {address: (period_start_timestamp, balances)}
+        self._last_balances: OrderedDict = OrderedDict()
         
         self.client = clickhouse_connect.get_client(
             host=connection_params['host'],
@@ -75,8 +115,12 @@ class BalanceSeriesIndexerBase:
                         statements.append(full_statement.rstrip(';'))
                     current_statement = []
             
+            skipped_views = [view for hours, view in self.rollup_views.items() if hours not in self.rollup_resolutions]
+
             # Execute each statement
             for statement in statements:
+                if any(view in statement for view in skipped_views):
+                    continue
                 if statement:
                     try:
                         self.client.command(statement)
@@ -89,6 +133,13 @@ class BalanceSeriesIndexerBase:
                             logger.error(f"Statement: {statement[:100]}...")
                             raise
             
+            # A view left from a run with a shorter period would keep feeding the skipped resolution
+            for view in skipped_views:
+                self.client.command(f"DROP VIEW IF EXISTS {view}")
+
+            self._populate_latest_balances()
+            self._populate_balance_rollups()
+
             logger.info(f"Balance series table initialization completed in {time.time() - start_time:.2f}s")
             
         except FileNotFoundError:
@@ -99,8 +150,101 @@ class BalanceSeriesIndexerBase:
             raise
 
 
-    def record_balance_series(self, period_start_timestamp: int, period_end_timestamp: int, block_height: int, address_balances: Dict[str, Dict[str, int]]):
+    def _populate_latest_balances(self):
+        """Load balance_series_latest from balance_series recorded before the table existed
+
+        The materialized view feeding the table only sees new inserts, so an empty table next
+        to a non-empty balance_series is filled once with the latest snapshot of every address.
+        """
+        result = self.client.query('''
+            SELECT
+                (SELECT count() FROM balance_series_latest WHERE asset = {asset:String}),
+                (SELECT count() FROM balance_series WHERE asset = {asset:String})
+        ''', {'asset': self.asset})
+        latest_rows, series_rows = result.result_rows[0]
+        if latest_rows or not series_rows:
+            return
+
+        start_time = time.time()
+        self.client.command('''
+            INSERT INTO balance_series_latest
+            SELECT
+                asset,
+                address,
+                argMax(period_start_timestamp, (period_start_timestamp, _version)),
+                argMax(period_end_timestamp, (period_start_timestamp, _version)),
+                argMax(block_height, (period_start_timestamp, _version)),
+                argMax(free_balance, (period_start_timestamp, _version)),
+                argMax(reserved_balance, (period_start_timestamp, _version)),
+                argMax(staked_balance, (period_start_timestamp, _version)),
+                argMax(total_balance, (period_start_timestamp, _version))
+            FROM balance_series
+            WHERE asset = {asset:String}
+            GROUP BY asset, address
+        ''', {'asset': self.asset}, settings={'max_execution_time': 0})
+        logger.info(
+            "Populated latest balances",
+            extra={"asset": self.asset, "duration_seconds": round(time.time() - start_time, 2)}
+        )
+
+    def _populate_balance_rollups(self):
+        """Load balance_series_rollup from balance_series recorded before the table existed
+
+        Like balance_series_latest, the rollups coarser than the period are fed by materialized
+        views that only see new inserts, so a resolution without rows next to a non-empty
+        balance_series is filled once from the whole history. Snapshots go to the bucket their period ends
+        in, as in the views. The states are argMax, so a snapshot aggregated by both the
+        backfill and a view does not change the result.
+        """
+        for resolution_hours in self.rollup_resolutions:
+            result = self.client.query('''
+                SELECT
+                    (SELECT count() FROM balance_series_rollup
+                     WHERE resolution_hours = {resolution_hours:UInt16} AND asset = {asset:String}),
+                    (SELECT count() FROM balance_series WHERE asset = {asset:String})
+            ''', {'resolution_hours': resolution_hours, 'asset': self.asset})
+            rollup_rows, series_rows = result.result_rows[0]
+            if rollup_rows or not series_rows:
+                continue
+
+            start_time = time.time()
+            self.client.command('''
+                INSERT INTO balance_series_rollup
+                SELECT
+                    toUInt16({resolution_hours:UInt16}) AS resolution_hours,
+                    intDiv(period_end_timestamp - 1, {bucket_ms:UInt64}) * {bucket_ms:UInt64} AS bucket_start_timestamp,
+                    asset,
+                    address,
+                    argMaxState(period_end_timestamp, (period_start_timestamp, _version)),
+                    argMaxState(block_height, (period_start_timestamp, _version)),
+                    argMaxState(free_balance, (period_start_timestamp, _version)),
+                    argMaxState(reserved_balance, (period_start_timestamp, _version)),
+                    argMaxState(staked_balance, (period_start_timestamp, _version)),
+                    argMaxState(total_balance, (period_start_timestamp, _version))
+                FROM balance_series
+                WHERE asset = {asset:String}
+                GROUP BY resolution_hours, bucket_start_timestamp, asset, address
+            ''', {
+                'resolution_hours': resolution_hours,
+                'bucket_ms': resolution_hours * 60 * 60 * 1000,
+                'asset': self.asset
+            }, settings={'max_execution_time': 0})
+            logger.info(
+                "Populated balance rollups",
+                extra={
+                    "asset": self.asset,
+                    "resolution_hours": resolution_hours,
+                    "duration_seconds": round(time.time() - start_time, 2)
+                }
+            )
+
+    def record_balance_series(self, period_start_timestamp: int, period_end_timestamp: int, block_height: int,
+                              address_balances: Dict[str, Dict[str, int]], compute_changes: bool = True):
         """Record balance series data for multiple addresses at a specific time period
+
+        Validation, change and percent change calculations are written column-wise over all
+        addresses of the period, and the rows are sent as a columnar insert. Balance columns
+        hold Python integers, so only the percent change runs as native float64 arithmetic.
         
         Args:
             period_start_timestamp: Start timestamp of the period (milliseconds)
@@ -108,6 +252,8 @@ class BalanceSeriesIndexerBase:
             block_height: Block height at the end of the period
             address_balances: Dictionary mapping addresses to their balance information
                              {address: {'free_balance': int, 'reserved_balance': int, 'staked_balance': int, 'total_balance': int}}
+            compute_changes: Whether to compute change columns from the previous period; when False they are
+                             recorded as zero and must be filled in later with recompute_balance_changes
         """
         if not address_balances:
             logger.warning(f"No address balances provided for period {period_start_timestamp}-{period_end_timestamp}")
@@ -116,80 +262,110 @@ class BalanceSeriesIndexerBase:
         start_time = time.time()
 
         try:
-            # Prepare data for insertion
-            balance_data = []
-            for address, balances in address_balances.items():
-                # Convert raw blockchain values to decimal units
-                free_balance = convert_to_decimal_units(balances.get('free_balance', 0), self.network)
-                reserved_balance = convert_to_decimal_units(balances.get('reserved_balance', 0), self.network)
-                staked_balance = convert_to_decimal_units(balances.get('staked_balance', 0), self.network)
-                total_balance = convert_to_decimal_units(balances.get('total_balance', 0), self.network)
-                
-                # Validate balances
-                if free_balance < 0 or reserved_balance < 0 or staked_balance < 0 or total_balance < 0:
-                    raise ValueError(f"Negative balance detected for {address} at period ending {period_end_timestamp}")
-
-                expected_total = free_balance + reserved_balance + staked_balance
-                if total_balance != expected_total:
-                    logger.warning(f"Total balance mismatch for {address} at period ending {period_end_timestamp}: "
-                                  f"{total_balance} != {expected_total}, correcting")
-                    total_balance = expected_total
-                
-                # Get previous period balances for calculating changes
-                prev_balances, prev_period = self.get_previous_period_balances(address, period_start_timestamp)
-                
-                # Calculate changes from previous period
-                free_balance_change = Decimal(0)
-                reserved_balance_change = Decimal(0)
-                staked_balance_change = Decimal(0)
-                total_balance_change = Decimal(0)
-                total_balance_percent_change = Decimal(0)
-                
-                if prev_balances:
-                    free_balance_change = free_balance - prev_balances.get('free_balance', Decimal(0))
-                    reserved_balance_change = reserved_balance - prev_balances.get('reserved_balance', Decimal(0))
-                    staked_balance_change = staked_balance - prev_balances.get('staked_balance', Decimal(0))
-                    total_balance_change = total_balance - prev_balances.get('total_balance', Decimal(0))
-                    
-                    # Calculate percentage change
-                    prev_total = prev_balances.get('total_balance', Decimal(0))
-                    if prev_total > 0:
-                        total_balance_percent_change = (total_balance_change / prev_total) * 100
+            decimals = get_network_token_decimals(self.network)
+            addresses = list(address_balances.keys())
+            balances = list(address_balances.values())
+            rows_count = len(addresses)
 
-                block_version = block_height
+            free = raw_balance_array(b.get('free_balance', 0) for b in balances)
+            reserved = raw_balance_array(b.get('reserved_balance', 0) for b in balances)
+            staked = raw_balance_array(b.get('staked_balance', 0) for b in balances)
+            reported_total = raw_balance_array(b.get('total_balance', 0) for b in balances)
+
+            # Validate balances
+            negative = (free < 0) | (reserved < 0) | (staked < 0) | (reported_total < 0)
+            if negative.any():
+                address = addresses[int(np.flatnonzero(negative)[0])]
+                raise ValueError(f"Negative balance detected for {address} at period ending {period_end_timestamp}")
+
+            total = free + reserved + staked
+            mismatched = np.flatnonzero(total != reported_total)
+            if len(mismatched):
+                logger.warning(f"Total balance mismatch for {len(mismatched)} addresses at period ending "
+                               f"{period_end_timestamp} (e.g. {addresses[int(mismatched[0])]}), correcting")
+
+            # Previous period balances in raw units; addresses without one get zero changes
+            has_previous = np.zeros(rows_count, dtype=bool)
+            previous = {
+                'free_balance': np.zeros(rows_count, dtype=object),
+                'reserved_balance': np.zeros(rows_count, dtype=object),
+                'staked_balance': np.zeros(rows_count, dtype=object),
+                'total_balance': np.zeros(rows_count, dtype=object)
+            }
+            if compute_changes:
+                # Load previous balances of all addresses of the period at once
+                previous_balances = self.get_previous_period_balances_bulk(addresses, period_start_timestamp)
+                for i, address in enumerate(addresses):
+                    prev_balances, _ = previous_balances.get(address, (None, 0))
+                    if prev_balances:
+                        has_previous[i] = True
+                        for column, values in previous.items():
+                            values[i] = int(Decimal(prev_balances.get(column, 0)).scaleb(decimals))
+
+            free_change = np.where(has_previous, free - previous['free_balance'], 0)
+            reserved_change = np.where(has_previous, reserved - previous['reserved_balance'], 0)
+            staked_change = np.where(has_previous, staked - previous['staked_balance'], 0)
+            total_change = np.where(has_previous, total - previous['total_balance'], 0)
+
+            # Percentage change against the previous total, clipped to the column range
+            previous_total = previous['total_balance'].astype(np.float64)
+            has_percent = has_previous & (previous_total > 0)
+            percent_change = np.where(
+                has_percent,
+                total_change.astype(np.float64) * 100 / np.where(has_percent, previous_total, 1),
+                0.0
+            )
+            # Clip in float64 first (10^12 * 10^6 is exact), then to the column bound in int64,
+            # since 999999999999.999999 has no float64 representation below the bound
+            percent_change = np.clip(percent_change, -1e12, 1e12)
+            percent_change_scaled = np.clip(
+                np.rint(percent_change * 1_000_000).astype(np.int64),
+                -MAX_PERCENT_CHANGE_SCALED,
+                MAX_PERCENT_CHANGE_SCALED
+            )
+
+            free_units = raw_to_decimal_units(free, decimals)
+            reserved_units = raw_to_decimal_units(reserved, decimals)
+            staked_units = raw_to_decimal_units(staked, decimals)
+            total_units = raw_to_decimal_units(total, decimals)
+
+            block_version = block_height
+
+            columns = [
+                [period_start_timestamp] * rows_count,
+                [period_end_timestamp] * rows_count,
+                [block_height] * rows_count,
+                addresses,
+                [self.asset] * rows_count,
+                free_units,
+                reserved_units,
+                staked_units,
+                total_units,
+                raw_to_decimal_units(free_change, decimals),
+                raw_to_decimal_units(reserved_change, decimals),
+                raw_to_decimal_units(staked_change, decimals),
+                raw_to_decimal_units(total_change, decimals),
+                raw_to_decimal_units(percent_change_scaled.tolist(), 6),
+                [block_version] * rows_count
+            ]
 
-                balance_data.append((
-                    period_start_timestamp,
-                    period_end_timestamp,
-                    block_height,
-                    address,
-                    self.asset,
-                    free_balance,
-                    reserved_balance,
-                    staked_balance,
-                    total_balance,
-                    free_balance_change,
-                    reserved_balance_change,
-                    staked_balance_change,
-                    total_balance_change,
-                    total_balance_percent_change,
-                    block_version
-                ))
-            
             # Insert data
-            if balance_data:
-                self.client.insert('balance_series', balance_data, column_names=[
-                    'period_start_timestamp', 'period_end_timestamp', 'block_height',
-                    'address', 'asset', 'free_balance', 'reserved_balance', 'staked_balance', 'total_balance',
-                    'free_balance_change', 'reserved_balance_change', 'staked_balance_change', 'total_balance_change',
-                    'total_balance_percent_change', '_version'
-                ])
+            self.client.insert('balance_series', columns, column_names=BALANCE_SERIES_COLUMNS, column_oriented=True)
 
-                
-                # Record metrics
-                duration = time.time() - start_time
-                self.metrics.record_database_operation('insert', 'balance_series', duration, True)
-                logger.success(f"Recorded balance series for {len(balance_data)} addresses in {duration:.3f}s")
+            # Carry the recorded balances over as the previous balances of the next period
+            if compute_changes:
+                for i, address in enumerate(addresses):
+                    self._cache_last_balances(address, period_start_timestamp, {
+                        'free_balance': free_units[i],
+                        'reserved_balance': reserved_units[i],
+                        'staked_balance': staked_units[i],
+                        'total_balance': total_units[i]
+                    })
+
+            # Record metrics
+            duration = time.time() - start_time
+            self.metrics.record_database_operation('insert', 'balance_series', duration, True)
+            logger.success(f"Recorded balance series for {rows_count} addresses in {duration:.3f}s")
 
         except Exception as e:
             # Record database error metric
@@ -210,6 +386,97 @@ class BalanceSeriesIndexerBase:
             )
             raise
 
+    def recompute_balance_changes(self, period_start_timestamp: int, period_end_timestamp: int):
+        """Derive the change columns of snapshots recorded without them in a range of periods
+
+        Each snapshot is compared with the preceding snapshot of the same address using
+        lagInFrame, so periods can be recorded out of order (e.g. by parallel backfill
+        workers) and their changes derived afterwards in a single pass inside ClickHouse.
+        Only snapshots recorded without changes (all change columns zero) whose derived
+        changes are not zero are rewritten, with a higher _version that replaces the original
+        on merge. The weekly and monthly views sum the change columns of every insert, so
+        they then hold zero plus the derived change, and running the recompute again over
+        the same range writes nothing.
+
+        Args:
+            period_start_timestamp: Start of the first period to recompute (milliseconds, inclusive)
+            period_end_timestamp: End of the range (milliseconds, exclusive for period starts)
+        """
+        start_time = time.time()
+        self.client.command('''
+            INSERT INTO balance_series (
+                period_start_timestamp, period_end_timestamp, block_height,
+                address, asset, free_balance, reserved_balance, staked_balance, total_balance,
+                free_balance_change, reserved_balance_change, staked_balance_change, total_balance_change,
+                total_balance_percent_change, _version
+            )
+            SELECT
+                period_start_timestamp,
+                period_end_timestamp,
+                block_height,
+                address,
+                asset,
+                free_balance,
+                reserved_balance,
+                staked_balance,
+                total_balance,
+                ifNull(free_balance - prev_free_balance, toDecimal128(0, 18)) AS derived_free_balance_change,
+                ifNull(reserved_balance - prev_reserved_balance, toDecimal128(0, 18)) AS derived_reserved_balance_change,
+                ifNull(staked_balance - prev_staked_balance, toDecimal128(0, 18)) AS derived_staked_balance_change,
+                ifNull(total_balance - prev_total_balance, toDecimal128(0, 18)) AS derived_total_balance_change,
+                toDecimal64(least(greatest(if(ifNull(prev_total_balance, 0) > 0,
+                               toFloat64(total_balance - prev_total_balance) * 100 / toFloat64(prev_total_balance),
+                               0), -999999999999.999), 999999999999.999), 6),
+                _version + 1
+            FROM (
+                SELECT
+                    *,
+                    lagInFrame(toNullable(free_balance)) OVER w AS prev_free_balance,
+                    lagInFrame(toNullable(reserved_balance)) OVER w AS prev_reserved_balance,
+                    lagInFrame(toNullable(staked_balance)) OVER w AS prev_staked_balance,
+                    lagInFrame(toNullable(total_balance)) OVER w AS prev_total_balance
+                FROM balance_series FINAL
+                WHERE asset = {asset:String}
+                  AND period_start_timestamp < {period_end:UInt64}
+                  AND address IN (
+                      SELECT DISTINCT address
+                      FROM balance_series
+                      WHERE asset = {asset:String}
+                        AND period_start_timestamp >= {period_start:UInt64}
+                        AND period_start_timestamp < {period_end:UInt64}
+                  )
+                WINDOW w AS (PARTITION BY address ORDER BY period_start_timestamp
+                             ROWS BETWEEN UNBOUNDED PRECEDING AND CURRENT ROW)
+            )
+            WHERE period_start_timestamp >= {period_start:UInt64}
+              AND free_balance_change = 0
+              AND reserved_balance_change = 0
+              AND staked_balance_change = 0
+              AND total_balance_change = 0
+              AND (derived_free_balance_change != 0
+                   OR derived_reserved_balance_change != 0
+                   OR derived_staked_balance_change != 0
+                   OR derived_total_balance_change != 0)
+        ''', {
+            'asset': self.asset,
+            'period_start': period_start_timestamp,
+            'period_end': period_end_timestamp
+        })
+
+        # Balances cached from before the recompute may no longer be the latest per address
+        self._last_balances.clear()
+
+        duration = time.time() - start_time
+        self.metrics.record_database_operation('insert', 'balance_series', duration, True)
+        logger.info(
+            "Recomputed balance changes",
+            extra={
+                "period_start": period_start_timestamp,
+                "period_end": period_end_timestamp,
+                "duration_seconds": round(duration, 2)
+            }
+        )
+
     def get_previous_period_balances(self, address: str, current_period_start: int) -> Tuple[Optional[Dict[str, Decimal]], int]:
         """Get the previous period's balances for an address
         
@@ -220,36 +487,100 @@ class BalanceSeriesIndexerBase:
         Returns:
             Tuple of (balance_dict, period_start_timestamp) or (None, 0) if no previous balance found
         """
-        try:
-            result = self.client.query(f'''
-                SELECT
-                    period_start_timestamp,
-                    free_balance,
-                    reserved_balance,
-                    staked_balance,
-                    total_balance
-                FROM balance_series
-                WHERE address = '{address}' 
-                  AND asset = '{self.asset}' 
-                  AND period_start_timestamp < {current_period_start}
-                ORDER BY period_start_timestamp DESC
-                LIMIT 1
-            ''')
-            
-            if result.result_rows:
-                row = result.result_rows[0]
-                return {
-                    'free_balance': row[1],
-                    'reserved_balance': row[2],
-                    'staked_balance': row[3],
-                    'total_balance': row[4]
-                }, row[0]
-            
-            return None, 0
-            
-        except Exception as e:
-            logger.error(f"Error getting previous period balances for {address}: {e}")
-            return None, 0
+        return self.get_previous_period_balances_bulk([address], current_period_start).get(address, (None, 0))
+
+    def get_previous_period_balances_bulk(self, addresses: List[str], current_period_start: int) -> Dict[str, Tuple[Dict[str, Decimal], int]]:
+        """Get the last balances recorded before the current period for many addresses
+
+        Balances carried over from previously recorded periods are served from memory;
+        the remaining addresses are resolved with one argMax query per batch of addresses.
+
+        Args:
+            addresses: The addresses to query
+            current_period_start: The start timestamp of the current period
+
+        Returns:
+            Dictionary mapping addresses to (balance_dict, period_start_timestamp);
+            addresses without a previous balance are omitted
+        """
+        previous_balances = {}
+        missing_addresses = []
+        for address in addresses:
+            cached = self._last_balances.get(address)
+            if cached is not None and cached[0] < current_period_start:
+                self._last_balances.move_to_end(address)
+                previous_balances[address] = (cached[1], cached[0])
+            else:
+                missing_addresses.append(address)
+
+        for i in range(0, len(missing_addresses), self.previous_balances_batch_size):
+            batch = missing_addresses[i:i + self.previous_balances_batch_size]
+            try:
+                result = self.client.query('''
+                    SELECT
+                        address,
+                        max(period_start_timestamp) AS last_period_start,
+                        argMax(free_balance, (period_start_timestamp, _version)),
+                        argMax(reserved_balance, (period_start_timestamp, _version)),
+                        argMax(staked_balance, (period_start_timestamp, _version)),
+                        argMax(total_balance, (period_start_timestamp, _version))
+                    FROM balance_series
+                    WHERE asset = {asset:String}
+                      AND period_start_timestamp < {current_period_start:UInt64}
+                      AND address IN (SELECT arrayJoin({addresses:Array(String)}))
+                    GROUP BY address
+                ''', {
+                    'asset': self.asset,
+                    'current_period_start': current_period_start,
+                    'addresses': batch
+                })
+            except Exception as e:
+                logger.error(f"Error getting previous period balances for {len(batch)} addresses: {e}")
+                raise
+
+            for row in result.result_rows:
+                balances = {
+                    'free_balance': row[2],
+                    'reserved_balance': row[3],
+                    'staked_balance': row[4],
+                    'total_balance': row[5]
+                }
+                previous_balances[row[0]] = (balances, row[1])
+                self._cache_last_balances(row[0], row[1], balances)
+
+        return previous_balances
+
+    def _cache_last_balances(self, address: str, period_start_timestamp: int, balances: Dict[str, Decimal]):
+        """Remember the latest known balances of an address, evicting the least recently used entries"""
+        cached = self._last_balances.get(address)
+        if cached is not None and cached[0] > period_start_timestamp:
+            return
+
+        self._last_balances[address] = (period_start_timestamp, balances)
+        self._last_balances.move_to_end(address)
+        while len(self._last_balances) > self.last_balances_cache_size:
+            self._last_balances.popitem(last=False)
+
+    def iter_latest_balances(self):
+        """Stream the latest recorded balances of every address
+
+        Yields:
+            Tuples of (address, free_balance, reserved_balance, staked_balance) in raw chain units
+        """
+        query = '''
+            SELECT address, free_balance, reserved_balance, staked_balance
+            FROM balance_series_latest FINAL
+            WHERE asset = {asset:String}
+        '''
+        with self.client.query_row_block_stream(query, {'asset': self.asset}) as stream:
+            for block in stream:
+                for address, free_balance, reserved_balance, staked_balance in block:
+                    yield (
+                        address,
+                        int(convert_from_decimal_units(free_balance, self.network)),
+                        int(convert_from_decimal_units(reserved_balance, self.network)),
+                        int(convert_from_decimal_units(staked_balance, self.network))
+                    )
 
     def get_latest_processed_period(self) -> Tuple[int, int]:
         """Get the latest period for which balance series have been recorded
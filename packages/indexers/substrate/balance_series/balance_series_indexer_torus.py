@@ -6,9 +6,11 @@ from loguru import logger
 from decimal import Decimal
 
 from packages.indexers.base import IndexerMetrics
-from packages.indexers.base.decimal_utils import convert_to_decimal_units
+from packages.indexers.base.decimal_utils import get_network_token_decimals
 from packages.indexers.substrate import data
-from packages.indexers.substrate.balance_series.balance_series_indexer_base import BalanceSeriesIndexerBase
+from packages.indexers.substrate.balance_series.balance_series_indexer_base import (
+    BalanceSeriesIndexerBase, BALANCE_SERIES_COLUMNS, raw_balance_array, raw_to_decimal_units
+)
 
 
 class TorusBalanceSeriesIndexer(BalanceSeriesIndexerBase):
@@ -77,51 +79,43 @@ class TorusBalanceSeriesIndexer(BalanceSeriesIndexerBase):
         try:
             period_start_timestamp = block_timestamp
             period_end_timestamp = period_start_timestamp + self.period_ms
-            
-            # Prepare data for balance_series insertion
-            balance_data = []
-            for address, amount in genesis_balances:
-                # Convert genesis balances to decimal units
-                free_balance = convert_to_decimal_units(amount, network)
-                reserved_balance = Decimal(0)
-                staked_balance = Decimal(0)
-                total_balance = free_balance + reserved_balance + staked_balance
-                
-                # For genesis balances, there are no previous balances, so changes are the same as current balances
+            decimals = get_network_token_decimals(network)
+
+            # Insert data in batches to avoid memory issues
+            batch_size = 50000
+            batches_count = (len(genesis_balances) + batch_size - 1) // batch_size
+            for i in range(0, len(genesis_balances), batch_size):
+                batch = genesis_balances[i:i + batch_size]
+                rows_count = len(batch)
 
+                # Convert genesis balances to decimal units; reserved and staked balances are zero at genesis
+                free_balance = raw_to_decimal_units(raw_balance_array(amount for _, amount in batch), decimals)
+                zero_balance = [Decimal(0)] * rows_count
                 block_version = block_height
 
-                balance_data.append((
-                    period_start_timestamp,
-                    period_end_timestamp,
-                    block_height,
-                    address,
-                    self.asset,
+                # For genesis balances, there are no previous balances, so changes are the same as current balances
+                columns = [
+                    [period_start_timestamp] * rows_count,
+                    [period_end_timestamp] * rows_count,
+                    [block_height] * rows_count,
+                    [address for address, _ in batch],
+                    [self.asset] * rows_count,
                     free_balance,
-                    reserved_balance,
-                    staked_balance,
-                    total_balance,
+                    zero_balance,
+                    zero_balance,
+                    free_balance,  # total_balance = free_balance for genesis
                     free_balance,  # free_balance_change = free_balance for genesis
-                    reserved_balance,  # reserved_balance_change = reserved_balance for genesis
-                    staked_balance,  # staked_balance_change = staked_balance for genesis
-                    total_balance,  # total_balance_change = total_balance for genesis
-                    Decimal(0),  # No percentage change for genesis
-                    block_version
-                ))
-            
-            # Insert data in batches to avoid memory issues
-            batch_size = 1000
-            for i in range(0, len(balance_data), batch_size):
-                batch = balance_data[i:i + batch_size]
-                self.client.insert('balance_series', batch, column_names=[
-                    'period_start_timestamp', 'period_end_timestamp', 'block_height',
-                    'address', 'asset', 'free_balance', 'reserved_balance', 'staked_balance', 'total_balance',
-                    'free_balance_change', 'reserved_balance_change', 'staked_balance_change', 'total_balance_change',
-                    'total_balance_percent_change', '_version'
-                ])
-                logger.info(f"Inserted batch {i//batch_size + 1}/{(len(balance_data) + batch_size - 1)//batch_size} of genesis balance records")
+                    zero_balance,
+                    zero_balance,
+                    free_balance,  # total_balance_change = total_balance for genesis
+                    zero_balance,  # No percentage change for genesis
+                    [block_version] * rows_count
+                ]
+
+                self.client.insert('balance_series', columns, column_names=BALANCE_SERIES_COLUMNS, column_oriented=True)
+                logger.info(f"Inserted batch {i//batch_size + 1}/{batches_count} of genesis balance records")
             
-            logger.success(f"Successfully inserted {len(balance_data)} genesis balance records for Torus network")
+            logger.success(f"Successfully inserted {len(genesis_balances)} genesis balance records for Torus network")
             
         except Exception as e:
             logger.error(f"Error inserting genesis records for Torus: {e}")
@@ -102,24 +102,208 @@ SELECT
 FROM balance_series
 GROUP BY month_start, address, asset;
 
+-- Multi-resolution rollups of balance_series maintained on insert
+-- One row per address, asset and bucket holding argMax states of the last snapshot of the
+-- bucket, keyed by (period_start_timestamp, _version) so re-recorded snapshots win.
+-- Balance series are recorded at --period-hours (e.g. 1h) and rolled up to 4h and 1d here;
+-- the indexer skips the view of a resolution not coarser than the period.
+-- Periods are anchored at the genesis block timestamp rather than at UTC bucket boundaries,
+-- so a snapshot is assigned to the bucket its period ends in: a bucket only holds balances
+-- taken within it. Existing history is loaded once by the indexer on startup.
+CREATE TABLE IF NOT EXISTS balance_series_rollup (
+    -- Bucket length in hours
+    resolution_hours UInt16,
+    -- Start of the bucket - Unix timestamp in milliseconds
+    bucket_start_timestamp UInt64,
+    asset String,
+    address String,
+    period_end_timestamp AggregateFunction(argMax, UInt64, Tuple(UInt64, UInt64)),
+    block_height AggregateFunction(argMax, UInt32, Tuple(UInt64, UInt64)),
+    free_balance AggregateFunction(argMax, Decimal128(18), Tuple(UInt64, UInt64)),
+    reserved_balance AggregateFunction(argMax, Decimal128(18), Tuple(UInt64, UInt64)),
+    staked_balance AggregateFunction(argMax, Decimal128(18), Tuple(UInt64, UInt64)),
+    total_balance AggregateFunction(argMax, Decimal128(18), Tuple(UInt64, UInt64))
+) ENGINE = AggregatingMergeTree()
+PARTITION BY (resolution_hours, toYYYYMM(fromUnixTimestamp64Milli(bucket_start_timestamp)))
+ORDER BY (resolution_hours, address, asset, bucket_start_timestamp)
+SETTINGS index_granularity = 8192
+COMMENT 'End-of-bucket balance states of balance_series at 4h and 1d resolutions';
+
+CREATE MATERIALIZED VIEW IF NOT EXISTS balance_series_rollup_4h_mv_internal
+TO balance_series_rollup
+AS
+SELECT
+    toUInt16(4) as resolution_hours,
+    intDiv(period_end_timestamp - 1, 14400000) * 14400000 as bucket_start_timestamp,
+    asset,
+    address,
+    argMaxState(period_end_timestamp, (period_start_timestamp, _version)) as period_end_timestamp,
+    argMaxState(block_height, (period_start_timestamp, _version)) as block_height,
+    argMaxState(free_balance, (period_start_timestamp, _version)) as free_balance,
+    argMaxState(reserved_balance, (period_start_timestamp, _version)) as reserved_balance,
+    argMaxState(staked_balance, (period_start_timestamp, _version)) as staked_balance,
+    argMaxState(total_balance, (period_start_timestamp, _version)) as total_balance
+FROM balance_series
+GROUP BY resolution_hours, bucket_start_timestamp, asset, address;
+
+CREATE MATERIALIZED VIEW IF NOT EXISTS balance_series_rollup_1d_mv_internal
+TO balance_series_rollup
+AS
+SELECT
+    toUInt16(24) as resolution_hours,
+    intDiv(period_end_timestamp - 1, 86400000) * 86400000 as bucket_start_timestamp,
+    asset,
+    address,
+    argMaxState(period_end_timestamp, (period_start_timestamp, _version)) as period_end_timestamp,
+    argMaxState(block_height, (period_start_timestamp, _version)) as block_height,
+    argMaxState(free_balance, (period_start_timestamp, _version)) as free_balance,
+    argMaxState(reserved_balance, (period_start_timestamp, _version)) as reserved_balance,
+    argMaxState(staked_balance, (period_start_timestamp, _version)) as staked_balance,
+    argMaxState(total_balance, (period_start_timestamp, _version)) as total_balance
+FROM balance_series
+GROUP BY resolution_hours, bucket_start_timestamp, asset, address;
+
+-- Latest balance of each address and asset maintained on insert
+-- Replaces older periods by latest_period_start; a snapshot re-recorded for the same period
+-- is inserted later and therefore wins. Read it with FINAL or LIMIT 1 BY asset, address.
+CREATE TABLE IF NOT EXISTS balance_series_latest (
+    asset String,
+    address String,
+    latest_period_start UInt64,
+    latest_period_end UInt64,
+    latest_block_height UInt32,
+    free_balance Decimal128(18),
+    reserved_balance Decimal128(18),
+    staked_balance Decimal128(18),
+    total_balance Decimal128(18)
+) ENGINE = ReplacingMergeTree(latest_period_start)
+ORDER BY (asset, address)
+SETTINGS index_granularity = 8192
+COMMENT 'Latest balance snapshot of each address and asset';
+
+CREATE MATERIALIZED VIEW IF NOT EXISTS balance_series_latest_mv_internal
+TO balance_series_latest
+AS
+SELECT
+    asset,
+    address,
+    period_start_timestamp as latest_period_start,
+    period_end_timestamp as latest_period_end,
+    block_height as latest_block_height,
+    free_balance,
+    reserved_balance,
+    staked_balance,
+    total_balance
+FROM balance_series;
+
+-- Address-ordered copy of balance_series for per-address history
+-- balance_series is ordered by period first, so an address filter could only skip granules
+-- through the bloom filter index, in every partition. Here the address is a key prefix and
+-- the history of one address is a primary key range read in each partition.
+CREATE TABLE IF NOT EXISTS balance_series_by_address (
+    period_start_timestamp UInt64,
+    period_end_timestamp UInt64,
+    block_height UInt32,
+    address String,
+    asset String,
+    free_balance Decimal128(18),
+    reserved_balance Decimal128(18),
+    staked_balance Decimal128(18),
+    total_balance Decimal128(18),
+    free_balance_change Decimal128(18),
+    reserved_balance_change Decimal128(18),
+    staked_balance_change Decimal128(18),
+    total_balance_change Decimal128(18),
+    total_balance_percent_change Decimal64(6),
+    _version UInt64
+) ENGINE = ReplacingMergeTree(_version)
+PARTITION BY toYYYYMM(fromUnixTimestamp64Milli(period_start_timestamp))
+ORDER BY (asset, address, period_start_timestamp)
+SETTINGS index_granularity = 8192
+COMMENT 'Balance snapshots of balance_series ordered by asset and address';
+
+-- One-off backfill of the address-ordered snapshots (no-op once the table has data).
+-- Runs before the materialized view is created, so no snapshot is copied twice; the schema
+-- is applied by the consumer before it records, stop other writers during the upgrade.
+-- Every version is copied, the table keeps the latest one per snapshot on merge.
+INSERT INTO balance_series_by_address
+SELECT
+    period_start_timestamp,
+    period_end_timestamp,
+    block_height,
+    address,
+    asset,
+    free_balance,
+    reserved_balance,
+    staked_balance,
+    total_balance,
+    free_balance_change,
+    reserved_balance_change,
+    staked_balance_change,
+    total_balance_change,
+    total_balance_percent_change,
+    _version
+FROM balance_series
+WHERE (SELECT count() FROM balance_series_by_address) = 0;
+
+CREATE MATERIALIZED VIEW IF NOT EXISTS balance_series_by_address_mv_internal
+TO balance_series_by_address
+AS
+SELECT
+    period_start_timestamp,
+    period_end_timestamp,
+    block_height,
+    address,
+    asset,
+    free_balance,
+    reserved_balance,
+    staked_balance,
+    total_balance,
+    free_balance_change,
+    reserved_balance_change,
+    staked_balance_change,
+    total_balance_change,
+    total_balance_percent_change,
+    _version
+FROM balance_series;
+
 -- =============================================================================
 -- PUBLIC VIEWS (Exposed to MCP - Clean Querying Interface)
 -- =============================================================================
 
 -- View for latest balance for each address and asset
-CREATE VIEW IF NOT EXISTS balance_series_latest_view AS
+CREATE OR REPLACE VIEW balance_series_latest_view AS
 SELECT
     address,
     asset,
-    argMax(period_start_timestamp, period_start_timestamp) as latest_period_start,
-    argMax(period_end_timestamp, period_start_timestamp) as latest_period_end,
-    argMax(block_height, period_start_timestamp) as latest_block_height,
-    argMax(free_balance, period_start_timestamp) as free_balance,
-    argMax(reserved_balance, period_start_timestamp) as reserved_balance,
-    argMax(staked_balance, period_start_timestamp) as staked_balance,
-    argMax(total_balance, period_start_timestamp) as total_balance
-FROM balance_series
-GROUP BY address, asset;
+    latest_period_start,
+    latest_period_end,
+    latest_block_height,
+    free_balance,
+    reserved_balance,
+    staked_balance,
+    total_balance
+FROM balance_series_latest FINAL;
+
+-- Superseded by the address-bounded derivation of the API; filters on the view could not be pushed
+-- below its window, so every read ran FINAL and a window sort over the whole of balance_series
+DROP VIEW IF EXISTS balance_series_changes_view;
+
+-- View for end-of-bucket balances at the 4h and 1d rollup resolutions
+CREATE VIEW IF NOT EXISTS balance_series_rollup_view AS
+SELECT
+    resolution_hours,
+    bucket_start_timestamp,
+    address,
+    asset,
+    argMaxMerge(period_end_timestamp) as period_end_timestamp,
+    argMaxMerge(block_height) as block_height,
+    argMaxMerge(free_balance) as free_balance,
+    argMaxMerge(reserved_balance) as reserved_balance,
+    argMaxMerge(staked_balance) as staked_balance,
+    argMaxMerge(total_balance) as total_balance
+FROM balance_series_rollup
+GROUP BY resolution_hours, bucket_start_timestamp, address, asset;
 
 -- View for daily aggregation (computed on-the-fly for accuracy)
 CREATE VIEW IF NOT EXISTS balance_series_daily_view AS
@@ -42,56 +42,122 @@ ALTER TABLE balance_transfers ADD INDEX IF NOT EXISTS idx_from_to_asset (from_ad
 
 ALTER TABLE balance_transfers ADD INDEX IF NOT EXISTS idx_version _version TYPE minmax GRANULARITY 4;
 
--- CHUNK 4: Materialized View
-CREATE MATERIALIZED VIEW IF NOT EXISTS balance_transfers_volume_series_mv_internal
-ENGINE = SummingMergeTree((
-    transaction_count,
-    unique_senders,
-    unique_receivers,
-    total_volume,
-    total_fees,
-    unique_address_pairs,
-    active_addresses,
-    hour_0_tx_count,
-    hour_1_tx_count,
-    hour_2_tx_count,
-    hour_3_tx_count,
-    blocks_in_period,
-    tx_count_lt_01,
-    tx_count_01_to_1,
-    tx_count_1_to_10,
-    tx_count_10_to_100,
-    tx_count_100_to_1k,
-    tx_count_1k_to_10k,
-    tx_count_gte_10k,
-    volume_lt_01,
-    volume_01_to_1,
-    volume_1_to_10,
-    volume_10_to_100,
-    volume_100_to_1k,
-    volume_1k_to_10k,
-    volume_gte_10k
-))
+-- CHUNK 4: 4-Hour Aggregate States
+-- Mergeable aggregate states per 4-hour period. Counters and sums use SimpleAggregateFunction,
+-- distinct counts, quantiles and arg-extremes keep their intermediate -State so that
+-- partial inserts and background merges always produce the same result.
+CREATE TABLE IF NOT EXISTS balance_transfers_volume_series_4h_internal (
+    period_start DateTime,
+    asset String,
+    transaction_count SimpleAggregateFunction(sum, UInt64),
+    total_volume SimpleAggregateFunction(sum, Decimal128(18)),
+    total_fees SimpleAggregateFunction(sum, Decimal128(18)),
+    max_transfer_amount SimpleAggregateFunction(max, Decimal128(18)),
+    min_transfer_amount SimpleAggregateFunction(min, Decimal128(18)),
+    max_fee SimpleAggregateFunction(max, Decimal128(18)),
+    min_fee SimpleAggregateFunction(min, Decimal128(18)),
+    unique_senders_state AggregateFunction(uniqExact, String),
+    unique_receivers_state AggregateFunction(uniqExact, String),
+    active_addresses_state AggregateFunction(uniqExactArray, Array(String)),
+    unique_address_pairs_state AggregateFunction(uniq, String, String),
+    median_amount_state AggregateFunction(quantile(0.5), Decimal128(18)),
+    amount_variance_state AggregateFunction(varPop, Float64),
+    earliest_block_height_state AggregateFunction(argMin, UInt32, UInt64),
+    latest_block_height_state AggregateFunction(argMax, UInt32, UInt64),
+    hour_0_tx_count SimpleAggregateFunction(sum, UInt64),
+    hour_1_tx_count SimpleAggregateFunction(sum, UInt64),
+    hour_2_tx_count SimpleAggregateFunction(sum, UInt64),
+    hour_3_tx_count SimpleAggregateFunction(sum, UInt64),
+    tx_count_lt_01 SimpleAggregateFunction(sum, UInt64),
+    tx_count_01_to_1 SimpleAggregateFunction(sum, UInt64),
+    tx_count_1_to_10 SimpleAggregateFunction(sum, UInt64),
+    tx_count_10_to_100 SimpleAggregateFunction(sum, UInt64),
+    tx_count_100_to_1k SimpleAggregateFunction(sum, UInt64),
+    tx_count_1k_to_10k SimpleAggregateFunction(sum, UInt64),
+    tx_count_gte_10k SimpleAggregateFunction(sum, UInt64),
+    volume_lt_01 SimpleAggregateFunction(sum, Decimal128(18)),
+    volume_01_to_1 SimpleAggregateFunction(sum, Decimal128(18)),
+    volume_1_to_10 SimpleAggregateFunction(sum, Decimal128(18)),
+    volume_10_to_100 SimpleAggregateFunction(sum, Decimal128(18)),
+    volume_100_to_1k SimpleAggregateFunction(sum, Decimal128(18)),
+    volume_1k_to_10k SimpleAggregateFunction(sum, Decimal128(18)),
+    volume_gte_10k SimpleAggregateFunction(sum, Decimal128(18))
+) ENGINE = AggregatingMergeTree()
 PARTITION BY toYYYYMM(period_start)
 ORDER BY (period_start, asset)
-SETTINGS index_granularity = 8192
+SETTINGS index_granularity = 8192;
+
+-- One-off backfill of the 4-hour states from existing transfers (no-op once the table has data).
+-- Runs before the materialized view is created, so no transfer is aggregated by both. The schema is
+-- applied by the balance transfers consumer on startup before it inserts; any other writer of
+-- balance_transfers must be stopped while upgrading, or its rows between the backfill and the view
+-- creation are not aggregated.
+INSERT INTO balance_transfers_volume_series_4h_internal
+SELECT
+    toDateTime(intDiv(intDiv(block_timestamp, 1000), 14400) * 14400) as period_start,
+    asset,
+    count() as transaction_count,
+    sum(amount) as total_volume,
+    sum(fee) as total_fees,
+    max(amount) as max_transfer_amount,
+    min(amount) as min_transfer_amount,
+    max(fee) as max_fee,
+    min(fee) as min_fee,
+    uniqExactState(from_address) as unique_senders_state,
+    uniqExactState(to_address) as unique_receivers_state,
+    uniqExactArrayState([from_address, to_address]) as active_addresses_state,
+    uniqState(from_address, to_address) as unique_address_pairs_state,
+    quantileState(0.5)(amount) as median_amount_state,
+    varPopState(toFloat64(amount)) as amount_variance_state,
+    argMinState(block_height, block_timestamp) as earliest_block_height_state,
+    argMaxState(block_height, block_timestamp) as latest_block_height_state,
+    countIf(toHour(toDateTime(intDiv(block_timestamp, 1000))) = toHour(period_start)) as hour_0_tx_count,
+    countIf(toHour(toDateTime(intDiv(block_timestamp, 1000))) = toHour(period_start) + 1) as hour_1_tx_count,
+    countIf(toHour(toDateTime(intDiv(block_timestamp, 1000))) = toHour(period_start) + 2) as hour_2_tx_count,
+    countIf(toHour(toDateTime(intDiv(block_timestamp, 1000))) = toHour(period_start) + 3) as hour_3_tx_count,
+    countIf(amount < 0.1) as tx_count_lt_01,
+    countIf(amount >= 0.1 AND amount < 1) as tx_count_01_to_1,
+    countIf(amount >= 1 AND amount < 10) as tx_count_1_to_10,
+    countIf(amount >= 10 AND amount < 100) as tx_count_10_to_100,
+    countIf(amount >= 100 AND amount < 1000) as tx_count_100_to_1k,
+    countIf(amount >= 1000 AND amount < 10000) as tx_count_1k_to_10k,
+    countIf(amount >= 10000) as tx_count_gte_10k,
+    sumIf(amount, amount < 0.1) as volume_lt_01,
+    sumIf(amount, amount >= 0.1 AND amount < 1) as volume_01_to_1,
+    sumIf(amount, amount >= 1 AND amount < 10) as volume_1_to_10,
+    sumIf(amount, amount >= 10 AND amount < 100) as volume_10_to_100,
+    sumIf(amount, amount >= 100 AND amount < 1000) as volume_100_to_1k,
+    sumIf(amount, amount >= 1000 AND amount < 10000) as volume_1k_to_10k,
+    sumIf(amount, amount >= 10000) as volume_gte_10k
+FROM balance_transfers FINAL
+WHERE (SELECT count() FROM balance_transfers_volume_series_4h_internal) = 0
+GROUP BY period_start, asset;
+
+CREATE MATERIALIZED VIEW IF NOT EXISTS balance_transfers_volume_series_4h_mv
+TO balance_transfers_volume_series_4h_internal
 AS
 SELECT
     toDateTime(intDiv(intDiv(block_timestamp, 1000), 14400) * 14400) as period_start,
-    toDateTime((intDiv(intDiv(block_timestamp, 1000), 14400) + 1) * 14400) as period_end,
     asset,
     count() as transaction_count,
-    uniqExact(from_address) as unique_senders,
-    uniqExact(to_address) as unique_receivers,
     sum(amount) as total_volume,
     sum(fee) as total_fees,
-    uniq(from_address, to_address) as unique_address_pairs,
-    uniqExact(from_address) + uniqExact(to_address) as active_addresses,
-    countIf(toHour(toDateTime(intDiv(block_timestamp, 1000))) = toHour(toDateTime(intDiv(intDiv(block_timestamp, 1000), 14400) * 14400))) as hour_0_tx_count,
-    countIf(toHour(toDateTime(intDiv(block_timestamp, 1000))) = toHour(toDateTime(intDiv(intDiv(block_timestamp, 1000), 14400) * 14400)) + 1) as hour_1_tx_count,
-    countIf(toHour(toDateTime(intDiv(block_timestamp, 1000))) = toHour(toDateTime(intDiv(intDiv(block_timestamp, 1000), 14400) * 14400)) + 2) as hour_2_tx_count,
-    countIf(toHour(toDateTime(intDiv(block_timestamp, 1000))) = toHour(toDateTime(intDiv(intDiv(block_timestamp, 1000), 14400) * 14400)) + 3) as hour_3_tx_count,
-    max(block_height) - min(block_height) + 1 as blocks_in_period,
+    max(amount) as max_transfer_amount,
+    min(amount) as min_transfer_amount,
+    max(fee) as max_fee,
+    min(fee) as min_fee,
+    uniqExactState(from_address) as unique_senders_state,
+    uniqExactState(to_address) as unique_receivers_state,
+    uniqExactArrayState([from_address, to_address]) as active_addresses_state,
+    uniqState(from_address, to_address) as unique_address_pairs_state,
+    quantileState(0.5)(amount) as median_amount_state,
+    varPopState(toFloat64(amount)) as amount_variance_state,
+    argMinState(block_height, block_timestamp) as earliest_block_height_state,
+    argMaxState(block_height, block_timestamp) as latest_block_height_state,
+    countIf(toHour(toDateTime(intDiv(block_timestamp, 1000))) = toHour(period_start)) as hour_0_tx_count,
+    countIf(toHour(toDateTime(intDiv(block_timestamp, 1000))) = toHour(period_start) + 1) as hour_1_tx_count,
+    countIf(toHour(toDateTime(intDiv(block_timestamp, 1000))) = toHour(period_start) + 2) as hour_2_tx_count,
+    countIf(toHour(toDateTime(intDiv(block_timestamp, 1000))) = toHour(period_start) + 3) as hour_3_tx_count,
     countIf(amount < 0.1) as tx_count_lt_01,
     countIf(amount >= 0.1 AND amount < 1) as tx_count_01_to_1,
     countIf(amount >= 1 AND amount < 10) as tx_count_1_to_10,
@@ -105,19 +171,15 @@ SELECT
     sumIf(amount, amount >= 10 AND amount < 100) as volume_10_to_100,
     sumIf(amount, amount >= 100 AND amount < 1000) as volume_100_to_1k,
     sumIf(amount, amount >= 1000 AND amount < 10000) as volume_1k_to_10k,
-    sumIf(amount, amount >= 10000) as volume_gte_10k,
-    argMax(block_height, block_timestamp) as latest_block_height,
-    argMin(block_height, block_timestamp) as earliest_block_height,
-    argMax(amount, block_timestamp) as max_transfer_amount,
-    argMin(amount, block_timestamp) as min_transfer_amount
+    sumIf(amount, amount >= 10000) as volume_gte_10k
 FROM balance_transfers
-GROUP BY period_start, period_end, asset;
+GROUP BY period_start, asset;
 
 -- CHUNK 5: Simple Views
-CREATE VIEW IF NOT EXISTS balance_transfers_volume_series_view AS
+CREATE OR REPLACE VIEW balance_transfers_volume_series_view AS
 SELECT
     period_start,
-    period_end,
+    period_start + INTERVAL 4 HOUR as period_end,
     asset,
     transaction_count,
     unique_senders,
@@ -127,6 +189,7 @@ SELECT
     CASE WHEN transaction_count > 0 THEN total_volume / transaction_count ELSE 0 END as avg_transfer_amount,
     max_transfer_amount,
     min_transfer_amount,
+    median_transfer_amount,
     CASE WHEN transaction_count > 0 THEN total_fees / transaction_count ELSE 0 END as avg_fee,
     unique_address_pairs,
     active_addresses,
@@ -136,9 +199,9 @@ SELECT
     hour_1_tx_count,
     hour_2_tx_count,
     hour_3_tx_count,
-    earliest_block_height as period_start_block,
-    latest_block_height as period_end_block,
-    blocks_in_period,
+    period_start_block,
+    period_end_block,
+    period_end_block - period_start_block + 1 as blocks_in_period,
     tx_count_lt_01,
     tx_count_01_to_1,
     tx_count_1_to_10,
@@ -153,292 +216,585 @@ SELECT
     volume_100_to_1k,
     volume_1k_to_10k,
     volume_gte_10k
-FROM balance_transfers_volume_series_mv_internal
+FROM (
+    SELECT
+        period_start,
+        asset,
+        sum(transaction_count) as transaction_count,
+        uniqExactMerge(unique_senders_state) as unique_senders,
+        uniqExactMerge(unique_receivers_state) as unique_receivers,
+        sum(total_volume) as total_volume,
+        sum(total_fees) as total_fees,
+        max(max_transfer_amount) as max_transfer_amount,
+        min(min_transfer_amount) as min_transfer_amount,
+        quantileMerge(0.5)(median_amount_state) as median_transfer_amount,
+        uniqMerge(unique_address_pairs_state) as unique_address_pairs,
+        uniqExactArrayMerge(active_addresses_state) as active_addresses,
+        sum(hour_0_tx_count) as hour_0_tx_count,
+        sum(hour_1_tx_count) as hour_1_tx_count,
+        sum(hour_2_tx_count) as hour_2_tx_count,
+        sum(hour_3_tx_count) as hour_3_tx_count,
+        argMinMerge(earliest_block_height_state) as period_start_block,
+        argMaxMerge(latest_block_height_state) as period_end_block,
+        sum(tx_count_lt_01) as tx_count_lt_01,
+        sum(tx_count_01_to_1) as tx_count_01_to_1,
+        sum(tx_count_1_to_10) as tx_count_1_to_10,
+        sum(tx_count_10_to_100) as tx_count_10_to_100,
+        sum(tx_count_100_to_1k) as tx_count_100_to_1k,
+        sum(tx_count_1k_to_10k) as tx_count_1k_to_10k,
+        sum(tx_count_gte_10k) as tx_count_gte_10k,
+        sum(volume_lt_01) as volume_lt_01,
+        sum(volume_01_to_1) as volume_01_to_1,
+        sum(volume_1_to_10) as volume_1_to_10,
+        sum(volume_10_to_100) as volume_10_to_100,
+        sum(volume_100_to_1k) as volume_100_to_1k,
+        sum(volume_1k_to_10k) as volume_1k_to_10k,
+        sum(volume_gte_10k) as volume_gte_10k
+    FROM balance_transfers_volume_series_4h_internal
+    GROUP BY period_start, asset
+)
 ORDER BY period_start DESC, asset;
 
 -- CHUNK 6: Network Analytics Views
-CREATE VIEW IF NOT EXISTS balance_transfers_network_daily_view AS
+-- Daily, weekly and monthly rollups merge the 4-hour states instead of scanning balance_transfers
+CREATE OR REPLACE VIEW balance_transfers_network_daily_view AS
 SELECT
     'daily' as period_type,
-    toDate(toDateTime(intDiv(block_timestamp, 1000))) as period,
+    period,
     asset,
-    count() as transaction_count,
-    sum(amount) as total_volume,
-    uniqExact(from_address) as max_unique_senders,
-    uniqExact(to_address) as max_unique_receivers,
-    uniqExact(from_address) + uniqExact(to_address) as unique_addresses,
-    countIf(amount < 0.1) as tx_count_lt_01,
-    countIf(amount >= 0.1 AND amount < 1) as tx_count_01_to_1,
-    countIf(amount >= 1 AND amount < 10) as tx_count_1_to_10,
-    countIf(amount >= 10 AND amount < 100) as tx_count_10_to_100,
-    countIf(amount >= 100 AND amount < 1000) as tx_count_100_to_1k,
-    countIf(amount >= 1000 AND amount < 10000) as tx_count_1k_to_10k,
-    countIf(amount >= 10000) as tx_count_gte_10k,
-    CASE WHEN (uniqExact(from_address) + uniqExact(to_address)) > 1 THEN toFloat64(uniq(from_address, to_address)) / (toFloat64(uniqExact(from_address) + uniqExact(to_address)) * toFloat64(uniqExact(from_address) + uniqExact(to_address) - 1) / 2.0) ELSE 0.0 END as avg_network_density,
-    sum(fee) as total_fees,
-    CASE WHEN count() > 0 THEN sum(amount) / count() ELSE 0 END as avg_transaction_size,
-    max(amount) as max_transaction_size,
-    min(amount) as min_transaction_size,
-    CASE WHEN count() > 0 THEN sum(fee) / count() ELSE 0 END as avg_fee,
-    max(fee) as max_fee,
-    min(fee) as min_fee,
-    median(amount) as median_transaction_size,
-    stddevPop(amount) as avg_amount_std_dev
-FROM balance_transfers
-GROUP BY period, asset
+    transaction_count,
+    total_volume,
+    max_unique_senders,
+    max_unique_receivers,
+    unique_addresses,
+    tx_count_lt_01,
+    tx_count_01_to_1,
+    tx_count_1_to_10,
+    tx_count_10_to_100,
+    tx_count_100_to_1k,
+    tx_count_1k_to_10k,
+    tx_count_gte_10k,
+    CASE WHEN unique_addresses > 1 THEN toFloat64(unique_address_pairs) / (toFloat64(unique_addresses) * toFloat64(unique_addresses - 1) / 2.0) ELSE 0.0 END as avg_network_density,
+    total_fees,
+    CASE WHEN transaction_count > 0 THEN total_volume / transaction_count ELSE 0 END as avg_transaction_size,
+    max_transaction_size,
+    min_transaction_size,
+    CASE WHEN transaction_count > 0 THEN total_fees / transaction_count ELSE 0 END as avg_fee,
+    max_fee,
+    min_fee,
+    median_transaction_size,
+    avg_amount_std_dev
+FROM (
+    SELECT
+        toDate(period_start) as period,
+        asset,
+        sum(transaction_count) as transaction_count,
+        sum(total_volume) as total_volume,
+        uniqExactMerge(unique_senders_state) as max_unique_senders,
+        uniqExactMerge(unique_receivers_state) as max_unique_receivers,
+        uniqExactArrayMerge(active_addresses_state) as unique_addresses,
+        uniqMerge(unique_address_pairs_state) as unique_address_pairs,
+        sum(tx_count_lt_01) as tx_count_lt_01,
+        sum(tx_count_01_to_1) as tx_count_01_to_1,
+        sum(tx_count_1_to_10) as tx_count_1_to_10,
+        sum(tx_count_10_to_100) as tx_count_10_to_100,
+        sum(tx_count_100_to_1k) as tx_count_100_to_1k,
+        sum(tx_count_1k_to_10k) as tx_count_1k_to_10k,
+        sum(tx_count_gte_10k) as tx_count_gte_10k,
+        sum(total_fees) as total_fees,
+        max(max_transfer_amount) as max_transaction_size,
+        min(min_transfer_amount) as min_transaction_size,
+        max(max_fee) as max_fee,
+        min(min_fee) as min_fee,
+        quantileMerge(0.5)(median_amount_state) as median_transaction_size,
+        sqrt(varPopMerge(amount_variance_state)) as avg_amount_std_dev
+    FROM balance_transfers_volume_series_4h_internal
+    GROUP BY period, asset
+)
 ORDER BY period DESC, asset;
 
-CREATE VIEW IF NOT EXISTS balance_transfers_network_weekly_view AS
+CREATE OR REPLACE VIEW balance_transfers_network_weekly_view AS
 SELECT
     'weekly' as period_type,
-    toStartOfWeek(toDateTime(intDiv(block_timestamp, 1000))) as period,
+    period,
     asset,
-    count() as transaction_count,
-    sum(amount) as total_volume,
-    uniqExact(from_address) as max_unique_senders,
-    uniqExact(to_address) as max_unique_receivers,
-    uniqExact(from_address) + uniqExact(to_address) as unique_addresses,
-    countIf(amount < 0.1) as tx_count_lt_01,
-    countIf(amount >= 0.1 AND amount < 1) as tx_count_01_to_1,
-    countIf(amount >= 1 AND amount < 10) as tx_count_1_to_10,
-    countIf(amount >= 10 AND amount < 100) as tx_count_10_to_100,
-    countIf(amount >= 100 AND amount < 1000) as tx_count_100_to_1k,
-    countIf(amount >= 1000 AND amount < 10000) as tx_count_1k_to_10k,
-    countIf(amount >= 10000) as tx_count_gte_10k,
-    CASE WHEN (uniqExact(from_address) + uniqExact(to_address)) > 1 THEN toFloat64(uniq(from_address, to_address)) / (toFloat64(uniqExact(from_address) + uniqExact(to_address)) * toFloat64(uniqExact(from_address) + uniqExact(to_address) - 1) / 2.0) ELSE 0.0 END as avg_network_density,
-    sum(fee) as total_fees,
-    CASE WHEN count() > 0 THEN sum(amount) / count() ELSE 0 END as avg_transaction_size,
-    max(amount) as max_transaction_size,
-    min(amount) as min_transaction_size,
-    CASE WHEN count() > 0 THEN sum(fee) / count() ELSE 0 END as avg_fee,
-    max(fee) as max_fee,
-    min(fee) as min_fee,
-    median(amount) as median_transaction_size,
-    stddevPop(amount) as avg_amount_std_dev
-FROM balance_transfers
-GROUP BY period, asset
+    transaction_count,
+    total_volume,
+    max_unique_senders,
+    max_unique_receivers,
+    unique_addresses,
+    tx_count_lt_01,
+    tx_count_01_to_1,
+    tx_count_1_to_10,
+    tx_count_10_to_100,
+    tx_count_100_to_1k,
+    tx_count_1k_to_10k,
+    tx_count_gte_10k,
+    CASE WHEN unique_addresses > 1 THEN toFloat64(unique_address_pairs) / (toFloat64(unique_addresses) * toFloat64(unique_addresses - 1) / 2.0) ELSE 0.0 END as avg_network_density,
+    total_fees,
+    CASE WHEN transaction_count > 0 THEN total_volume / transaction_count ELSE 0 END as avg_transaction_size,
+    max_transaction_size,
+    min_transaction_size,
+    CASE WHEN transaction_count > 0 THEN total_fees / transaction_count ELSE 0 END as avg_fee,
+    max_fee,
+    min_fee,
+    median_transaction_size,
+    avg_amount_std_dev
+FROM (
+    SELECT
+        toStartOfWeek(period_start) as period,
+        asset,
+        sum(transaction_count) as transaction_count,
+        sum(total_volume) as total_volume,
+        uniqExactMerge(unique_senders_state) as max_unique_senders,
+        uniqExactMerge(unique_receivers_state) as max_unique_receivers,
+        uniqExactArrayMerge(active_addresses_state) as unique_addresses,
+        uniqMerge(unique_address_pairs_state) as unique_address_pairs,
+        sum(tx_count_lt_01) as tx_count_lt_01,
+        sum(tx_count_01_to_1) as tx_count_01_to_1,
+        sum(tx_count_1_to_10) as tx_count_1_to_10,
+        sum(tx_count_10_to_100) as tx_count_10_to_100,
+        sum(tx_count_100_to_1k) as tx_count_100_to_1k,
+        sum(tx_count_1k_to_10k) as tx_count_1k_to_10k,
+        sum(tx_count_gte_10k) as tx_count_gte_10k,
+        sum(total_fees) as total_fees,
+        max(max_transfer_amount) as max_transaction_size,
+        min(min_transfer_amount) as min_transaction_size,
+        max(max_fee) as max_fee,
+        min(min_fee) as min_fee,
+        quantileMerge(0.5)(median_amount_state) as median_transaction_size,
+        sqrt(varPopMerge(amount_variance_state)) as avg_amount_std_dev
+    FROM balance_transfers_volume_series_4h_internal
+    GROUP BY period, asset
+)
 ORDER BY period DESC, asset;
 
-CREATE VIEW IF NOT EXISTS balance_transfers_network_monthly_view AS
+CREATE OR REPLACE VIEW balance_transfers_network_monthly_view AS
 SELECT
     'monthly' as period_type,
-    toStartOfMonth(toDateTime(intDiv(block_timestamp, 1000))) as period,
+    period,
     asset,
-    count() as transaction_count,
-    sum(amount) as total_volume,
-    uniqExact(from_address) as max_unique_senders,
-    uniqExact(to_address) as max_unique_receivers,
-    uniqExact(from_address) + uniqExact(to_address) as unique_addresses,
-    countIf(amount < 0.1) as tx_count_lt_01,
-    countIf(amount >= 0.1 AND amount < 1) as tx_count_01_to_1,
-    countIf(amount >= 1 AND amount < 10) as tx_count_1_to_10,
-    countIf(amount >= 10 AND amount < 100) as tx_count_10_to_100,
-    countIf(amount >= 100 AND amount < 1000) as tx_count_100_to_1k,
-    countIf(amount >= 1000 AND amount < 10000) as tx_count_1k_to_10k,
-    countIf(amount >= 10000) as tx_count_gte_10k,
-    CASE WHEN (uniqExact(from_address) + uniqExact(to_address)) > 1 THEN toFloat64(uniq(from_address, to_address)) / (toFloat64(uniqExact(from_address) + uniqExact(to_address)) * toFloat64(uniqExact(from_address) + uniqExact(to_address) - 1) / 2.0) ELSE 0.0 END as avg_network_density,
-    sum(fee) as total_fees,
-    CASE WHEN count() > 0 THEN sum(amount) / count() ELSE 0 END as avg_transaction_size,
-    max(amount) as max_transaction_size,
-    min(amount) as min_transaction_size,
-    CASE WHEN count() > 0 THEN sum(fee) / count() ELSE 0 END as avg_fee,
-    max(fee) as max_fee,
-    min(fee) as min_fee,
-    median(amount) as median_transaction_size,
-    stddevPop(amount) as avg_amount_std_dev,
-    min(block_height) as period_start_block,
-    max(block_height) as period_end_block,
-    max(block_height) - min(block_height) + 1 as blocks_in_period
-FROM balance_transfers
-GROUP BY period, asset
+    transaction_count,
+    total_volume,
+    max_unique_senders,
+    max_unique_receivers,
+    unique_addresses,
+    tx_count_lt_01,
+    tx_count_01_to_1,
+    tx_count_1_to_10,
+    tx_count_10_to_100,
+    tx_count_100_to_1k,
+    tx_count_1k_to_10k,
+    tx_count_gte_10k,
+    CASE WHEN unique_addresses > 1 THEN toFloat64(unique_address_pairs) / (toFloat64(unique_addresses) * toFloat64(unique_addresses - 1) / 2.0) ELSE 0.0 END as avg_network_density,
+    total_fees,
+    CASE WHEN transaction_count > 0 THEN total_volume / transaction_count ELSE 0 END as avg_transaction_size,
+    max_transaction_size,
+    min_transaction_size,
+    CASE WHEN transaction_count > 0 THEN total_fees / transaction_count ELSE 0 END as avg_fee,
+    max_fee,
+    min_fee,
+    median_transaction_size,
+    avg_amount_std_dev,
+    period_start_block,
+    period_end_block,
+    period_end_block - period_start_block + 1 as blocks_in_period
+FROM (
+    SELECT
+        toStartOfMonth(period_start) as period,
+        asset,
+        sum(transaction_count) as transaction_count,
+        sum(total_volume) as total_volume,
+        uniqExactMerge(unique_senders_state) as max_unique_senders,
+        uniqExactMerge(unique_receivers_state) as max_unique_receivers,
+        uniqExactArrayMerge(active_addresses_state) as unique_addresses,
+        uniqMerge(unique_address_pairs_state) as unique_address_pairs,
+        sum(tx_count_lt_01) as tx_count_lt_01,
+        sum(tx_count_01_to_1) as tx_count_01_to_1,
+        sum(tx_count_1_to_10) as tx_count_1_to_10,
+        sum(tx_count_10_to_100) as tx_count_10_to_100,
+        sum(tx_count_100_to_1k) as tx_count_100_to_1k,
+        sum(tx_count_1k_to_10k) as tx_count_1k_to_10k,
+        sum(tx_count_gte_10k) as tx_count_gte_10k,
+        sum(total_fees) as total_fees,
+        max(max_transfer_amount) as max_transaction_size,
+        min(min_transfer_amount) as min_transaction_size,
+        max(max_fee) as max_fee,
+        min(min_fee) as min_fee,
+        quantileMerge(0.5)(median_amount_state) as median_transaction_size,
+        sqrt(varPopMerge(amount_variance_state)) as avg_amount_std_dev,
+        argMinMerge(earliest_block_height_state) as period_start_block,
+        argMaxMerge(latest_block_height_state) as period_end_block
+    FROM balance_transfers_volume_series_4h_internal
+    GROUP BY period, asset
+)
 ORDER BY period DESC, asset;
 
 -- CHUNK 7: Volume Views
-CREATE VIEW IF NOT EXISTS balance_transfers_volume_daily_view AS
+CREATE OR REPLACE VIEW balance_transfers_volume_daily_view AS
 SELECT
-    toDate(toDateTime(intDiv(block_timestamp, 1000))) as date,
+    date,
     asset,
-    count() as daily_transaction_count,
-    uniqExact(from_address) as max_unique_senders,
-    uniqExact(to_address) as max_unique_receivers,
-    sum(amount) as daily_total_volume,
-    sum(fee) as daily_total_fees,
-    CASE WHEN count() > 0 THEN sum(amount) / count() ELSE 0 END as daily_avg_transfer_amount,
-    max(amount) as daily_max_transfer_amount,
-    min(amount) as daily_min_transfer_amount,
-    uniqExact(from_address) + uniqExact(to_address) as max_daily_active_addresses,
-    CASE WHEN (uniqExact(from_address) + uniqExact(to_address)) > 1 THEN toFloat64(uniq(from_address, to_address)) / (toFloat64(uniqExact(from_address) + uniqExact(to_address)) * toFloat64(uniqExact(from_address) + uniqExact(to_address) - 1) / 2.0) ELSE 0.0 END as avg_daily_network_density,
-    stddevPop(amount) as avg_daily_amount_std_dev,
-    median(amount) as avg_daily_median_amount,
-    countIf(amount < 0.1) as daily_tx_count_lt_01,
-    countIf(amount >= 0.1 AND amount < 1) as daily_tx_count_01_to_1,
-    countIf(amount >= 1 AND amount < 10) as daily_tx_count_1_to_10,
-    countIf(amount >= 10 AND amount < 100) as daily_tx_count_10_to_100,
-    countIf(amount >= 100 AND amount < 1000) as daily_tx_count_100_to_1k,
-    countIf(amount >= 1000 AND amount < 10000) as daily_tx_count_1k_to_10k,
-    countIf(amount >= 10000) as daily_tx_count_gte_10k,
-    sumIf(amount, amount < 0.1) as daily_volume_lt_01,
-    sumIf(amount, amount >= 0.1 AND amount < 1) as daily_volume_01_to_1,
-    sumIf(amount, amount >= 1 AND amount < 10) as daily_volume_1_to_10,
-    sumIf(amount, amount >= 10 AND amount < 100) as daily_volume_10_to_100,
-    sumIf(amount, amount >= 100 AND amount < 1000) as daily_volume_100_to_1k,
-    sumIf(amount, amount >= 1000 AND amount < 10000) as daily_volume_1k_to_10k,
-    sumIf(amount, amount >= 10000) as daily_volume_gte_10k,
-    min(block_height) as daily_start_block,
-    max(block_height) as daily_end_block
-FROM balance_transfers
-GROUP BY date, asset
+    daily_transaction_count,
+    max_unique_senders,
+    max_unique_receivers,
+    daily_total_volume,
+    daily_total_fees,
+    CASE WHEN daily_transaction_count > 0 THEN daily_total_volume / daily_transaction_count ELSE 0 END as daily_avg_transfer_amount,
+    daily_max_transfer_amount,
+    daily_min_transfer_amount,
+    max_daily_active_addresses,
+    CASE WHEN max_daily_active_addresses > 1 THEN toFloat64(daily_unique_address_pairs) / (toFloat64(max_daily_active_addresses) * toFloat64(max_daily_active_addresses - 1) / 2.0) ELSE 0.0 END as avg_daily_network_density,
+    avg_daily_amount_std_dev,
+    avg_daily_median_amount,
+    daily_tx_count_lt_01,
+    daily_tx_count_01_to_1,
+    daily_tx_count_1_to_10,
+    daily_tx_count_10_to_100,
+    daily_tx_count_100_to_1k,
+    daily_tx_count_1k_to_10k,
+    daily_tx_count_gte_10k,
+    daily_volume_lt_01,
+    daily_volume_01_to_1,
+    daily_volume_1_to_10,
+    daily_volume_10_to_100,
+    daily_volume_100_to_1k,
+    daily_volume_1k_to_10k,
+    daily_volume_gte_10k,
+    daily_start_block,
+    daily_end_block
+FROM (
+    SELECT
+        toDate(period_start) as date,
+        asset,
+        sum(transaction_count) as daily_transaction_count,
+        uniqExactMerge(unique_senders_state) as max_unique_senders,
+        uniqExactMerge(unique_receivers_state) as max_unique_receivers,
+        sum(total_volume) as daily_total_volume,
+        sum(total_fees) as daily_total_fees,
+        max(max_transfer_amount) as daily_max_transfer_amount,
+        min(min_transfer_amount) as daily_min_transfer_amount,
+        uniqExactArrayMerge(active_addresses_state) as max_daily_active_addresses,
+        uniqMerge(unique_address_pairs_state) as daily_unique_address_pairs,
+        sqrt(varPopMerge(amount_variance_state)) as avg_daily_amount_std_dev,
+        quantileMerge(0.5)(median_amount_state) as avg_daily_median_amount,
+        sum(tx_count_lt_01) as daily_tx_count_lt_01,
+        sum(tx_count_01_to_1) as daily_tx_count_01_to_1,
+        sum(tx_count_1_to_10) as daily_tx_count_1_to_10,
+        sum(tx_count_10_to_100) as daily_tx_count_10_to_100,
+        sum(tx_count_100_to_1k) as daily_tx_count_100_to_1k,
+        sum(tx_count_1k_to_10k) as daily_tx_count_1k_to_10k,
+        sum(tx_count_gte_10k) as daily_tx_count_gte_10k,
+        sum(volume_lt_01) as daily_volume_lt_01,
+        sum(volume_01_to_1) as daily_volume_01_to_1,
+        sum(volume_1_to_10) as daily_volume_1_to_10,
+        sum(volume_10_to_100) as daily_volume_10_to_100,
+        sum(volume_100_to_1k) as daily_volume_100_to_1k,
+        sum(volume_1k_to_10k) as daily_volume_1k_to_10k,
+        sum(volume_gte_10k) as daily_volume_gte_10k,
+        argMinMerge(earliest_block_height_state) as daily_start_block,
+        argMaxMerge(latest_block_height_state) as daily_end_block
+    FROM balance_transfers_volume_series_4h_internal
+    GROUP BY date, asset
+)
 ORDER BY date DESC, asset;
 
-CREATE VIEW IF NOT EXISTS balance_transfers_volume_weekly_view AS
+CREATE OR REPLACE VIEW balance_transfers_volume_weekly_view AS
 SELECT
-    toStartOfWeek(toDateTime(intDiv(block_timestamp, 1000))) as week_start,
+    week_start,
     asset,
-    count() as weekly_transaction_count,
-    uniqExact(from_address) as max_unique_senders,
-    uniqExact(to_address) as max_unique_receivers,
-    sum(amount) as weekly_total_volume,
-    sum(fee) as weekly_total_fees,
-    CASE WHEN count() > 0 THEN sum(amount) / count() ELSE 0 END as weekly_avg_transfer_amount,
-    max(amount) as weekly_max_transfer_amount,
-    uniqExact(from_address) + uniqExact(to_address) as max_weekly_active_addresses,
-    countIf(amount < 0.1) as weekly_tx_count_lt_01,
-    countIf(amount >= 0.1 AND amount < 1) as weekly_tx_count_01_to_1,
-    countIf(amount >= 1 AND amount < 10) as weekly_tx_count_1_to_10,
-    countIf(amount >= 10 AND amount < 100) as weekly_tx_count_10_to_100,
-    countIf(amount >= 100 AND amount < 1000) as weekly_tx_count_100_to_1k,
-    countIf(amount >= 1000 AND amount < 10000) as weekly_tx_count_1k_to_10k,
-    countIf(amount >= 10000) as weekly_tx_count_gte_10k,
-    sumIf(amount, amount < 0.1) as weekly_volume_lt_01,
-    sumIf(amount, amount >= 0.1 AND amount < 1) as weekly_volume_01_to_1,
-    sumIf(amount, amount >= 1 AND amount < 10) as weekly_volume_1_to_10,
-    sumIf(amount, amount >= 10 AND amount < 100) as weekly_volume_10_to_100,
-    sumIf(amount, amount >= 100 AND amount < 1000) as weekly_volume_100_to_1k,
-    sumIf(amount, amount >= 1000 AND amount < 10000) as weekly_volume_1k_to_10k,
-    sumIf(amount, amount >= 10000) as weekly_volume_gte_10k,
-    min(block_height) as weekly_start_block,
-    max(block_height) as weekly_end_block
-FROM balance_transfers
-GROUP BY week_start, asset
+    weekly_transaction_count,
+    max_unique_senders,
+    max_unique_receivers,
+    weekly_total_volume,
+    weekly_total_fees,
+    CASE WHEN weekly_transaction_count > 0 THEN weekly_total_volume / weekly_transaction_count ELSE 0 END as weekly_avg_transfer_amount,
+    weekly_max_transfer_amount,
+    max_weekly_active_addresses,
+    weekly_tx_count_lt_01,
+    weekly_tx_count_01_to_1,
+    weekly_tx_count_1_to_10,
+    weekly_tx_count_10_to_100,
+    weekly_tx_count_100_to_1k,
+    weekly_tx_count_1k_to_10k,
+    weekly_tx_count_gte_10k,
+    weekly_volume_lt_01,
+    weekly_volume_01_to_1,
+    weekly_volume_1_to_10,
+    weekly_volume_10_to_100,
+    weekly_volume_100_to_1k,
+    weekly_volume_1k_to_10k,
+    weekly_volume_gte_10k,
+    weekly_start_block,
+    weekly_end_block
+FROM (
+    SELECT
+        toStartOfWeek(period_start) as week_start,
+        asset,
+        sum(transaction_count) as weekly_transaction_count,
+        uniqExactMerge(unique_senders_state) as max_unique_senders,
+        uniqExactMerge(unique_receivers_state) as max_unique_receivers,
+        sum(total_volume) as weekly_total_volume,
+        sum(total_fees) as weekly_total_fees,
+        max(max_transfer_amount) as weekly_max_transfer_amount,
+        uniqExactArrayMerge(active_addresses_state) as max_weekly_active_addresses,
+        sum(tx_count_lt_01) as weekly_tx_count_lt_01,
+        sum(tx_count_01_to_1) as weekly_tx_count_01_to_1,
+        sum(tx_count_1_to_10) as weekly_tx_count_1_to_10,
+        sum(tx_count_10_to_100) as weekly_tx_count_10_to_100,
+        sum(tx_count_100_to_1k) as weekly_tx_count_100_to_1k,
+        sum(tx_count_1k_to_10k) as weekly_tx_count_1k_to_10k,
+        sum(tx_count_gte_10k) as weekly_tx_count_gte_10k,
+        sum(volume_lt_01) as weekly_volume_lt_01,
+        sum(volume_01_to_1) as weekly_volume_01_to_1,
+        sum(volume_1_to_10) as weekly_volume_1_to_10,
+        sum(volume_10_to_100) as weekly_volume_10_to_100,
+        sum(volume_100_to_1k) as weekly_volume_100_to_1k,
+        sum(volume_1k_to_10k) as weekly_volume_1k_to_10k,
+        sum(volume_gte_10k) as weekly_volume_gte_10k,
+        argMinMerge(earliest_block_height_state) as weekly_start_block,
+        argMaxMerge(latest_block_height_state) as weekly_end_block
+    FROM balance_transfers_volume_series_4h_internal
+    GROUP BY week_start, asset
+)
 ORDER BY week_start DESC, asset;
 
-CREATE VIEW IF NOT EXISTS balance_transfers_volume_monthly_view AS
+CREATE OR REPLACE VIEW balance_transfers_volume_monthly_view AS
 SELECT
-    toStartOfMonth(toDateTime(intDiv(block_timestamp, 1000))) as month_start,
+    month_start,
     asset,
-    count() as monthly_transaction_count,
-    uniqExact(from_address) as max_unique_senders,
-    uniqExact(to_address) as max_unique_receivers,
-    sum(amount) as monthly_total_volume,
-    sum(fee) as monthly_total_fees,
-    CASE WHEN count() > 0 THEN sum(amount) / count() ELSE 0 END as monthly_avg_transfer_amount,
-    max(amount) as monthly_max_transfer_amount,
-    uniqExact(from_address) + uniqExact(to_address) as max_monthly_active_addresses,
-    countIf(amount < 0.1) as monthly_tx_count_lt_01,
-    countIf(amount >= 0.1 AND amount < 1) as monthly_tx_count_01_to_1,
-    countIf(amount >= 1 AND amount < 10) as monthly_tx_count_1_to_10,
-    countIf(amount >= 10 AND amount < 100) as monthly_tx_count_10_to_100,
-    countIf(amount >= 100 AND amount < 1000) as monthly_tx_count_100_to_1k,
-    countIf(amount >= 1000 AND amount < 10000) as monthly_tx_count_1k_to_10k,
-    countIf(amount >= 10000) as monthly_tx_count_gte_10k,
-    sumIf(amount, amount < 0.1) as monthly_volume_lt_01,
-    sumIf(amount, amount >= 0.1 AND amount < 1) as monthly_volume_01_to_1,
-    sumIf(amount, amount >= 1 AND amount < 10) as monthly_volume_1_to_10,
-    sumIf(amount, amount >= 10 AND amount < 100) as monthly_volume_10_to_100,
-    sumIf(amount, amount >= 100 AND amount < 1000) as monthly_volume_100_to_1k,
-    sumIf(amount, amount >= 1000 AND amount < 10000) as monthly_volume_1k_to_10k,
-    sumIf(amount, amount >= 10000) as monthly_volume_gte_10k,
-    min(block_height) as monthly_start_block,
-    max(block_height) as monthly_end_block
-FROM balance_transfers
-GROUP BY month_start, asset
-ORDER BY month_start DESC, asset;
-
--- CHUNK 8: Address Analytics View
-CREATE VIEW IF NOT EXISTS balance_transfers_address_analytics_view AS
-WITH outgoing_metrics AS (
+    monthly_transaction_count,
+    max_unique_senders,
+    max_unique_receivers,
+    monthly_total_volume,
+    monthly_total_fees,
+    CASE WHEN monthly_transaction_count > 0 THEN monthly_total_volume / monthly_transaction_count ELSE 0 END as monthly_avg_transfer_amount,
+    monthly_max_transfer_amount,
+    max_monthly_active_addresses,
+    monthly_tx_count_lt_01,
+    monthly_tx_count_01_to_1,
+    monthly_tx_count_1_to_10,
+    monthly_tx_count_10_to_100,
+    monthly_tx_count_100_to_1k,
+    monthly_tx_count_1k_to_10k,
+    monthly_tx_count_gte_10k,
+    monthly_volume_lt_01,
+    monthly_volume_01_to_1,
+    monthly_volume_1_to_10,
+    monthly_volume_10_to_100,
+    monthly_volume_100_to_1k,
+    monthly_volume_1k_to_10k,
+    monthly_volume_gte_10k,
+    monthly_start_block,
+    monthly_end_block
+FROM (
     SELECT
-        from_address as address,
+        toStartOfMonth(period_start) as month_start,
         asset,
-        count() as outgoing_count,
-        sum(amount) as total_sent,
-        sum(fee) as total_fees_paid,
-        uniq(to_address) as unique_recipients,
-        min(block_timestamp) as first_activity,
-        max(block_timestamp) as last_activity,
-        uniq(toDate(toDateTime(intDiv(block_timestamp, 1000)))) as active_days,
-        countIf(toHour(toDateTime(intDiv(block_timestamp, 1000))) BETWEEN 0 AND 5) as night_transactions,
-        countIf(toHour(toDateTime(intDiv(block_timestamp, 1000))) BETWEEN 6 AND 11) as morning_transactions,
-        countIf(toHour(toDateTime(intDiv(block_timestamp, 1000))) BETWEEN 12 AND 17) as afternoon_transactions,
-        countIf(toHour(toDateTime(intDiv(block_timestamp, 1000))) BETWEEN 18 AND 23) as evening_transactions,
-        countIf(amount < 0.1) as tx_count_lt_01,
-        countIf(amount >= 0.1 AND amount < 1) as tx_count_01_to_1,
-        countIf(amount >= 1 AND amount < 10) as tx_count_1_to_10,
-        countIf(amount >= 10 AND amount < 100) as tx_count_10_to_100,
-        countIf(amount >= 100 AND amount < 1000) as tx_count_100_to_1k,
-        countIf(amount >= 1000 AND amount < 10000) as tx_count_1k_to_10k,
-        countIf(amount >= 10000) as tx_count_gte_10k,
-        varPop(amount) as sent_amount_variance
-    FROM balance_transfers
-    GROUP BY from_address, asset
-),
-incoming_metrics AS (
-    SELECT
-        to_address as address,
-        asset,
-        count() as incoming_count,
-        sum(amount) as total_received,
-        uniq(from_address) as unique_senders,
-        varPop(amount) as received_amount_variance
-    FROM balance_transfers
-    GROUP BY to_address, asset
+        sum(transaction_count) as monthly_transaction_count,
+        uniqExactMerge(unique_senders_state) as max_unique_senders,
+        uniqExactMerge(unique_receivers_state) as max_unique_receivers,
+        sum(total_volume) as monthly_total_volume,
+        sum(total_fees) as monthly_total_fees,
+        max(max_transfer_amount) as monthly_max_transfer_amount,
+        uniqExactArrayMerge(active_addresses_state) as max_monthly_active_addresses,
+        sum(tx_count_lt_01) as monthly_tx_count_lt_01,
+        sum(tx_count_01_to_1) as monthly_tx_count_01_to_1,
+        sum(tx_count_1_to_10) as monthly_tx_count_1_to_10,
+        sum(tx_count_10_to_100) as monthly_tx_count_10_to_100,
+        sum(tx_count_100_to_1k) as monthly_tx_count_100_to_1k,
+        sum(tx_count_1k_to_10k) as monthly_tx_count_1k_to_10k,
+        sum(tx_count_gte_10k) as monthly_tx_count_gte_10k,
+        sum(volume_lt_01) as monthly_volume_lt_01,
+        sum(volume_01_to_1) as monthly_volume_01_to_1,
+        sum(volume_1_to_10) as monthly_volume_1_to_10,
+        sum(volume_10_to_100) as monthly_volume_10_to_100,
+        sum(volume_100_to_1k) as monthly_volume_100_to_1k,
+        sum(volume_1k_to_10k) as monthly_volume_1k_to_10k,
+        sum(volume_gte_10k) as monthly_volume_gte_10k,
+        argMinMerge(earliest_block_height_state) as monthly_start_block,
+        argMaxMerge(latest_block_height_state) as monthly_end_block
+    FROM balance_transfers_volume_series_4h_internal
+    GROUP BY month_start, asset
 )
+ORDER BY month_start DESC, asset;
+
+-- CHUNK 8: Address Analytics View
+-- Per-address daily aggregate states ordered by (asset, address, date). Each transfer is unrolled
+-- into an outgoing row for the sender and an incoming row for the receiver.
+CREATE TABLE IF NOT EXISTS balance_transfers_address_daily_agg_internal (
+    date Date,
+    asset String,
+    address String,
+    volume_in SimpleAggregateFunction(sum, Decimal128(18)),
+    volume_out SimpleAggregateFunction(sum, Decimal128(18)),
+    fees_paid SimpleAggregateFunction(sum, Decimal128(18)),
+    transaction_count_in SimpleAggregateFunction(sum, UInt64),
+    transaction_count_out SimpleAggregateFunction(sum, UInt64),
+    unique_senders_state AggregateFunction(uniq, String),
+    unique_recipients_state AggregateFunction(uniq, String),
+    first_activity SimpleAggregateFunction(min, UInt64),
+    last_activity SimpleAggregateFunction(max, UInt64),
+    night_transactions SimpleAggregateFunction(sum, UInt64),
+    morning_transactions SimpleAggregateFunction(sum, UInt64),
+    afternoon_transactions SimpleAggregateFunction(sum, UInt64),
+    evening_transactions SimpleAggregateFunction(sum, UInt64),
+    tx_count_lt_01 SimpleAggregateFunction(sum, UInt64),
+    tx_count_01_to_1 SimpleAggregateFunction(sum, UInt64),
+    tx_count_1_to_10 SimpleAggregateFunction(sum, UInt64),
+    tx_count_10_to_100 SimpleAggregateFunction(sum, UInt64),
+    tx_count_100_to_1k SimpleAggregateFunction(sum, UInt64),
+    tx_count_1k_to_10k SimpleAggregateFunction(sum, UInt64),
+    tx_count_gte_10k SimpleAggregateFunction(sum, UInt64),
+    sent_amount_variance_state AggregateFunction(varPop, Float64),
+    received_amount_variance_state AggregateFunction(varPop, Float64)
+) ENGINE = AggregatingMergeTree()
+PARTITION BY toYYYYMM(date)
+ORDER BY (asset, address, date)
+SETTINGS index_granularity = 8192;
+
+-- One-off backfill of the per-address daily states from existing transfers (no-op once the table has data).
+-- Runs before the materialized view is created, see the 4-hour backfill above.
+INSERT INTO balance_transfers_address_daily_agg_internal
+SELECT
+    toDate(toDateTime(intDiv(block_timestamp, 1000))) as date,
+    asset,
+    side.1 as address,
+    sumIf(amount, side.3 = 0) as volume_in,
+    sumIf(amount, side.3 = 1) as volume_out,
+    sumIf(fee, side.3 = 1) as fees_paid,
+    countIf(side.3 = 0) as transaction_count_in,
+    countIf(side.3 = 1) as transaction_count_out,
+    uniqStateIf(side.2, side.3 = 0) as unique_senders_state,
+    uniqStateIf(side.2, side.3 = 1) as unique_recipients_state,
+    min(block_timestamp) as first_activity,
+    max(block_timestamp) as last_activity,
+    countIf(side.3 = 1 AND toHour(toDateTime(intDiv(block_timestamp, 1000))) BETWEEN 0 AND 5) as night_transactions,
+    countIf(side.3 = 1 AND toHour(toDateTime(intDiv(block_timestamp, 1000))) BETWEEN 6 AND 11) as morning_transactions,
+    countIf(side.3 = 1 AND toHour(toDateTime(intDiv(block_timestamp, 1000))) BETWEEN 12 AND 17) as afternoon_transactions,
+    countIf(side.3 = 1 AND toHour(toDateTime(intDiv(block_timestamp, 1000))) BETWEEN 18 AND 23) as evening_transactions,
+    countIf(side.3 = 1 AND amount < 0.1) as tx_count_lt_01,
+    countIf(side.3 = 1 AND amount >= 0.1 AND amount < 1) as tx_count_01_to_1,
+    countIf(side.3 = 1 AND amount >= 1 AND amount < 10) as tx_count_1_to_10,
+    countIf(side.3 = 1 AND amount >= 10 AND amount < 100) as tx_count_10_to_100,
+    countIf(side.3 = 1 AND amount >= 100 AND amount < 1000) as tx_count_100_to_1k,
+    countIf(side.3 = 1 AND amount >= 1000 AND amount < 10000) as tx_count_1k_to_10k,
+    countIf(side.3 = 1 AND amount >= 10000) as tx_count_gte_10k,
+    varPopStateIf(toFloat64(amount), side.3 = 1) as sent_amount_variance_state,
+    varPopStateIf(toFloat64(amount), side.3 = 0) as received_amount_variance_state
+FROM balance_transfers FINAL
+ARRAY JOIN [(from_address, to_address, toUInt8(1)), (to_address, from_address, toUInt8(0))] AS side
+WHERE (SELECT count() FROM balance_transfers_address_daily_agg_internal) = 0
+GROUP BY date, asset, address;
+
+CREATE MATERIALIZED VIEW IF NOT EXISTS balance_transfers_address_daily_agg_mv
+TO balance_transfers_address_daily_agg_internal
+AS
 SELECT
-    COALESCE(out.address, inc.address) as address,
-    COALESCE(out.asset, inc.asset) as asset,
-    COALESCE(out.outgoing_count, 0) + COALESCE(inc.incoming_count, 0) as total_transactions,
-    COALESCE(out.outgoing_count, 0) as outgoing_count,
-    COALESCE(inc.incoming_count, 0) as incoming_count,
-    COALESCE(out.total_sent, 0) as total_sent,
-    COALESCE(inc.total_received, 0) as total_received,
-    COALESCE(out.total_sent, 0) + COALESCE(inc.total_received, 0) as total_volume,
-    COALESCE(out.unique_recipients, 0) as unique_recipients,
-    COALESCE(inc.unique_senders, 0) as unique_senders,
-    COALESCE(out.first_activity, 0) as first_activity,
-    COALESCE(out.last_activity, 0) as last_activity,
-    COALESCE(out.last_activity, 0) - COALESCE(out.first_activity, 0) as activity_span_seconds,
-    COALESCE(out.total_fees_paid, 0) as total_fees_paid,
-    CASE WHEN out.outgoing_count > 0 THEN out.total_fees_paid / out.outgoing_count ELSE 0 END as avg_fee_paid,
-    COALESCE(out.night_transactions, 0) as night_transactions,
-    COALESCE(out.morning_transactions, 0) as morning_transactions,
-    COALESCE(out.afternoon_transactions, 0) as afternoon_transactions,
-    COALESCE(out.evening_transactions, 0) as evening_transactions,
-    COALESCE(out.tx_count_lt_01, 0) as tx_count_lt_01,
-    COALESCE(out.tx_count_01_to_1, 0) as tx_count_01_to_1,
-    COALESCE(out.tx_count_1_to_10, 0) as tx_count_1_to_10,
-    COALESCE(out.tx_count_10_to_100, 0) as tx_count_10_to_100,
-    COALESCE(out.tx_count_100_to_1k, 0) as tx_count_100_to_1k,
-    COALESCE(out.tx_count_1k_to_10k, 0) as tx_count_1k_to_10k,
-    COALESCE(out.tx_count_gte_10k, 0) as tx_count_gte_10k,
-    COALESCE(out.sent_amount_variance, 0) as sent_amount_variance,
-    COALESCE(inc.received_amount_variance, 0) as received_amount_variance,
-    COALESCE(out.active_days, 0) as active_days,
+    toDate(toDateTime(intDiv(block_timestamp, 1000))) as date,
+    asset,
+    side.1 as address,
+    sumIf(amount, side.3 = 0) as volume_in,
+    sumIf(amount, side.3 = 1) as volume_out,
+    sumIf(fee, side.3 = 1) as fees_paid,
+    countIf(side.3 = 0) as transaction_count_in,
+    countIf(side.3 = 1) as transaction_count_out,
+    uniqStateIf(side.2, side.3 = 0) as unique_senders_state,
+    uniqStateIf(side.2, side.3 = 1) as unique_recipients_state,
+    min(block_timestamp) as first_activity,
+    max(block_timestamp) as last_activity,
+    countIf(side.3 = 1 AND toHour(toDateTime(intDiv(block_timestamp, 1000))) BETWEEN 0 AND 5) as night_transactions,
+    countIf(side.3 = 1 AND toHour(toDateTime(intDiv(block_timestamp, 1000))) BETWEEN 6 AND 11) as morning_transactions,
+    countIf(side.3 = 1 AND toHour(toDateTime(intDiv(block_timestamp, 1000))) BETWEEN 12 AND 17) as afternoon_transactions,
+    countIf(side.3 = 1 AND toHour(toDateTime(intDiv(block_timestamp, 1000))) BETWEEN 18 AND 23) as evening_transactions,
+    countIf(side.3 = 1 AND amount < 0.1) as tx_count_lt_01,
+    countIf(side.3 = 1 AND amount >= 0.1 AND amount < 1) as tx_count_01_to_1,
+    countIf(side.3 = 1 AND amount >= 1 AND amount < 10) as tx_count_1_to_10,
+    countIf(side.3 = 1 AND amount >= 10 AND amount < 100) as tx_count_10_to_100,
+    countIf(side.3 = 1 AND amount >= 100 AND amount < 1000) as tx_count_100_to_1k,
+    countIf(side.3 = 1 AND amount >= 1000 AND amount < 10000) as tx_count_1k_to_10k,
+    countIf(side.3 = 1 AND amount >= 10000) as tx_count_gte_10k,
+    varPopStateIf(toFloat64(amount), side.3 = 1) as sent_amount_variance_state,
+    varPopStateIf(toFloat64(amount), side.3 = 0) as received_amount_variance_state
+FROM balance_transfers
+ARRAY JOIN [(from_address, to_address, toUInt8(1)), (to_address, from_address, toUInt8(0))] AS side
+GROUP BY date, asset, address;
+
+CREATE OR REPLACE VIEW balance_transfers_address_analytics_view AS
+SELECT
+    address,
+    asset,
+    outgoing_count + incoming_count as total_transactions,
+    outgoing_count,
+    incoming_count,
+    total_sent,
+    total_received,
+    total_sent + total_received as total_volume,
+    unique_recipients,
+    unique_senders,
+    first_activity,
+    last_activity,
+    last_activity - first_activity as activity_span_seconds,
+    total_fees_paid,
+    CASE WHEN outgoing_count > 0 THEN total_fees_paid / outgoing_count ELSE 0 END as avg_fee_paid,
+    night_transactions,
+    morning_transactions,
+    afternoon_transactions,
+    evening_transactions,
+    tx_count_lt_01,
+    tx_count_01_to_1,
+    tx_count_1_to_10,
+    tx_count_10_to_100,
+    tx_count_100_to_1k,
+    tx_count_1k_to_10k,
+    tx_count_gte_10k,
+    sent_amount_variance,
+    received_amount_variance,
+    active_days,
     CASE
-        WHEN COALESCE(out.total_sent, 0) + COALESCE(inc.total_received, 0) >= 100000 AND COALESCE(out.unique_recipients, 0) >= 100 THEN 'Exchange'
-        WHEN COALESCE(out.total_sent, 0) + COALESCE(inc.total_received, 0) >= 100000 AND COALESCE(out.unique_recipients, 0) < 10 THEN 'Whale'
-        WHEN COALESCE(out.total_sent, 0) + COALESCE(inc.total_received, 0) >= 10000 AND COALESCE(out.outgoing_count, 0) + COALESCE(inc.incoming_count, 0) >= 1000 THEN 'High Volume Trader'
-        WHEN COALESCE(out.unique_recipients, 0) >= 50 AND COALESCE(inc.unique_senders, 0) >= 50 THEN 'Hub Address'
-        WHEN COALESCE(out.outgoing_count, 0) + COALESCE(inc.incoming_count, 0) >= 100 AND COALESCE(out.total_sent, 0) + COALESCE(inc.total_received, 0) < 1000 THEN 'Retail Active'
-        WHEN COALESCE(out.outgoing_count, 0) + COALESCE(inc.incoming_count, 0) < 10 AND COALESCE(out.total_sent, 0) + COALESCE(inc.total_received, 0) >= 10000 THEN 'Whale Inactive'
-        WHEN COALESCE(out.outgoing_count, 0) + COALESCE(inc.incoming_count, 0) < 10 AND COALESCE(out.total_sent, 0) + COALESCE(inc.total_received, 0) < 100 THEN 'Retail Inactive'
+        WHEN total_sent + total_received >= 100000 AND unique_recipients >= 100 THEN 'Exchange'
+        WHEN total_sent + total_received >= 100000 AND unique_recipients < 10 THEN 'Whale'
+        WHEN total_sent + total_received >= 10000 AND outgoing_count + incoming_count >= 1000 THEN 'High Volume Trader'
+        WHEN unique_recipients >= 50 AND unique_senders >= 50 THEN 'Hub Address'
+        WHEN outgoing_count + incoming_count >= 100 AND total_sent + total_received < 1000 THEN 'Retail Active'
+        WHEN outgoing_count + incoming_count < 10 AND total_sent + total_received >= 10000 THEN 'Whale Inactive'
+        WHEN outgoing_count + incoming_count < 10 AND total_sent + total_received < 100 THEN 'Retail Inactive'
         ELSE 'Regular User'
     END as address_type
-FROM outgoing_metrics out
-FULL OUTER JOIN incoming_metrics inc ON out.address = inc.address AND out.asset = inc.asset
-WHERE COALESCE(out.outgoing_count, 0) + COALESCE(inc.incoming_count, 0) > 0;
+FROM (
+    SELECT
+        address,
+        asset,
+        sum(transaction_count_out) as outgoing_count,
+        sum(transaction_count_in) as incoming_count,
+        sum(volume_out) as total_sent,
+        sum(volume_in) as total_received,
+        sum(fees_paid) as total_fees_paid,
+        uniqMerge(unique_recipients_state) as unique_recipients,
+        uniqMerge(unique_senders_state) as unique_senders,
+        min(first_activity) as first_activity,
+        max(last_activity) as last_activity,
+        uniqIf(date, transaction_count_out > 0) as active_days,
+        sum(night_transactions) as night_transactions,
+        sum(morning_transactions) as morning_transactions,
+        sum(afternoon_transactions) as afternoon_transactions,
+        sum(evening_transactions) as evening_transactions,
+        sum(tx_count_lt_01) as tx_count_lt_01,
+        sum(tx_count_01_to_1) as tx_count_01_to_1,
+        sum(tx_count_1_to_10) as tx_count_1_to_10,
+        sum(tx_count_10_to_100) as tx_count_10_to_100,
+        sum(tx_count_100_to_1k) as tx_count_100_to_1k,
+        sum(tx_count_1k_to_10k) as tx_count_1k_to_10k,
+        sum(tx_count_gte_10k) as tx_count_gte_10k,
+        ifNotFinite(varPopMerge(sent_amount_variance_state), 0) as sent_amount_variance,
+        ifNotFinite(varPopMerge(received_amount_variance_state), 0) as received_amount_variance
+    FROM balance_transfers_address_daily_agg_internal
+    GROUP BY asset, address
+)
+WHERE outgoing_count + incoming_count > 0;
 
 -- CHUNK 9: Volume Trends View
-CREATE VIEW IF NOT EXISTS balance_transfers_volume_trends_view AS
+CREATE OR REPLACE VIEW balance_transfers_volume_trends_view AS
 SELECT
     period_start,
     asset,
@@ -447,9 +803,12 @@ SELECT
     avg(total_volume) OVER (PARTITION BY asset ORDER BY period_start ROWS BETWEEN 6 PRECEDING AND CURRENT ROW) as rolling_7_period_avg_volume,
     avg(transaction_count) OVER (PARTITION BY asset ORDER BY period_start ROWS BETWEEN 6 PRECEDING AND CURRENT ROW) as rolling_7_period_avg_tx_count,
     avg(total_volume) OVER (PARTITION BY asset ORDER BY period_start ROWS BETWEEN 29 PRECEDING AND CURRENT ROW) as rolling_30_period_avg_volume
-FROM balance_transfers_volume_series_mv_internal
+FROM balance_transfers_volume_series_view
 ORDER BY period_start DESC, asset;
 
+-- Superseded by balance_transfers_volume_series_4h_internal; SummingMergeTree cannot merge uniq/argMax results
+DROP VIEW IF EXISTS balance_transfers_volume_series_mv_internal;
+
 -- CHUNK 10: Address-Level Time Series Views
 CREATE MATERIALIZED VIEW IF NOT EXISTS balance_transfers_address_daily_internal
 ENGINE = SummingMergeTree((
@@ -569,4 +928,61 @@ SELECT
     fees_paid,
     CASE WHEN transaction_count_out > 0 THEN fees_paid / transaction_count_out ELSE 0 END as avg_fee_per_tx
 FROM balance_transfers_address_monthly_internal
-ORDER BY address, asset, month_start DESC;
\ No newline at end of file
+ORDER BY address, asset, month_start DESC;
+
+-- CHUNK 11: Address-Ordered Transfers
+-- Companion table for per-address history: every transfer is stored once for the sender
+-- (direction 'out') and once for the receiver (direction 'in'), so an address lookup is a primary key range read
+CREATE TABLE IF NOT EXISTS balance_transfers_by_address (
+    address String,
+    block_height UInt32,
+    event_idx String,
+    asset String,
+    direction Enum8('in' = 1, 'out' = 2),
+    counterparty String,
+    extrinsic_id String,
+    block_timestamp UInt64,
+    amount Decimal128(18),
+    fee Decimal128(18),
+    _version UInt64
+) ENGINE = ReplacingMergeTree(_version)
+PARTITION BY intDiv(block_height, 100000)
+ORDER BY (address, block_height, event_idx, asset, direction)
+SETTINGS index_granularity = 8192;
+
+-- One-off backfill of the address-ordered transfers (no-op once the table has data).
+-- Runs before the materialized view is created, see the 4-hour backfill above.
+INSERT INTO balance_transfers_by_address
+SELECT
+    side.1 as address,
+    block_height,
+    event_idx,
+    asset,
+    side.3 as direction,
+    side.2 as counterparty,
+    extrinsic_id,
+    block_timestamp,
+    amount,
+    fee,
+    _version
+FROM balance_transfers FINAL
+ARRAY JOIN [(from_address, to_address, 'out'), (to_address, from_address, 'in')] AS side
+WHERE (SELECT count() FROM balance_transfers_by_address) = 0;
+
+CREATE MATERIALIZED VIEW IF NOT EXISTS balance_transfers_by_address_mv
+TO balance_transfers_by_address
+AS
+SELECT
+    side.1 as address,
+    block_height,
+    event_idx,
+    asset,
+    side.3 as direction,
+    side.2 as counterparty,
+    extrinsic_id,
+    block_timestamp,
+    amount,
+    fee,
+    _version
+FROM balance_transfers
+ARRAY JOIN [(from_address, to_address, 'out'), (to_address, from_address, 'in')] AS side;
@@ -1,6 +1,6 @@
 import json
 import traceback
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Set
 from loguru import logger
 import clickhouse_connect
 from packages.indexers.substrate.block_range_partitioner import BlockRangePartitioner
@@ -218,6 +218,42 @@ class BlockStreamManager:
             logger.error(f"Error querying blocks by range: {e}")
             raise
 
+    def get_active_addresses(self, start_timestamp: int, end_timestamp: int) -> Set[str]:
+        """
+        Get the distinct addresses involved in blocks within a timestamp range.
+
+        Only the addresses column is read and deduplicated inside ClickHouse, so the
+        result is streamed without transferring or decoding transactions and events.
+
+        Args:
+            start_timestamp: Starting timestamp (inclusive)
+            end_timestamp: Ending timestamp (inclusive)
+
+        Returns:
+            Set of addresses active in the range
+        """
+        try:
+            query = """
+                SELECT DISTINCT address
+                FROM block_stream
+                ARRAY JOIN addresses AS address
+                WHERE block_timestamp >= {start_timestamp:UInt64}
+                  AND block_timestamp <= {end_timestamp:UInt64}
+                  AND address != ''
+            """
+
+            active_addresses = set()
+            with self.client.query_row_block_stream(
+                query, {'start_timestamp': start_timestamp, 'end_timestamp': end_timestamp}
+            ) as stream:
+                for block in stream:
+                    active_addresses.update(row[0] for row in block)
+            return active_addresses
+
+        except Exception as e:
+            logger.error(f"Error querying active addresses by range: {e}")
+            raise
+
     def get_block_by_nearest_timestamp(self, timestamp: int) -> Dict[str, Any]:
         """
         Get the block closest to a specified timestamp.
@@ -0,0 +1,299 @@
+import argparse
+import signal
+import time
+import traceback
+from datetime import datetime, timezone
+from typing import Optional
+
+from loguru import logger
+from neo4j import GraphDatabase
+
+from packages.indexers.base import terminate_event, get_memgraph_connection_string, setup_logger
+from packages.indexers.base.metrics import setup_metrics, IndexerMetrics, MetricsRegistry
+from packages.indexers.substrate import networks
+from packages.indexers.substrate.money_flow.money_flow_consumer import get_money_flow_indexer
+from packages.indexers.substrate.money_flow.money_flow_indexer import BaseMoneyFlowIndexer
+
+
+class MoneyFlowAnalyticsScheduler:
+    """
+    Runs community detection, community PageRank and embedding updates of the money flow graph
+    on a timer, in its own process, so graph analytics never block block ingestion.
+
+    Each run covers the blocks indexed since the previous one. Addresses whose activity block
+    height is above the analytics watermark are dirty: new addresses and edges are fed to the
+    online community detection, and PageRank and embeddings are recomputed only for the
+    communities the dirty addresses belong to. Calculated properties are recomputed for the
+    dirty addresses and embeddings for them and the members of ranked communities, in chunks.
+    Communities reaching a dirty address within two hops are ranked again as well, since their
+    PageRank projection follows paths of up to three hops.
+    A full recompute of the whole graph is done on startup, since the online algorithm keeps
+    its state in Memgraph, and then every full_interval_seconds unless that is 0.
+    """
+
+    def __init__(self, money_flow_indexer: BaseMoneyFlowIndexer, metrics_registry: MetricsRegistry,
+                 terminate_event, network: str, interval_seconds: int = 3600,
+                 full_interval_seconds: int = 86400, period_retain_months: int = 12):
+        """
+        Initialize the analytics scheduler
+
+        Args:
+            money_flow_indexer: Money flow indexer of the network
+            metrics_registry: Metrics registry of the service
+            terminate_event: Event to signal termination
+            network: Network identifier
+            interval_seconds: Seconds between incremental runs
+            full_interval_seconds: Seconds between full recomputes of the whole graph, 0 to only
+                                   recompute on startup
+            period_retain_months: Months of monthly TO_PERIOD edges kept before they are compacted
+                                  into yearly ones on full runs, 0 disables compaction
+        """
+        self.money_flow_indexer = money_flow_indexer
+        self.graph_database = money_flow_indexer.graph_database
+        self.terminate_event = terminate_event
+        self.network = network
+        self.interval_seconds = interval_seconds
+        self.full_interval_seconds = full_interval_seconds
+        self.period_retain_months = period_retain_months
+        self._last_full_run_time: Optional[float] = None
+
+        self.community_detection_duration = metrics_registry.create_histogram(
+            'consumer_community_detection_duration_seconds',
+            'Time spent on community detection',
+            ['network', 'indexer']
+        )
+
+        self.page_rank_duration = metrics_registry.create_histogram(
+            'consumer_page_rank_duration_seconds',
+            'Time spent on page rank calculation',
+            ['network', 'indexer']
+        )
+
+        self.embeddings_update_duration = metrics_registry.create_histogram(
+            'consumer_embeddings_update_duration_seconds',
+            'Time spent updating embeddings',
+            ['network', 'indexer']
+        )
+
+    def _get_block_height(self, name: str) -> int:
+        with self.graph_database.session() as session:
+            record = session.run("""
+            MATCH (g:GlobalState { name: $name })
+            RETURN g.block_height AS block_height
+            """, {'name': name}).single()
+            return record["block_height"] if record else 0
+
+    def _set_analytics_block_height(self, block_height: int):
+        with self.graph_database.session() as session:
+            session.run("""
+            MERGE (g:GlobalState { name: "last_analytics_block_height" })
+            SET g.block_height = $block_height
+            """, {'block_height': block_height})
+
+    def compact_period_edges(self):
+        """Compact monthly TO_PERIOD edges older than the retained months into yearly edges"""
+        now = datetime.now(timezone.utc)
+        months = now.year * 12 + now.month - 1 - self.period_retain_months
+        cutoff = datetime(months // 12, months % 12 + 1, 1, tzinfo=timezone.utc)
+
+        start_time = time.time()
+        compacted = self.money_flow_indexer.compact_period_edges(int(cutoff.timestamp() * 1000))
+        if compacted:
+            logger.info(
+                "Compacted period edges",
+                extra={
+                    "compacted": compacted,
+                    "cutoff": cutoff.isoformat(),
+                    "duration_seconds": round(time.time() - start_time, 2)
+                }
+            )
+
+    def run_analytics(self, full: bool = False):
+        """
+        Run one analytics pass over the blocks indexed since the previous pass
+
+        Args:
+            full: Recompute the whole graph instead of the dirty communities
+        """
+        labels = {'network': self.network, 'indexer': 'money_flow'}
+        since_height = self._get_block_height("last_analytics_block_height")
+        # Snapshot the ingestion watermark first, later writes are covered by the next pass
+        target_height = self._get_block_height("last_block_height")
+
+        full = full or since_height == 0
+        if not full and target_height <= since_height:
+            logger.info("No new blocks since the last analytics run", extra={"block_height": since_height})
+            return
+
+        # Full runs still need the dirty set to tell which community rankings went stale
+        dirty_addresses = [] if since_height == 0 else self.money_flow_indexer.get_addresses_active_since(since_height)
+        logger.info(
+            "Starting graph analytics",
+            extra={
+                "mode": "full" if full else "incremental",
+                "since_height": since_height,
+                "target_height": target_height,
+                "dirty_addresses": len(dirty_addresses)
+            }
+        )
+        start_time = time.time()
+
+        step_start = time.time()
+        communities = self.money_flow_indexer.community_detection_online(None if full else since_height)
+        self.community_detection_duration.labels(**labels).observe(time.time() - step_start)
+
+        if self.terminate_event.is_set():
+            return
+
+        # Unique senders and receivers are maintained by the writer, recomputed here to correct drift
+        self.money_flow_indexer.update_calculated_properties(None if full else dirty_addresses)
+
+        if self.terminate_event.is_set():
+            return
+
+        # Rankings follow paths of up to three hops, so communities reaching a dirty address go stale too
+        stale_communities = None if since_height == 0 else self.money_flow_indexer.get_upstream_communities(dirty_addresses)
+        if full:
+            ranked_communities = None
+        else:
+            ranked_communities = sorted(communities | stale_communities)
+
+        step_start = time.time()
+        self.money_flow_indexer.page_rank_with_community(ranked_communities, stale_communities)
+        self.page_rank_duration.labels(**labels).observe(time.time() - step_start)
+
+        if self.terminate_event.is_set():
+            return
+
+        step_start = time.time()
+        if full:
+            self.money_flow_indexer.update_embeddings()
+        else:
+            members = self.money_flow_indexer.get_community_members(ranked_communities)
+            self.money_flow_indexer.update_embeddings(list(set(members) | set(dirty_addresses)))
+        self.embeddings_update_duration.labels(**labels).observe(time.time() - step_start)
+
+        if self.terminate_event.is_set():
+            return
+
+        self._set_analytics_block_height(target_height)
+        if full:
+            self._last_full_run_time = start_time
+            if self.period_retain_months > 0:
+                self.compact_period_edges()
+
+        logger.success(
+            "Completed graph analytics",
+            extra={
+                "mode": "full" if full else "incremental",
+                "target_height": target_height,
+                "ranked_communities": len(ranked_communities) if ranked_communities is not None else "all",
+                "total_duration": round(time.time() - start_time, 2)
+            }
+        )
+
+    def run(self):
+        """Run analytics passes on their time triggers until termination is requested"""
+        while not self.terminate_event.is_set():
+            full = self._last_full_run_time is None or (
+                self.full_interval_seconds > 0
+                and time.time() - self._last_full_run_time >= self.full_interval_seconds
+            )
+            try:
+                self.run_analytics(full)
+            except Exception as e:
+                logger.error(
+                    "Graph analytics run failed",
+                    error=e,
+                    traceback=traceback.format_exc(),
+                    extra={"operation": "run_analytics", "full": full}
+                )
+
+            self.terminate_event.wait(self.interval_seconds)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Money Flow Graph Analytics Scheduler')
+    parser.add_argument(
+        '--network',
+        type=str,
+        required=True,
+        choices=networks,
+        help='Network whose money flow graph should be analyzed'
+    )
+    parser.add_argument(
+        '--interval-seconds',
+        type=int,
+        default=3600,
+        help='Seconds between incremental analytics runs (default: 3600)'
+    )
+    parser.add_argument(
+        '--full-interval-hours',
+        type=int,
+        default=24,
+        help='Hours between full recomputes of the whole graph, 0 to only recompute on startup (default: 24)'
+    )
+    parser.add_argument(
+        '--page-rank-workers',
+        type=int,
+        default=4,
+        help='Communities ranked in parallel sessions by community PageRank (default: 4)'
+    )
+    parser.add_argument(
+        '--chunk-size',
+        type=int,
+        default=5000,
+        help='Addresses per transaction when updating calculated properties and embeddings (default: 5000)'
+    )
+    parser.add_argument(
+        '--period-retain-months',
+        type=int,
+        default=12,
+        help='Months of monthly TO_PERIOD edges kept before compaction into yearly edges, 0 disables (default: 12)'
+    )
+    args = parser.parse_args()
+
+    service_name = f'substrate-{args.network}-money-flow-analytics'
+    setup_logger(service_name)
+
+    def signal_handler(sig, frame):
+        logger.info("Shutdown signal received", extra={"signal": sig, "service": service_name})
+        terminate_event.set()
+
+    signal.signal(signal.SIGTERM, signal_handler)
+    signal.signal(signal.SIGINT, signal_handler)
+
+    graph_db_url, graph_db_user, graph_db_password = get_memgraph_connection_string(args.network)
+    graph_database = GraphDatabase.driver(
+        graph_db_url,
+        auth=(graph_db_user, graph_db_password),
+        max_connection_lifetime=3600,
+        connection_acquisition_timeout=60
+    )
+
+    try:
+        metrics_registry = setup_metrics(service_name, start_server=True)
+        indexer_metrics = IndexerMetrics(metrics_registry, args.network, 'money_flow')
+        money_flow_indexer = get_money_flow_indexer(args.network, graph_database, indexer_metrics)
+        money_flow_indexer.page_rank_workers = args.page_rank_workers
+        money_flow_indexer.analytics_chunk_size = args.chunk_size
+
+        scheduler = MoneyFlowAnalyticsScheduler(
+            money_flow_indexer,
+            metrics_registry,
+            terminate_event,
+            args.network,
+            args.interval_seconds,
+            args.full_interval_hours * 3600,
+            args.period_retain_months
+        )
+        scheduler.run()
+    except Exception as e:
+        logger.error(
+            "Fatal startup error",
+            error=e,
+            traceback=traceback.format_exc(),
+            extra={"operation": "main_startup"}
+        )
+    finally:
+        graph_database.close()
@@ -0,0 +1,600 @@
+import argparse
+import json
+import signal
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Any, Dict, List, Optional
+
+import clickhouse_connect
+from loguru import logger
+from neo4j import GraphDatabase
+
+from packages.indexers.base import (
+    terminate_event, get_clickhouse_connection_string, get_memgraph_connection_string, setup_logger
+)
+from packages.indexers.base.decimal_utils import get_network_token_decimals
+from packages.indexers.base.metrics import setup_metrics, IndexerMetrics
+from packages.indexers.substrate import networks
+from packages.indexers.substrate.money_flow.money_flow_consumer import get_money_flow_indexer
+from packages.indexers.substrate.money_flow.money_flow_indexer import BaseMoneyFlowIndexer, infinite_retry_with_backoff
+from packages.indexers.substrate.money_flow.money_flow_reducer import get_period_bounds
+
+# Balances.Transfer and Balances.Endowed events of block_stream up to a height, one row per
+# event with the UTC month it falls into; an endowment is a row without receiver or amount
+MONEY_FLOW_EVENTS_QUERY = """
+    SELECT
+        if(events.event_id = 'Endowed',
+           JSONExtractString(events.attributes, 'account'),
+           JSONExtractString(events.attributes, 'from')) AS from_address,
+        if(events.event_id = 'Endowed', '', JSONExtractString(events.attributes, 'to')) AS to_address,
+        toUInt64(toUnixTimestamp(toStartOfMonth(toDateTime(intDiv(block_timestamp, 1000), 'UTC')))) * 1000 AS period_start,
+        if(events.event_id = 'Endowed', 0,
+           toFloat64OrZero(replaceAll(JSONExtractRaw(events.attributes, 'amount'), '"', ''))) AS amount,
+        toUInt64(1) AS transfer_count,
+        block_height AS first_block_height,
+        block_height AS last_block_height,
+        block_timestamp AS first_timestamp,
+        block_timestamp AS last_timestamp
+    FROM block_stream FINAL
+    ARRAY JOIN events
+    WHERE block_height <= {end_height:UInt64}
+      AND events.module_id = 'Balances'
+      AND events.event_id IN ('Transfer', 'Endowed')
+"""
+
+# Merges rows of the same (from, to) pair, or of the same pair and month
+AGGREGATE_COLUMNS = """
+        sum(amount) AS amount,
+        sum(transfer_count) AS transfer_count,
+        min(first_block_height) AS first_block_height,
+        max(last_block_height) AS last_block_height,
+        min(first_timestamp) AS first_timestamp,
+        max(last_timestamp) AS last_timestamp
+"""
+
+# Aggregates per (from, to, month), materialized when TO_PERIOD edges are loaded; the pair
+# aggregates are then rolled up from it instead of scanning block_stream a second time
+CREATE_PERIODS_TABLE_QUERY = f"""
+    CREATE TEMPORARY TABLE money_flow_bulk_periods
+    ENGINE = MergeTree
+    ORDER BY (from_address, to_address, period_start)
+    AS SELECT
+        from_address,
+        to_address,
+        period_start,
+        {AGGREGATE_COLUMNS}
+    FROM ({MONEY_FLOW_EVENTS_QUERY})
+    GROUP BY from_address, to_address, period_start
+"""
+
+# Aggregates per (from, to) pair, materialized once in a temporary table of the client's
+# session so block_stream is scanned a single time for edges, periods and addresses
+CREATE_EDGES_TABLE_QUERY = """
+    CREATE TEMPORARY TABLE money_flow_bulk_edges
+    ENGINE = MergeTree
+    ORDER BY (from_address, to_address)
+    AS SELECT
+        from_address,
+        to_address,
+        {aggregate_columns}
+    FROM ({source})
+    GROUP BY from_address, to_address
+"""
+
+DROP_TABLES_QUERIES = [
+    "DROP TEMPORARY TABLE IF EXISTS money_flow_bulk_edges",
+    "DROP TEMPORARY TABLE IF EXISTS money_flow_bulk_periods"
+]
+
+# Final TO edge aggregates, one row per (from, to) pair
+EDGES_QUERY = """
+    SELECT
+        from_address,
+        to_address,
+        amount / pow(10, {decimals:UInt8}) AS volume,
+        transfer_count,
+        first_block_height,
+        last_block_height,
+        first_timestamp,
+        last_timestamp
+    FROM money_flow_bulk_edges
+    WHERE to_address != ''
+"""
+
+# Final monthly TO_PERIOD edge aggregates, one row per (from, to, month)
+PERIODS_QUERY = """
+    SELECT
+        from_address,
+        to_address,
+        period_start,
+        amount / pow(10, {decimals:UInt8}) AS volume,
+        transfer_count,
+        first_block_height,
+        last_block_height,
+        first_timestamp,
+        last_timestamp
+    FROM money_flow_bulk_periods
+    WHERE to_address != ''
+"""
+
+# Final Address aggregates, including accounts endowed without a transfer
+ADDRESSES_QUERY = """
+    SELECT
+        address,
+        sum(transfer_count) AS transfer_count,
+        min(first_block_height) AS first_block_height,
+        min(first_timestamp) AS first_timestamp,
+        max(last_block_height) AS last_block_height,
+        max(last_timestamp) AS last_timestamp,
+        countIf(side > 0) AS neighbor_count,
+        countIf(side = 2) AS unique_senders,
+        countIf(side = 1) AS unique_receivers
+    FROM (
+        SELECT
+            from_address AS address,
+            if(to_address = '', 0, 1) AS side,
+            if(to_address = '', 0, transfer_count) AS transfer_count,
+            first_block_height,
+            if(to_address = '', 0, last_block_height) AS last_block_height,
+            first_timestamp,
+            if(to_address = '', 0, last_timestamp) AS last_timestamp
+        FROM money_flow_bulk_edges
+        UNION ALL
+        SELECT to_address AS address, 2 AS side, transfer_count,
+               first_block_height, last_block_height, first_timestamp, last_timestamp
+        FROM money_flow_bulk_edges
+        WHERE to_address != ''
+    )
+    GROUP BY address
+"""
+
+# Blocks with events handled by the network specific indexer, only those events kept
+NETWORK_EVENTS_QUERY = """
+    SELECT
+        block_height,
+        block_timestamp,
+        arrayFilter((m, e, a) -> has({event_types:Array(String)}, concat(m, '.', e)), events.module_id, events.event_id, events.attributes) AS module_ids,
+        arrayFilter((e, m, a) -> has({event_types:Array(String)}, concat(m, '.', e)), events.event_id, events.module_id, events.attributes) AS event_ids,
+        arrayFilter((a, m, e) -> has({event_types:Array(String)}, concat(m, '.', e)), events.attributes, events.module_id, events.event_id) AS attributes
+    FROM block_stream FINAL
+    WHERE block_height <= {end_height:UInt64}
+      AND hasAny(arrayMap((m, e) -> concat(m, '.', e), events.module_id, events.event_id), {event_types:Array(String)})
+    ORDER BY block_height
+"""
+
+
+class MoneyFlowBulkLoader:
+    """
+    Builds the money flow graph of a network from scratch out of block_stream.
+
+    Instead of replaying every block through per-batch MERGE statements, the final Address
+    and TO aggregates up to a block height are computed in ClickHouse, from one scan of
+    block_stream kept in a session temporary table, streamed out and written with parallel
+    UNWIND batches into an empty graph. With the indexer's period_edges the monthly TO_PERIOD
+    edges of the consumer's --period-edges mode are loaded as well. Network specific events are
+    then replayed through the network's indexer. The address index is created before loading
+    so edges can match their endpoints, the remaining indexes afterwards. The GlobalState
+    checkpoint is set to the loaded height, so the money flow consumer continues
+    incrementally from there.
+    """
+
+    def __init__(self, clickhouse_params: Dict[str, Any], money_flow_indexer: BaseMoneyFlowIndexer,
+                 terminate_event, workers: int = 4, batch_rows: int = 10000):
+        """
+        Initialize the bulk loader
+
+        Args:
+            clickhouse_params: ClickHouse connection parameters
+            money_flow_indexer: Money flow indexer of the network, used for network specific events
+            terminate_event: Event to signal termination
+            workers: Number of parallel graph sessions
+            batch_rows: Rows written per UNWIND transaction
+        """
+        self.money_flow_indexer = money_flow_indexer
+        self.graph_database = money_flow_indexer.graph_database
+        self.network = money_flow_indexer.network
+        self.asset = money_flow_indexer.asset
+        self.terminate_event = terminate_event
+        self.workers = workers
+        self.batch_rows = batch_rows
+        self.client = clickhouse_connect.get_client(
+            host=clickhouse_params['host'],
+            port=int(clickhouse_params['port']),
+            username=clickhouse_params['user'],
+            password=clickhouse_params['password'],
+            database=clickhouse_params['database'],
+            settings={
+                'max_execution_time': 0,
+                'do_not_merge_across_partitions_select_final': 1
+            }
+        )
+
+    def get_latest_block_height(self) -> int:
+        """Get the highest block height available in block_stream"""
+        result = self.client.query("SELECT max(block_height) FROM block_stream")
+        return result.result_rows[0][0] if result.result_rows else 0
+
+    def get_graph_block_height(self) -> int:
+        """Get the block height the graph has been indexed to, 0 for an empty graph"""
+        with self.graph_database.session() as session:
+            record = session.run("""
+            MATCH (g:GlobalState { name: "last_block_height" })
+            RETURN g.block_height AS last_block_height
+            """).single()
+            return record["last_block_height"] if record else 0
+
+    def get_load_in_progress(self) -> Optional[int]:
+        """Get the end height of an interrupted bulk load, None if no load was started"""
+        with self.graph_database.session() as session:
+            record = session.run("""
+            MATCH (g:GlobalState { name: "bulk_load_in_progress" })
+            RETURN g.block_height AS end_height
+            """).single()
+            return record["end_height"] if record else None
+
+    def has_money_flow(self) -> bool:
+        """Check whether the graph holds TO edges, genesis addresses alone do not count"""
+        with self.graph_database.session() as session:
+            record = session.run("""
+            MATCH ()-[r:TO]->()
+            RETURN r.id AS id
+            LIMIT 1
+            """).single()
+            return record is not None
+
+    def load(self, end_height: int):
+        """
+        Load the aggregated money flow up to end_height into an empty graph
+
+        A marker holding end_height is written before any data and removed together with
+        the checkpoint. An interrupted load is resumed by running it again with the same
+        end height: addresses and edges are then merged with their final values instead
+        of created, so nothing is counted twice. Graphs with money flow but without the
+        marker are refused.
+
+        Args:
+            end_height: Last block height included in the load
+        """
+        graph_block_height = self.get_graph_block_height()
+        if graph_block_height > 0:
+            raise ValueError(f"Graph is already indexed up to block {graph_block_height}, bulk load requires an empty graph")
+
+        load_end_height = self.get_load_in_progress()
+        if load_end_height is not None and load_end_height != end_height:
+            raise ValueError(f"An interrupted bulk load up to block {load_end_height} has to be resumed with the same end height")
+        resume = load_end_height is not None
+        if not resume and self.has_money_flow():
+            raise ValueError("Graph holds money flow without a checkpoint, bulk load requires an empty graph")
+
+        start_time = time.time()
+        if resume:
+            logger.warning("Resuming interrupted bulk load", extra={"end_height": end_height})
+        else:
+            with self.graph_database.session() as session:
+                session.run("""
+                MERGE (g:GlobalState { name: "bulk_load_in_progress" })
+                SET g.block_height = $block_height
+                """, {'block_height': end_height})
+        params = {'end_height': end_height, 'decimals': get_network_token_decimals(self.network)}
+
+        with self.graph_database.session() as session:
+            session.run("CREATE INDEX ON :Address(address);")
+
+        # Edges, periods and addresses are all read from one materialized scan of block_stream
+        period_edges = self.money_flow_indexer.period_edges
+        self._drop_tables()
+        if period_edges:
+            self.client.command(CREATE_PERIODS_TABLE_QUERY, parameters=params)
+            edges_source = "SELECT * FROM money_flow_bulk_periods"
+        else:
+            edges_source = MONEY_FLOW_EVENTS_QUERY
+        self.client.command(
+            CREATE_EDGES_TABLE_QUERY.format(aggregate_columns=AGGREGATE_COLUMNS, source=edges_source),
+            parameters=params
+        )
+        try:
+            addresses_count = self._load_rows(ADDRESSES_QUERY, params, self._address_row, """
+                UNWIND $rows AS row
+                MERGE (addr:Address { address: row.address })
+                SET
+                  addr.first_activity_timestamp = row.first_timestamp,
+                  addr.first_activity_block_height = row.first_block_height
+                WITH addr, row
+                WHERE row.transfer_count > 0
+                SET
+                  addr.last_activity_timestamp = row.last_timestamp,
+                  addr.last_activity_block_height = row.last_block_height,
+                  addr.transfer_count = row.transfer_count,
+                  addr.neighbor_count = row.neighbor_count,
+                  addr.unique_senders = row.unique_senders,
+                  addr.unique_receivers = row.unique_receivers
+            """)
+            logger.info("Loaded addresses", extra={"addresses": addresses_count, "end_height": end_height})
+
+            # Edges are created without a lookup on a fresh load, merged when resuming one
+            edges_count = self._load_rows(EDGES_QUERY, params, self._edge_row, f"""
+                UNWIND $rows AS row
+                MATCH (sender:Address {{ address: row.from }})
+                MATCH (receiver:Address {{ address: row.to }})
+                {'MERGE' if resume else 'CREATE'} (sender)-[r:TO {{ id: row.id, asset: $asset }}]->(receiver)
+                SET
+                  r.volume = row.volume,
+                  r.transfer_count = row.transfer_count,
+                  r.first_activity_timestamp = row.first_timestamp,
+                  r.last_activity_timestamp = row.last_timestamp,
+                  r.first_activity_block_height = row.first_block_height,
+                  r.last_activity_block_height = row.last_block_height
+            """)
+            logger.info("Loaded edges", extra={"edges": edges_count, "end_height": end_height})
+
+            periods_count = 0
+            if period_edges:
+                # Monthly buckets as written by the consumer with --period-edges, final values set once
+                periods_count = self._load_rows(PERIODS_QUERY, params, self._period_row, f"""
+                    UNWIND $rows AS row
+                    MATCH (sender:Address {{ address: row.from }})
+                    MATCH (receiver:Address {{ address: row.to }})
+                    {'MERGE' if resume else 'CREATE'} (sender)-[p:TO_PERIOD {{ id: row.id, asset: $asset, granularity: 'month', period_start: row.period_start }}]->(receiver)
+                    SET
+                      p.period_end = row.period_end,
+                      p.year_start = row.year_start,
+                      p.year_end = row.year_end,
+                      p.volume = row.volume,
+                      p.transfer_count = row.transfer_count,
+                      p.first_activity_timestamp = row.first_timestamp,
+                      p.last_activity_timestamp = row.last_timestamp,
+                      p.first_activity_block_height = row.first_block_height,
+                      p.last_activity_block_height = row.last_block_height
+                """)
+                logger.info("Loaded period edges", extra={"period_edges": periods_count, "end_height": end_height})
+        finally:
+            self._drop_tables()
+
+        self._replay_network_events(end_height)
+
+        if self.terminate_event.is_set():
+            logger.warning(
+                "Bulk load interrupted, the checkpoint was not written; run it again with the same end height to resume",
+                extra={"end_height": end_height}
+            )
+            return
+
+        # Remaining indexes are built once over the loaded graph
+        self.money_flow_indexer.create_indexes()
+
+        with self.graph_database.session() as session:
+            with session.begin_transaction() as transaction:
+                transaction.run("""
+                MERGE (g:GlobalState { name: "last_block_height" })
+                SET g.block_height = $block_height
+                """, {'block_height': end_height})
+                transaction.run("""
+                MATCH (g:GlobalState { name: "bulk_load_in_progress" })
+                DELETE g
+                """)
+
+        logger.success(
+            "Money flow bulk load completed",
+            extra={
+                "end_height": end_height,
+                "addresses": addresses_count,
+                "edges": edges_count,
+                "period_edges": periods_count,
+                "duration_seconds": round(time.time() - start_time, 2)
+            }
+        )
+
+    def _replay_network_events(self, end_height: int):
+        """Apply network specific events (agent and neuron registrations) in block order"""
+        event_types = self.money_flow_indexer.network_event_types
+        if not event_types:
+            return
+
+        params = {'end_height': end_height, 'event_types': event_types}
+        with self.client.query_row_block_stream(NETWORK_EVENTS_QUERY, params) as stream:
+            for block in stream:
+                if self.terminate_event.is_set():
+                    return
+                with self.graph_database.session() as session:
+                    with session.begin_transaction() as transaction:
+                        for block_height, timestamp, module_ids, event_ids, attributes_json in block:
+                            events = []
+                            for module_id, event_id, attributes in zip(module_ids, event_ids, attributes_json):
+                                try:
+                                    attributes = json.loads(attributes)
+                                except json.JSONDecodeError:
+                                    attributes = {}
+                                events.append({
+                                    'module_id': module_id,
+                                    'event_id': event_id,
+                                    'attributes': attributes,
+                                    'block_height': block_height
+                                })
+                            self.money_flow_indexer._process_network_specific_events(
+                                transaction, timestamp, self.money_flow_indexer._group_events(events)
+                            )
+
+    def _address_row(self, row) -> Dict[str, Any]:
+        address, transfer_count, first_height, first_timestamp, last_height, last_timestamp, \
+            neighbor_count, unique_senders, unique_receivers = row
+        return {
+            'address': address,
+            'transfer_count': transfer_count,
+            'first_block_height': first_height,
+            'first_timestamp': first_timestamp,
+            'last_block_height': last_height,
+            'last_timestamp': last_timestamp,
+            'neighbor_count': neighbor_count,
+            'unique_senders': unique_senders,
+            'unique_receivers': unique_receivers
+        }
+
+    def _edge_row(self, row) -> Dict[str, Any]:
+        from_address, to_address, volume, transfer_count, first_height, last_height, first_timestamp, last_timestamp = row
+        return {
+            'id': f"from-{from_address}-to-{to_address}-{self.asset}",
+            'from': from_address,
+            'to': to_address,
+            'volume': float(volume),
+            'transfer_count': transfer_count,
+            'first_block_height': first_height,
+            'last_block_height': last_height,
+            'first_timestamp': first_timestamp,
+            'last_timestamp': last_timestamp
+        }
+
+    def _period_row(self, row) -> Dict[str, Any]:
+        from_address, to_address, period_start, volume, transfer_count, first_height, last_height, \
+            first_timestamp, last_timestamp = row
+        _, period_end, year_start, year_end = get_period_bounds(period_start)
+        return {
+            'id': f"from-{from_address}-to-{to_address}-{self.asset}",
+            'from': from_address,
+            'to': to_address,
+            'period_start': period_start,
+            'period_end': period_end,
+            'year_start': year_start,
+            'year_end': year_end,
+            'volume': float(volume),
+            'transfer_count': transfer_count,
+            'first_block_height': first_height,
+            'last_block_height': last_height,
+            'first_timestamp': first_timestamp,
+            'last_timestamp': last_timestamp
+        }
+
+    def _drop_tables(self):
+        """Drop the temporary aggregate tables of the client's session"""
+        for query in DROP_TABLES_QUERIES:
+            self.client.command(query)
+
+    def _load_rows(self, query: str, params: Dict[str, Any], map_row, write_query: str) -> int:
+        """Stream query results and write them in parallel UNWIND batches
+
+        Returns:
+            Number of rows written
+        """
+        loaded = 0
+        pending = set()
+        rows = []
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            with self.client.query_row_block_stream(query, params) as stream:
+                for block in stream:
+                    if self.terminate_event.is_set():
+                        break
+                    for row in block:
+                        rows.append(map_row(row))
+                        if len(rows) >= self.batch_rows:
+                            pending.add(executor.submit(self._write_rows, write_query, rows))
+                            loaded += len(rows)
+                            rows = []
+
+                        # Keep a bounded number of batches in memory
+                        if len(pending) >= self.workers * 2:
+                            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                            for future in done:
+                                future.result()
+
+            if rows and not self.terminate_event.is_set():
+                pending.add(executor.submit(self._write_rows, write_query, rows))
+                loaded += len(rows)
+
+            for future in pending:
+                future.result()
+        return loaded
+
+    @infinite_retry_with_backoff
+    def _write_rows(self, write_query: str, rows: List[Dict[str, Any]]):
+        """Write one batch in its own session and transaction, retried on conflicts"""
+        with self.graph_database.session() as session:
+            with session.begin_transaction() as transaction:
+                transaction.run(write_query, {'rows': rows, 'asset': self.asset})
+
+    def close(self):
+        """Close the ClickHouse connection"""
+        if hasattr(self, 'client'):
+            self.client.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Money Flow Bulk Graph Loader')
+    parser.add_argument(
+        '--network',
+        type=str,
+        required=True,
+        choices=networks,
+        help='Network whose money flow graph should be built'
+    )
+    parser.add_argument(
+        '--end-height',
+        type=int,
+        default=None,
+        help='Last block height to load (default: that of an interrupted load, else the latest block in block_stream)'
+    )
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=4,
+        help='Parallel graph sessions writing batches (default: 4)'
+    )
+    parser.add_argument(
+        '--batch-rows',
+        type=int,
+        default=10000,
+        help='Rows written per UNWIND transaction (default: 10000)'
+    )
+    parser.add_argument(
+        '--period-edges',
+        action='store_true',
+        help='Also load monthly TO_PERIOD edges, for graphs the consumer maintains with --period-edges'
+    )
+    args = parser.parse_args()
+
+    service_name = f'substrate-{args.network}-money-flow-bulk-loader'
+    setup_logger(service_name)
+
+    def signal_handler(sig, frame):
+        logger.info("Shutdown signal received", extra={"signal": sig, "service": service_name})
+        terminate_event.set()
+
+    signal.signal(signal.SIGTERM, signal_handler)
+    signal.signal(signal.SIGINT, signal_handler)
+
+    graph_db_url, graph_db_user, graph_db_password = get_memgraph_connection_string(args.network)
+    graph_database = GraphDatabase.driver(
+        graph_db_url,
+        auth=(graph_db_user, graph_db_password),
+        max_connection_lifetime=3600,
+        connection_acquisition_timeout=60
+    )
+
+    bulk_loader = None
+    try:
+        # Creating the network indexer also populates genesis addresses where the network has them
+        metrics_registry = setup_metrics(service_name, start_server=False)
+        indexer_metrics = IndexerMetrics(metrics_registry, args.network, 'money_flow')
+        money_flow_indexer = get_money_flow_indexer(args.network, graph_database, indexer_metrics)
+        money_flow_indexer.period_edges = args.period_edges
+
+        bulk_loader = MoneyFlowBulkLoader(
+            get_clickhouse_connection_string(args.network),
+            money_flow_indexer,
+            terminate_event,
+            args.workers,
+            args.batch_rows
+        )
+        # An interrupted load is resumed with its own end height
+        end_height = args.end_height or bulk_loader.get_load_in_progress() or bulk_loader.get_latest_block_height()
+        bulk_loader.load(end_height)
+    except Exception as e:
+        logger.error(
+            "Money flow bulk load failed",
+            error=e,
+            traceback=traceback.format_exc(),
+            extra={"network": args.network}
+        )
+    finally:
+        if bulk_loader:
+            bulk_loader.close()
+        graph_database.close()
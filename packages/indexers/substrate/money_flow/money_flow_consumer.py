@@ -1,11 +1,13 @@
 import os
 import signal
+import threading
 import time
 import argparse
 import traceback
 from loguru import logger
 from neo4j import GraphDatabase
-from typing import Dict, Any, List
+from neo4j.exceptions import ServiceUnavailable, SessionExpired, TransientError
+from typing import Dict, Any, List, Optional
 
 from packages.indexers.base import (
     terminate_event, get_clickhouse_connection_string, get_memgraph_connection_string,
@@ -21,6 +23,7 @@ from packages.indexers.substrate.money_flow.money_flow_indexer import BaseMoneyF
 from packages.indexers.substrate.money_flow.money_flow_indexer_torus import TorusMoneyFlowIndexer
 from packages.indexers.substrate.money_flow.money_flow_indexer_bittensor import BittensorMoneyFlowIndexer
 from packages.indexers.substrate.money_flow.money_flow_indexer_polkadot import PolkadotMoneyFlowIndexer
+from packages.indexers.substrate.money_flow.money_flow_write_ahead_log import MoneyFlowWriteAheadLog
 from packages.indexers.substrate.node.substrate_node import SubstrateNode
 
 
@@ -58,9 +61,17 @@ class MoneyFlowConsumer:
             indexer_metrics: IndexerMetrics,
             terminate_event,
             network: str,
-            batch_size: int = 10
+            batch_size: int = 10,
+            write_ahead_log: Optional[MoneyFlowWriteAheadLog] = None,
+            write_ahead_max_attempts: int = 10
     ):
         self.block_stream_manager = block_stream_manager
+        self.write_ahead_log = write_ahead_log
+        # Failed attempts at one write-ahead record before the consumer stops on it
+        self.write_ahead_max_attempts = write_ahead_max_attempts
+        self._applier_thread: Optional[threading.Thread] = None
+        # Seconds _cleanup waits for the applier to finish its current batch
+        self.applier_join_timeout_seconds = 60
         self.money_flow_indexer = money_flow_indexer
         self.metrics_registry = metrics_registry
         self.indexer_metrics = indexer_metrics
@@ -87,29 +98,19 @@ class MoneyFlowConsumer:
             ['network', 'indexer', 'error_type']
         )
 
-        self.community_detection_duration = self.metrics_registry.create_histogram(
-            'consumer_community_detection_duration_seconds',
-            'Time spent on community detection',
-            ['network', 'indexer']
-        )
-
-        self.page_rank_duration = self.metrics_registry.create_histogram(
-            'consumer_page_rank_duration_seconds',
-            'Time spent on page rank calculation',
-            ['network', 'indexer']
-        )
-
-        self.embeddings_update_duration = self.metrics_registry.create_histogram(
-            'consumer_embeddings_update_duration_seconds',
-            'Time spent updating embeddings',
-            ['network', 'indexer']
-        )
-
     def run(self):
         """Main processing loop"""
         try:
             # Get the last processed block height
             last_block_height = self.get_last_processed_block()
+
+            if self.write_ahead_log:
+                # Buffered batches are written to the graph in the background while reading continues
+                self._applier_thread = threading.Thread(target=self._apply_write_ahead_log, daemon=True)
+                self._applier_thread.start()
+
+            # A buffered copy of the batch has the same boundaries, so replaying it again is harmless
+            last_block_height = max(last_block_height, self._replay_pending_batch())
             current_height = last_block_height + 1 if last_block_height > 0 else 1
             
             # Business decision logging
@@ -156,11 +157,7 @@ class MoneyFlowConsumer:
                     # Only proceed if we weren't terminated during block fetching
                     if not self.terminate_event.is_set() and blocks_with_addresses:
                         # Process blocks
-                        for block in blocks_with_addresses:
-                            # Check for termination before processing each block
-                            if self.terminate_event.is_set():
-                                break
-                            self.process_block(block)
+                        self.process_blocks(blocks_with_addresses, end_height)
                         
                         # Record batch processing metrics
                         if self.batch_processing_duration and self.blocks_processed_total:
@@ -198,7 +195,11 @@ class MoneyFlowConsumer:
                                 "possible_causes": ["low_network_activity", "block_stream_lag"]
                             }
                         )
-                        self.money_flow_indexer.update_global_state(end_height)
+                        if self.write_ahead_log:
+                            # The applier advances the checkpoint once the buffered batches are written
+                            self.write_ahead_log.read_height = end_height
+                        else:
+                            self.money_flow_indexer.update_global_state(end_height)
                         current_height = end_height + 1
 
                 except Exception as e:
@@ -240,90 +241,119 @@ class MoneyFlowConsumer:
         finally:
             self._cleanup()
 
-    def process_block(self, block: Dict[str, Any]):
-        """Process a single block with termination handling"""
+    def _replay_pending_batch(self) -> int:
+        """
+        Replay a sharded batch interrupted between its shard writes and its checkpoint.
+
+        The batch is read again with exactly the block range it was written with, since a
+        wider range would merge blocks already written by a committed shard with new ones
+        into a row the block range guards skip as a whole.
+
+        Returns:
+            Last block height of the replayed batch, 0 if there was none
+        """
+        pending_batch = self.money_flow_indexer.get_pending_batch()
+        if pending_batch is None:
+            return 0
+
+        start_height, end_height = pending_batch
+        logger.warning(
+            "Replaying interrupted sharded batch",
+            extra={"start_height": start_height, "end_height": end_height}
+        )
+        blocks = self.block_stream_manager.get_blocks_by_block_height_range(start_height, end_height, only_with_addresses=True)
+        self.process_blocks(blocks, end_height)
+        return end_height
+
+    def process_blocks(self, blocks: List[Dict[str, Any]], end_height: int):
+        """Process a batch of blocks with termination handling"""
         try:
             # Check for termination before starting
             if self.terminate_event.is_set():
                 return
 
-            block_height = block.get("block_height")
-            if not block_height:
+            if any(not block.get("block_height") for block in blocks):
                 raise ValueError("Block height is missing")
 
-            self.money_flow_indexer.index_blocks([block])
-
-            # Run periodic tasks
-            once_per_block = 16 * 60 * 60 / self.partitioner.block_time_seconds
-            if block_height % once_per_block == 0 and not self.terminate_event.is_set():
-                labels = {'network': self.network, 'indexer': 'money_flow'}
-                
-                # Strategic logging for periodic tasks
-                logger.info(
-                    "Starting periodic graph analysis tasks",
-                    extra={
-                        "block_height": block_height,
-                        "tasks": ["community_detection", "page_rank", "embeddings_update"]
-                    }
-                )
-                
-                # Run community detection with termination check
-                start_time = time.time()
-                self.money_flow_indexer.community_detection()
-                duration = time.time() - start_time
-                if self.community_detection_duration:
-                    self.community_detection_duration.labels(**labels).observe(duration)
-
-                # Run page rank with termination check
-                if not self.terminate_event.is_set():
-                    start_time = time.time()
-                    self.money_flow_indexer.page_rank_with_community()
-                    duration = time.time() - start_time
-                    if self.page_rank_duration:
-                        self.page_rank_duration.labels(**labels).observe(duration)
-
-                # Update embeddings with termination check
-                if not self.terminate_event.is_set():
-                    start_time = time.time()
-                    self.money_flow_indexer.update_embeddings()
-                    duration = time.time() - start_time
-                    if self.embeddings_update_duration:
-                        self.embeddings_update_duration.labels(**labels).observe(duration)
-                
-                # Strategic completion logging
-                logger.info(
-                    "Completed periodic graph analysis tasks",
-                    extra={
-                        "block_height": block_height,
-                        "total_duration": round(time.time() - start_time, 2)
-                    }
-                )
+            # Graph analytics run in the separate money_flow_analytics_scheduler process
+            if self.write_ahead_log:
+                self.write_ahead_log.append(self.money_flow_indexer.prepare_batch(blocks, end_height))
+            else:
+                self.money_flow_indexer.index_blocks(blocks, end_height)
 
         except Exception as e:
             # Error logging with context
             logger.error(
-                "Block processing failed",
+                "Block batch processing failed",
                 error=e,
                 traceback=traceback.format_exc(),
                 extra={
-                    "operation": "process_block",
-                    "block_height": block_height if 'block_height' in locals() else None
+                    "operation": "process_blocks",
+                    "start_height": blocks[0].get("block_height") if blocks else None,
+                    "end_height": end_height
                 }
             )
             raise
-    
+
+    def _apply_write_ahead_log(self):
+        """
+        Write buffered batches to the graph in block order, removing each once committed.
+
+        Connection losses and transient errors are retried without limit. Any other failure
+        of the oldest record counts as an attempt, and after write_ahead_max_attempts the
+        consumer stops with an error naming the record, which stays in the log. A poisoned
+        record otherwise blocks the applier forever while reading waits on the full log.
+        """
+        graph_database = self.money_flow_indexer.graph_database
+        attempts = 0
+        while not self.terminate_event.is_set():
+            name = None
+            try:
+                # Read before listing: every batch up to this height is already on disk
+                read_height = self.write_ahead_log.read_height
+                pending = self.write_ahead_log.pending()
+                if not pending:
+                    if read_height > self.money_flow_indexer.get_last_block_height():
+                        self.money_flow_indexer.update_global_state(read_height)
+                    self.terminate_event.wait(1)
+                    continue
+
+                with graph_database.session() as session:
+                    for name in pending:
+                        if self.terminate_event.is_set():
+                            break
+                        self.money_flow_indexer.write_batch(session, self.write_ahead_log.load(name))
+                        self.write_ahead_log.remove(name)
+                        attempts = 0
+
+            except Exception as e:
+                if self.terminate_event.is_set():
+                    break
+                if name is not None and not isinstance(e, (ServiceUnavailable, SessionExpired, TransientError)):
+                    attempts += 1
+                logger.error(
+                    "Applying write-ahead batches failed",
+                    error=e,
+                    traceback=traceback.format_exc(),
+                    extra={"operation": "apply_write_ahead_log", "record": name, "attempts": attempts}
+                )
+                if attempts >= self.write_ahead_max_attempts:
+                    logger.error(
+                        f"Write-ahead record {name} failed {attempts} times, stopping the consumer; "
+                        f"fix or remove it in {self.write_ahead_log.directory} before restarting",
+                        extra={"operation": "apply_write_ahead_log", "record": name}
+                    )
+                    self.terminate_event.set()
+                    break
+                self.terminate_event.wait(min(5 * 2 ** attempts, 60))
+
     def get_last_processed_block(self) -> int:
-        """Get the last processed block height from the graph database"""
+        """Get the last processed block height from the graph database and the write-ahead log"""
         try:
-            with self.money_flow_indexer.graph_database.session() as session:
-                result = session.run("""
-                MATCH (g:GlobalState { name: "last_block_height" })
-                RETURN g.block_height AS last_block_height
-                """)
-                record = result.single()
-                if record:
-                    return record["last_block_height"]
-                return 0
+            last_block_height = self.money_flow_indexer.get_last_block_height()
+            if self.write_ahead_log:
+                last_block_height = max(last_block_height, self.write_ahead_log.last_end_height())
+            return last_block_height
         except Exception as e:
             logger.error(
                 "Failed to get last processed block",
@@ -335,6 +365,17 @@ class MoneyFlowConsumer:
             
     def _cleanup(self):
         """Clean up resources"""
+        if self._applier_thread is not None:
+            # The applier stops on the terminate event, let it finish the batch it is writing
+            # before the graph driver is closed
+            self.terminate_event.set()
+            self._applier_thread.join(self.applier_join_timeout_seconds)
+            if self._applier_thread.is_alive():
+                logger.warning(
+                    "Write-ahead applier still running at shutdown",
+                    extra={"operation": "cleanup", "timeout_seconds": self.applier_join_timeout_seconds}
+                )
+
         try:
             if hasattr(self, 'block_stream_manager'):
                 self.block_stream_manager.close()
@@ -353,6 +394,35 @@ class MoneyFlowConsumer:
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description='Money Flow Consumer using Block Stream')
     parser.add_argument('--batch-size', type=int, default=10, help='Number of blocks to process in a batch')
+    parser.add_argument(
+        '--writer-shards',
+        type=int,
+        default=1,
+        help='Parallel graph sessions writing address updates sharded by address and edge updates sharded by connected component (default: 1)'
+    )
+    parser.add_argument(
+        '--write-ahead-dir',
+        type=str,
+        default=None,
+        help='Directory of a local write-ahead buffer; batches are written to the graph in the background while reading continues'
+    )
+    parser.add_argument(
+        '--write-ahead-max-batches',
+        type=int,
+        default=1000,
+        help='Buffered batches before reading waits for the graph to catch up (default: 1000)'
+    )
+    parser.add_argument(
+        '--write-ahead-max-attempts',
+        type=int,
+        default=10,
+        help='Failed attempts at one buffered batch before the consumer stops on it (default: 10)'
+    )
+    parser.add_argument(
+        '--period-edges',
+        action='store_true',
+        help='Also maintain monthly TO_PERIOD edges for time-scoped path queries'
+    )
     parser.add_argument(
         '--network',
         type=str,
@@ -411,6 +481,8 @@ if __name__ == "__main__":
     
     # Create the appropriate indexer for the network
     money_flow_indexer = get_money_flow_indexer(args.network, graph_database, indexer_metrics)
+    money_flow_indexer.writer_shards = args.writer_shards
+    money_flow_indexer.period_edges = args.period_edges
     money_flow_indexer.create_indexes()
     
     block_stream_manager = BlockStreamManager(block_stream_indexer, substrate_node, partitioner, clickhouse_params, args.network, terminate_event)
@@ -423,7 +495,9 @@ if __name__ == "__main__":
         indexer_metrics,
         terminate_event,
         args.network,
-        args.batch_size
+        args.batch_size,
+        MoneyFlowWriteAheadLog(args.write_ahead_dir, terminate_event, args.write_ahead_max_batches) if args.write_ahead_dir else None,
+        args.write_ahead_max_attempts
     )
 
     try:
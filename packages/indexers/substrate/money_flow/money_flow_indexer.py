@@ -1,14 +1,16 @@
 import traceback
 import functools
 import time
-from typing import Optional, List, Dict
+import zlib
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Optional, Iterator, List, Dict, Set, Tuple
 
 from loguru import logger
 from neo4j import Driver
 from packages.indexers.base import terminate_event
-from packages.indexers.base.decimal_utils import convert_to_decimal_units
 from packages.indexers.substrate import get_network_asset
 from packages.indexers.base.metrics import IndexerMetrics
+from packages.indexers.substrate.money_flow.money_flow_reducer import MoneyFlowBatchReducer
 
 
 def infinite_retry_with_backoff(method):
@@ -65,6 +67,23 @@ class BaseMoneyFlowIndexer:
     _process_network_specific_events method.
     """
 
+    # Maximum number of rows sent in a single UNWIND statement
+    write_batch_rows = 5000
+    # Minimum seconds between checkpoints persisted for ranges without money flow events
+    empty_checkpoint_interval_seconds = 60
+    # Number of parallel sessions writing address and edge updates (1 writes in the batch transaction)
+    writer_shards = 1
+    # Parallel sessions running community PageRank batches
+    page_rank_workers = 4
+    # Communities are ranked in one session and transaction, one projected graph each, up to this many members per batch
+    page_rank_batch_members = 1000
+    # Addresses per transaction when recomputing calculated properties and embeddings
+    analytics_chunk_size = 5000
+    # Maintain monthly TO_PERIOD edges next to the cumulative TO edges
+    period_edges = False
+    # Event types handled by _process_network_specific_events, replayed by the bulk loader
+    network_event_types: List[str] = []
+
     def __init__(self, graph_database: Driver, network: str, indexer_metrics: IndexerMetrics):
         """
         Initialize the BaseMoneyFlowIndexer.
@@ -80,14 +99,27 @@ class BaseMoneyFlowIndexer:
         self.asset = get_network_asset(network)  # Get the asset symbol for this network
         self.indexer_metrics = indexer_metrics
 
-    def index_blocks(self, blocks):
+        # In-memory watermark of the last indexed block, loaded from GlobalState on first use
+        self._last_block_height: Optional[int] = None
+        self._last_checkpoint_time = 0.0
+
+        self._writer_pool: Optional[ThreadPoolExecutor] = None  # Created on the first sharded write
+
+    def index_blocks(self, blocks: List[Dict], end_height: Optional[int] = None):
+        """
+        Index the money flow of a batch of blocks in a single graph transaction.
+
+        Args:
+            blocks: Blocks with addresses, ordered by block height
+            end_height: Last block height covered by the batch, including blocks without
+                        addresses; defaults to the height of the last block
+        """
+        if self.terminate_event.is_set():
+            logger.info(f"Termination requested, skipping {len(blocks)} blocks")
+            return
+
         with self.graph_database.session() as session:
-            for block in blocks:
-                # Check for termination before processing each block
-                if self.terminate_event.is_set():
-                    logger.info(f"Termination requested, skipping block {block.get('block_height')}")
-                    break
-                self.index_block(session, block)
+            self.index_batch(session, blocks, end_height)
 
     def create_indexes(self):
         with self.graph_database.session() as session:
@@ -129,7 +161,11 @@ class BaseMoneyFlowIndexer:
                 ("TO", "last_activity_timestamp"),
                 ("TO", "first_activity_timestamp"),
                 ("TO", "last_activity_block_height"),
-                ("TO", "first_activity_block_height")
+                ("TO", "first_activity_block_height"),
+
+                ("TO_PERIOD", "id"),
+                ("TO_PERIOD", "period_start"),
+                ("TO_PERIOD", "period_end")
             ]
 
             for label, prop in indexes:
@@ -164,27 +200,90 @@ class BaseMoneyFlowIndexer:
                             """)
                 logger.info("Created Network vector index")
 
+    def get_last_block_height(self) -> int:
+        """Get the last indexed block height, read from GlobalState once and then tracked in memory"""
+        if self._last_block_height is None:
+            with self.graph_database.session() as session:
+                result = session.run("""
+                MATCH (g:GlobalState { name: "last_block_height" })
+                RETURN g.block_height AS last_block_height
+                """)
+                record = result.single()
+                self._last_block_height = record["last_block_height"] if record else 0
+        return self._last_block_height
+
+    def get_pending_batch(self) -> Optional[Tuple[int, int]]:
+        """
+        Get the block range of a sharded batch whose checkpoint was not committed.
+
+        Shards of such a batch may have committed, so it has to be replayed with exactly
+        these boundaries for the per row block range guards to skip what was written.
+
+        Returns:
+            Tuple of (start_height, end_height), or None if no sharded batch was interrupted
+        """
+        with self.graph_database.session() as session:
+            record = session.run("""
+            MATCH (g:GlobalState { name: "last_block_height" })
+            RETURN g.pending_start_height AS start_height, g.pending_end_height AS end_height
+            """).single()
+            if record is None or record["start_height"] is None:
+                return None
+            return record["start_height"], record["end_height"]
+
+    def _write_pending_batch(self, session, start_height: int, end_height: int):
+        """Persist the block range of a sharded batch before its shards are written"""
+        with session.begin_transaction() as transaction:
+            transaction.run("""
+                            MERGE (g:GlobalState { name: "last_block_height" })
+                              ON CREATE SET g.block_height = 0
+                            SET
+                              g.pending_start_height = $start_height,
+                              g.pending_end_height = $end_height
+                            """, {
+                'start_height': start_height,
+                'end_height': end_height
+            })
+
+    def _write_checkpoint(self, transaction, block_height: int):
+        """Persist the last indexed block height within a transaction, completing any pending batch"""
+        transaction.run("""
+                        MERGE (g:GlobalState { name: "last_block_height" })
+                        SET
+                          g.block_height = $block_height,
+                          g.pending_start_height = null,
+                          g.pending_end_height = null
+                        """, {
+            'block_height': block_height
+        })
+
     def update_global_state(self, end_height):
         """
-        Index an empty block with infinite retry.
+        Advance the checkpoint over a range of blocks without money flow events.
+
+        The in-memory watermark advances immediately, while GlobalState is written at most
+        once per empty_checkpoint_interval_seconds or with the next indexed batch, so runs of
+        empty ranges cost no graph transactions. After a restart at most that interval of
+        empty blocks is read again.
 
         Args:
-            session: Neo4j session
-            end_height: Block height to index
+            end_height: Last block height of the range
 
         Raises:
             Exception: If there's an error during indexing
         """
+        if end_height <= self.get_last_block_height():
+            return
+
+        self._last_block_height = end_height
+        if time.time() - self._last_checkpoint_time < self.empty_checkpoint_interval_seconds:
+            return
+
         try:
             with self.graph_database.session() as session:
                 with session.begin_transaction() as transaction:
-                    transaction.run("""
-                                    MERGE (g:GlobalState {name: 'last_block_height'})
-                                    SET
-                                    g.block_height = $end_height
-                                    """, {
-                                        'end_height': end_height
-                                    })
+                    self._write_checkpoint(transaction, end_height)
+            self._last_checkpoint_time = time.time()
         except Exception as e:
             logger.error(
                 "Error indexing empty block",
@@ -194,67 +293,252 @@ class BaseMoneyFlowIndexer:
             )
             raise e
 
+    def index_batch(self, session, blocks: List[Dict], end_height: Optional[int] = None):
+        """
+        Index money flow events of a batch of blocks.
+
+        Blocks at or below the in-memory watermark are skipped without reading GlobalState,
+        the remaining ones are reduced with prepare_batch and written with apply_batch.
+
+        Args:
+            session: Neo4j session
+            blocks: Blocks with addresses, ordered by block height
+            end_height: Last block height covered by the batch
+        """
+        last_block_height = self.get_last_block_height()
+        pending_blocks = [block for block in blocks if block['block_height'] > last_block_height]
+        if len(pending_blocks) < len(blocks):
+            logger.warning(
+                f"Skipping {len(blocks) - len(pending_blocks)} blocks as they are already indexed "
+                f"(last indexed: {last_block_height})"
+            )
+
+        self.apply_batch(session, self.prepare_batch(pending_blocks, end_height))
+
+    def prepare_batch(self, blocks: List[Dict], end_height: Optional[int] = None) -> Dict:
+        """
+        Reduce a batch of blocks into a write record without touching the graph.
+
+        Transfers of the whole batch are reduced per address and per (from, to) edge by a
+        MoneyFlowBatchReducer, so the number of graph round trips depends on the number of
+        distinct addresses and edges rather than on the number of events. The record also
+        carries the network specific events of each block, the checkpoint height and a batch
+        id made of the first and checkpoint block heights, and is JSON serializable so it
+        can be buffered in a MoneyFlowWriteAheadLog.
+
+        Args:
+            blocks: Blocks with addresses, ordered by block height
+            end_height: Last block height covered by the batch, including blocks without
+                        addresses; defaults to the height of the last block
+
+        Returns:
+            Batch record for apply_batch
+        """
+        reducer = MoneyFlowBatchReducer(self.network, self.period_edges)
+        network_events = []
+        for block in blocks:
+            events_by_type = self._group_events(block.get('events', []))
+            reducer.add_block(block, events_by_type)
+
+            block_network_events = {
+                key: events for key, events in events_by_type.items() if key in self.network_event_types
+            }
+            if block_network_events:
+                network_events.append({'timestamp': block.get('timestamp'), 'events_by_type': block_network_events})
+
+        record = reducer.drain()
+        block_heights = [block['block_height'] for block in blocks]
+        record['checkpoint_height'] = max([end_height or 0] + block_heights)
+        record['batch_id'] = f"{block_heights[0] if block_heights else record['checkpoint_height']}-{record['checkpoint_height']}"
+        record['block_heights'] = block_heights
+        record['network_events'] = network_events
+        return record
+
     @infinite_retry_with_backoff
-    def index_block(self, session, block):
+    def apply_batch(self, session, record: Dict):
+        """Write a batch record to the graph with infinite retry, see write_batch"""
+        self.write_batch(session, record)
+
+    def write_batch(self, session, record: Dict):
         """
-        Index money flow events from a block's events with infinite retry.
+        Write a batch record to the graph in a single attempt, exactly once per batch.
+
+        A record whose checkpoint height the graph checkpoint already covers was applied
+        before and is skipped. With writer_shards > 1 the block range of the batch is
+        persisted first, then the address updates are written by parallel shard sessions
+        sharded by address, and the edge updates by shard sessions owning whole connected
+        components of the batch (see _component_shards), before the checkpoint transaction;
+        otherwise the batch and its checkpoint are committed atomically. Address and edge
+        updates only apply on top of activity older than their row, so a record replayed
+        with the same boundaries after a partial commit (see get_pending_batch) leaves
+        volumes and counts unchanged.
 
         Args:
             session: Neo4j session
-            block: Block data containing events to process
+            record: Batch record from prepare_batch
 
         Raises:
             Exception: If there's an error during indexing
         """
         start_time = time.time()
         try:
-            events_by_type = self._group_events(block.get('events', []))
-            block_height = block.get('block_height')
-            timestamp = block.get('timestamp')
+            last_block_height = self.get_last_block_height()
+            if record['checkpoint_height'] <= last_block_height:
+                logger.warning(
+                    f"Skipping batch {record['batch_id']} as it is already indexed (last indexed: {last_block_height})"
+                )
+                return
 
-            with session.begin_transaction() as transaction:
-                result = transaction.run("""
-                MATCH (g:GlobalState { name: "last_block_height" })
-                RETURN g.block_height AS last_block_height
-                """)
-                last_block_height = result.single()
+            address_rows, transfer_rows, period_rows = record['addresses'], record['transfers'], record['periods']
+            logger.debug(
+                "Applying money flow batch",
+                extra={
+                    "batch_id": record['batch_id'],
+                    "events": record['events'],
+                    "addresses": len(address_rows),
+                    "transfers": len(transfer_rows)
+                }
+            )
 
-                if last_block_height is not None:
-                    last_block_height = last_block_height['last_block_height']
-                    if last_block_height > block_height:
-                        logger.warning(f"Skipping block {block_height} as it is already indexed (last indexed: {last_block_height})")
-                        return  # Skip indexing if this block is already indexed
+            if self.writer_shards > 1:
+                block_heights = record['block_heights']
+                self._write_pending_batch(
+                    session, block_heights[0] if block_heights else record['checkpoint_height'], record['checkpoint_height']
+                )
+                # Addresses first, the edge statement only matches existing nodes
+                self._write_sharded(self._merge_addresses, address_rows, lambda row: row['address'])
+                # Creating an edge also modifies its receiver, so edges are sharded by component
+                component_shards = self._component_shards(transfer_rows)
+                self._write_sharded(
+                    self._merge_transfers, transfer_rows, lambda row: row['from'], lambda row: component_shards[row['from']]
+                )
+                component_shards = self._component_shards(period_rows)
+                self._write_sharded(
+                    self._merge_period_transfers, period_rows, lambda row: row['from'], lambda row: component_shards[row['from']]
+                )
 
             with session.begin_transaction() as transaction:
-                transaction.run("""
-                                MERGE (g:GlobalState { name: "last_block_height" })
-                                SET
-                                  g.block_height = $block_height
-                                """, {
-                    'block_height': block_height
-                })
-
-                # Process common events for all networks
-                self._process_endowed_events(transaction, timestamp, events_by_type.get('Balances.Endowed', []))
-                self._process_transfer_events(transaction, timestamp, events_by_type.get('Balances.Transfer', []))
+                if self.writer_shards <= 1:
+                    # Addresses first, the edge statement only matches existing nodes
+                    self._merge_addresses(transaction, address_rows)
+                    self._merge_transfers(transaction, transfer_rows)
+                    self._merge_period_transfers(transaction, period_rows)
 
                 # Process network-specific events
-                self._process_network_specific_events(transaction, timestamp, events_by_type)
-                processing_time = time.time() - start_time
-                self.indexer_metrics.record_block_processed(block_height, processing_time)
+                for block_events in record['network_events']:
+                    self._process_network_specific_events(transaction, block_events['timestamp'], block_events['events_by_type'])
+
+                self._write_checkpoint(transaction, record['checkpoint_height'])
+
+            self._last_block_height = record['checkpoint_height']
+            self._last_checkpoint_time = time.time()
+
+            processing_time = time.time() - start_time
+            for block_height in record['block_heights']:
+                self.indexer_metrics.record_block_processed(block_height, processing_time / len(record['block_heights']))
 
         except Exception as e:
             logger.error(
-                "Error indexing transaction",
+                "Error indexing block batch",
                 error=e,
                 traceback=traceback.format_exc(),
                 extra={
-                    "block_height": block.get('block_height') if 'block' in locals() else None,
+                    "batch_id": record['batch_id'],
+                    "blocks_count": len(record['block_heights']),
                     "processing_time": time.time() - start_time
                 }
             )
             raise e
 
+    def _write_sharded(self, write_method, rows: List[Dict], shard_key, shard_index=None):
+        """
+        Write rows in parallel sessions, partitioned by a hash of their address or by shard_index.
+
+        Each shard is written in its own transaction with its rows in a deterministic
+        order, and the call returns only once every shard has finished, which acts as
+        the barrier between the address and edge phases of a batch. A failed shard fails
+        the batch, which is retried as a whole; the per block range guards of the write
+        statements make a batch replayed with the boundaries write_batch persisted leave
+        counts and volumes unchanged.
+
+        Args:
+            write_method: Method writing a list of rows within a transaction
+            rows: Pre-aggregated rows of the batch
+            shard_key: Function returning the address a row is sorted, and by default sharded, by
+            shard_index: Function returning the shard of a row, overriding the hash of shard_key
+        """
+        if not rows:
+            return
+
+        if shard_index is None:
+            shard_index = lambda row: zlib.crc32(shard_key(row).encode()) % self.writer_shards
+
+        shards = [[] for _ in range(self.writer_shards)]
+        for row in rows:
+            shards[shard_index(row)].append(row)
+
+        if self._writer_pool is None:
+            self._writer_pool = ThreadPoolExecutor(max_workers=self.writer_shards)
+
+        futures = [
+            self._writer_pool.submit(self._write_shard, write_method, sorted(shard, key=shard_key))
+            for shard in shards if shard
+        ]
+        # Wait for every shard before raising, so a retried batch never overlaps running shards
+        wait(futures)
+        for future in futures:
+            future.result()
+
+    def _component_shards(self, rows: List[Dict]) -> Dict[str, int]:
+        """
+        Assign the endpoints of edge rows to writer shards by connected component.
+
+        Creating an edge modifies both its sender and its receiver, so edge rows sharded by
+        sender alone would make shards sharing a receiver, such as an exchange, conflict on
+        it. Connected components of the batch share no node, so shards owning whole
+        components never write the same node. Components are assigned largest first to the
+        shard with the fewest edges; a batch forming one component is written by one shard.
+
+        Args:
+            rows: Edge rows with 'from' and 'to' addresses
+
+        Returns:
+            Dictionary mapping every address of the rows to its shard
+        """
+        parent = {}
+
+        def find(address):
+            parent.setdefault(address, address)
+            while parent[address] != address:
+                parent[address] = parent[parent[address]]
+                address = parent[address]
+            return address
+
+        for row in rows:
+            sender, receiver = find(row['from']), find(row['to'])
+            if sender != receiver:
+                parent[sender] = receiver
+
+        component_edges = {}
+        for row in rows:
+            root = find(row['from'])
+            component_edges[root] = component_edges.get(root, 0) + 1
+
+        shard_edges = [0] * self.writer_shards
+        component_shard = {}
+        for root, edges in sorted(component_edges.items(), key=lambda item: (-item[1], item[0])):
+            shard = shard_edges.index(min(shard_edges))
+            component_shard[root] = shard
+            shard_edges[shard] += edges
+
+        return {address: component_shard[find(address)] for address in parent}
+
+    def _write_shard(self, write_method, rows: List[Dict]):
+        """Write the rows of one shard in a dedicated session and transaction"""
+        with self.graph_database.session() as session:
+            with session.begin_transaction() as transaction:
+                write_method(transaction, rows)
+
     def extract_addresses_from_blocks(self, blocks: List[Dict]) -> List[str]:
         """Extract unique addresses from blocks without processing them"""
         address_set = set()
@@ -278,57 +562,81 @@ class BaseMoneyFlowIndexer:
 
         return addresses
 
-    @infinite_retry_with_backoff
     def update_calculated_properties(self, addresses: Optional[List[str]] = None):
-        """Update calculated properties for addresses before embedding generation"""
+        """
+        Recompute unique senders and receivers of addresses from their edges.
+
+        Addresses are updated in chunks of analytics_chunk_size, one transaction per chunk.
+
+        Args:
+            addresses: Addresses to update; None updates every address
+        """
+        if addresses is None:
+            addresses = self.get_addresses_active_since(None)
+
+        for chunk in self._iter_chunks(addresses):
+            if self.terminate_event.is_set():
+                break
+            self._update_calculated_properties_chunk(chunk)
+
+    @infinite_retry_with_backoff
+    def _update_calculated_properties_chunk(self, addresses: List[str]):
         try:
-            base_query = """
+            query = """
             MATCH (a:Address)
-            {address_filter}
-            
+            WHERE a.address IN $addresses
+
             // Calculate outgoing transaction metrics
-            OPTIONAL MATCH (a)-[r:TO]->(target)
+            OPTIONAL MATCH (a)-[:TO]->(target)
             WITH a,
              count(DISTINCT target) as unique_receivers_count
-             
+
             // Calculate incoming transaction metrics
-            OPTIONAL MATCH (source)-[in_r:TO]->(a)
-            WITH a,
+            OPTIONAL MATCH (source)-[:TO]->(a)
+            WITH a, unique_receivers_count,
              count(DISTINCT source) as unique_senders_count
-            
+
             // Set all calculated properties
+            SET
             a.unique_senders = unique_senders_count,
             a.unique_receivers = unique_receivers_count
             """
-
-            if addresses is not None:
-                query = base_query.replace("{address_filter}", "AND a.address IN $addresses")
-                params = {"addresses": addresses, "asset": self.asset}
-                with self.graph_database.session() as session:
-                    session.run(query, params)
-            else:
-                query = base_query.replace("{address_filter}", "")
-                params = {"asset": self.asset}
-                with self.graph_database.session() as session:
-                    session.run(query, params)
+            with self.graph_database.session() as session:
+                with session.begin_transaction() as transaction:
+                    transaction.run(query, {"addresses": addresses})
 
         except Exception as e:
             logger.error(
                 "Failed to update calculated properties",
                 error=e,
                 traceback=traceback.format_exc(),
-                extra={"addresses_count": len(addresses) if addresses else "all"}
+                extra={"addresses_count": len(addresses)}
             )
             raise
 
-    @infinite_retry_with_backoff
     def update_embeddings(self, addresses: Optional[List[str]] = None):
-        """Update joint embeddings using pre-calculated properties"""
+        """
+        Update joint embeddings using pre-calculated properties.
+
+        Addresses are updated in chunks of analytics_chunk_size, one transaction per chunk.
+
+        Args:
+            addresses: Addresses to update; None updates every address
+        """
+        if addresses is None:
+            addresses = self.get_addresses_active_since(None)
+
+        for chunk in self._iter_chunks(addresses):
+            if self.terminate_event.is_set():
+                break
+            self._update_embeddings_chunk(chunk)
+
+    @infinite_retry_with_backoff
+    def _update_embeddings_chunk(self, addresses: List[str]):
         try:
-            # Then create embeddings from the properties
-            base_query = """
+            query = """
             MATCH (a:Address)
-            {address_filter}
+            WHERE a.address IN $addresses
             SET
             a.network_embedding = [
                 coalesce(a.transfer_count, 0),                        // Total number of transfers in and out
@@ -338,28 +646,24 @@ class BaseMoneyFlowIndexer:
                 coalesce(a.community_id, 0),                           // Community membership
                 coalesce(a.community_page_rank, 0)                              // Community PageRank score
             ]
-            
             """
-
-            if addresses is not None:
-                query = base_query.replace("{address_filter}", "AND a.address IN $addresses")
-                params = {"addresses": addresses}
-                with self.graph_database.session() as session:
-                    session.run(query, params)
-            else:
-                query = base_query.replace("{address_filter}", "")
-                with self.graph_database.session() as session:
-                    session.run(query)
+            with self.graph_database.session() as session:
+                with session.begin_transaction() as transaction:
+                    transaction.run(query, {"addresses": addresses})
 
         except Exception as e:
             logger.error(
                 "Failed to update embeddings",
                 error=e,
                 traceback=traceback.format_exc(),
-                extra={"addresses_count": len(addresses) if addresses else "all"}
+                extra={"addresses_count": len(addresses)}
             )
             raise
 
+    def _iter_chunks(self, items: List) -> Iterator[List]:
+        for i in range(0, len(items), self.analytics_chunk_size):
+            yield items[i:i + self.analytics_chunk_size]
+
     @infinite_retry_with_backoff
     def community_detection(self):
         """Run community detection with infinite retry"""
@@ -389,45 +693,178 @@ class BaseMoneyFlowIndexer:
                 raise e
 
     @infinite_retry_with_backoff
-    def page_rank_with_community(self):
-        """Run PageRank with community with infinite retry"""
-        try:
-            with self.graph_database.session() as session:
-                result = session.run(
-                    "MATCH (c:Community) RETURN DISTINCT c.community_id",
-                    {}
-                )
-                communities = [community_id[0] for community_id in result]
-
-                # Log summary before starting
-                logger.info(f"Starting PageRank for {len(communities)} communities (asset: {self.asset})")
-                start_time_total = time.time()
-                processed_count = 0
-
-                for community in communities:
-                    # Check for termination between communities
-                    if self.terminate_event.is_set():
-                        logger.info(
-                            f"Termination requested during PageRank, stopping after {processed_count}/{len(communities)} communities")
-                        break
-
-                    subgraph_query = f"""
-                        MATCH p=(a1:Address {{community_id: {community!r}}})-[r:TO*1..3]->(a2:Address)
-                        WITH project(p) AS community_graph
-                        CALL pagerank.get(community_graph) YIELD node, rank
-                        SET node.community_page_rank = rank
-                        """
-                    with session.begin_transaction() as transaction:
-                        transaction.run(subgraph_query)
+    def community_detection_online(self, since_height: Optional[int] = None) -> Set:
+        """
+        Assign communities with MAGE's online community detection (LabelRankT).
+
+        The algorithm keeps its state inside Memgraph, so after a full run later runs only
+        feed it the addresses and edges created since the previous run.
 
-                    processed_count += 1
+        Args:
+            since_height: Block height of the previous run; None (re)computes the whole graph
+
+        Returns:
+            Set of community ids assigned by this run
+        """
+        if since_height is None:
+            query = """
+                CALL community_detection_online.set(True, False)
+                YIELD node, community_id
+                SET node.community_id = community_id
+                RETURN DISTINCT community_id
+            """
+        else:
+            query = """
+                OPTIONAL MATCH (a:Address)
+                WHERE a.first_activity_block_height > $since_height
+                WITH collect(a) AS created_vertices
+                OPTIONAL MATCH ()-[r:TO]->()
+                WHERE r.first_activity_block_height > $since_height
+                WITH created_vertices, collect(r) AS created_edges
+                CALL community_detection_online.update(created_vertices, created_edges, [], [], [], [])
+                YIELD node, community_id
+                SET node.community_id = community_id
+                RETURN DISTINCT community_id
+            """
 
-                # Log summary after completion
-                end_time_total = time.time()
-                total_duration = end_time_total - start_time_total
-                avg_duration = total_duration / processed_count if processed_count > 0 else 0
-                logger.success(
-                    f"Completed PageRank for {processed_count}/{len(communities)} communities in {total_duration:.2f} seconds (avg: {avg_duration:.2f}s per community) (asset: {self.asset})")
+        with self.graph_database.session() as session:
+            if since_height is None:
+                # Communities are renumbered by a full run
+                session.run("MATCH (c:Community) DELETE c")
+
+            with session.begin_transaction() as transaction:
+                result = transaction.run(query, {'since_height': since_height})
+                communities = {record["community_id"] for record in result if record["community_id"] is not None}
+                transaction.run("""
+                    UNWIND $communities AS community_id
+                    MERGE (c:Community { community_id: community_id })
+                """, {'communities': list(communities)})
+        return communities
+
+    def get_addresses_active_since(self, since_height: Optional[int]) -> List[str]:
+        """
+        Get the addresses index_batch created or updated after a block height.
+
+        The first and last activity block heights written with every address merge make
+        up the dirty set of the analytics runs.
+
+        Args:
+            since_height: Block height of the previous run; None returns every address
+        """
+        activity_filter = """
+                WHERE a.last_activity_block_height > $since_height
+                   OR a.first_activity_block_height > $since_height
+        """ if since_height is not None else ""
+        with self.graph_database.session() as session:
+            result = session.run(f"""
+                MATCH (a:Address)
+                {activity_filter}
+                RETURN a.address AS address
+            """, {'since_height': since_height})
+            return [record["address"] for record in result]
+
+    def get_upstream_communities(self, addresses: List[str]) -> Set:
+        """
+        Get the community ids of addresses and of the addresses reaching them within two hops.
+
+        A community is ranked over the paths of up to three hops leaving its members, so new
+        edges or activity of these addresses change the projected graph of exactly these
+        communities.
+
+        Args:
+            addresses: Addresses created or updated since the last ranking
+        """
+        communities = set()
+        with self.graph_database.session() as session:
+            for chunk in self._iter_chunks(addresses):
+                result = session.run("""
+                    MATCH (d:Address)
+                    WHERE d.address IN $addresses
+                    OPTIONAL MATCH (a:Address)-[:TO*1..2]->(d)
+                    WITH collect(DISTINCT d.community_id) + collect(DISTINCT a.community_id) AS community_ids
+                    UNWIND community_ids AS community_id
+                    RETURN DISTINCT community_id
+                """, {'addresses': chunk})
+                communities.update(record["community_id"] for record in result)
+        return communities
+
+    def get_community_members(self, communities: List) -> List[str]:
+        """Get the addresses belonging to communities"""
+        with self.graph_database.session() as session:
+            result = session.run("""
+                MATCH (a:Address)
+                WHERE a.community_id IN $communities
+                RETURN a.address AS address
+            """, {'communities': communities})
+            return [record["address"] for record in result]
+
+    def page_rank_with_community(self, communities: Optional[List] = None, stale_communities: Optional[Set] = None):
+        """
+        Run PageRank per community over the paths leaving its members.
+
+        A community's signature only covers its members and their outgoing edges, while its
+        projection follows paths of up to three hops. Communities outside stale_communities
+        whose signature is unchanged since their last ranking are skipped, so the caller
+        passes the communities reaching addresses active since then (see
+        get_upstream_communities). Small communities are ranked in batches of up to
+        page_rank_batch_members members, one session and transaction per batch and one
+        projected graph per community; large ones on their own. Up to page_rank_workers
+        batches run in parallel sessions. Ranks are set on members only, so parallel
+        batches never write the same nodes.
+
+        Args:
+            communities: Community ids to rank; None ranks every community
+            stale_communities: Communities ranked whatever their signature; None ranks every
+                               community of communities without comparing signatures
+        """
+        try:
+            signatures = self._get_community_signatures(communities)
+            changed = {
+                community_id: signature
+                for community_id, (members, signature, previous_signature) in signatures.items()
+                if stale_communities is None or community_id in stale_communities or signature != previous_signature
+            }
+
+            # Log summary before starting
+            logger.info(
+                f"Starting PageRank for {len(changed)} communities (asset: {self.asset})",
+                extra={"communities": len(signatures), "unchanged": len(signatures) - len(changed)}
+            )
+            start_time_total = time.time()
+
+            batches = []
+            batch = []
+            batch_members = 0
+            for community_id in sorted(changed, key=lambda c: signatures[c][0], reverse=True):
+                members = signatures[community_id][0]
+                if members > self.page_rank_batch_members:
+                    batches.append([community_id])
+                    continue
+                if batch and batch_members + members > self.page_rank_batch_members:
+                    batches.append(batch)
+                    batch = []
+                    batch_members = 0
+                batch.append(community_id)
+                batch_members += members
+            if batch:
+                batches.append(batch)
+
+            timings = {}
+            with ThreadPoolExecutor(max_workers=self.page_rank_workers) as executor:
+                futures = [
+                    executor.submit(self._rank_communities, batch, {c: changed[c] for c in batch})
+                    for batch in batches
+                ]
+                for future in futures:
+                    timings.update(future.result() or {})
+
+            # Log summary after completion
+            total_duration = time.time() - start_time_total
+            slowest = sorted(timings.items(), key=lambda item: item[1], reverse=True)[:5]
+            logger.success(
+                f"Completed PageRank for {len(timings)}/{len(changed)} communities in {len(batches)} batches in {total_duration:.2f} seconds (asset: {self.asset})",
+                extra={"slowest_communities": [{"community_id": c, "duration_seconds": round(d, 2)} for c, d in slowest]}
+            )
 
         except Exception as e:
             logger.error(
@@ -438,6 +875,80 @@ class BaseMoneyFlowIndexer:
             )
             raise e
 
+    @infinite_retry_with_backoff
+    def _get_community_signatures(self, communities: Optional[List] = None) -> Dict:
+        """
+        Get the member count and a topology signature of communities
+
+        Returns:
+            {community_id: (members, signature, signature of the last ranking)}
+        """
+        community_filter = "AND a.community_id IN $communities" if communities is not None else ""
+        with self.graph_database.session() as session:
+            result = session.run(f"""
+                MATCH (a:Address)
+                WHERE a.community_id IS NOT NULL {community_filter}
+                OPTIONAL MATCH (a)-[r:TO]->()
+                WITH a, count(r) AS out_edges
+                WITH a.community_id AS community_id,
+                     count(a) AS members,
+                     sum(out_edges) AS edges,
+                     sum(id(a)) AS member_checksum
+                OPTIONAL MATCH (c:Community {{ community_id: community_id }})
+                RETURN community_id, members, edges, member_checksum, c.page_rank_signature AS previous_signature
+            """, {'communities': communities})
+            return {
+                record["community_id"]: (
+                    record["members"],
+                    f"{record['members']}:{record['edges']}:{record['member_checksum']}",
+                    record["previous_signature"]
+                )
+                for record in result
+            }
+
+    @infinite_retry_with_backoff
+    def _rank_communities(self, communities: List, signatures: Dict[str, str]) -> Optional[Dict]:
+        """
+        Rank a batch of communities, each in its own projected graph, in one transaction and
+        record their signatures and timings
+
+        Returns:
+            {community_id: duration in seconds}, None if termination was requested
+        """
+        if self.terminate_event.is_set():
+            return None
+
+        timings = {}
+        with self.graph_database.session() as session:
+            with session.begin_transaction() as transaction:
+                for community_id in communities:
+                    start_time = time.time()
+                    transaction.run("""
+                        MATCH p=(a1:Address { community_id: $community_id })-[r:TO*1..3]->(a2:Address)
+                        WITH project(p) AS community_graph
+                        CALL pagerank.get(community_graph) YIELD node, rank
+                        WITH node, rank
+                        WHERE node.community_id = $community_id
+                        SET node.community_page_rank = rank
+                    """, {'community_id': community_id}).consume()
+                    timings[community_id] = time.time() - start_time
+
+                transaction.run("""
+                    UNWIND $rows AS row
+                    MERGE (c:Community { community_id: row.community_id })
+                    SET
+                      c.page_rank_signature = row.signature,
+                      c.page_rank_duration_seconds = row.duration,
+                      c.page_rank_batch_size = $batch_size
+                """, {
+                    'rows': [
+                        {'community_id': c, 'signature': signatures[c], 'duration': timings[c]}
+                        for c in communities
+                    ],
+                    'batch_size': len(communities)
+                })
+        return timings
+
     def _group_events(self, events):
         """Group events by module.event_name for easier processing"""
         grouped = {}
@@ -448,93 +959,143 @@ class BaseMoneyFlowIndexer:
             grouped[key].append(event)
         return grouped
 
-    def _process_endowed_events(self, transaction, timestamp, events):
-        """Process Balances.Endowed events"""
-        for event in events:
-            attrs = event['attributes']
-            query = """
-            MERGE (addr:Address { address: $account })
-            ON CREATE SET
-                addr.first_activity_timestamp = $timestamp,
-                addr.first_activity_block_height = $block_height
+    def _run_unwind(self, transaction, query: str, rows: List[Dict]):
+        """Run an UNWIND $rows statement in chunks of write_batch_rows rows"""
+        for i in range(0, len(rows), self.write_batch_rows):
+            transaction.run(query, {'rows': rows[i:i + self.write_batch_rows], 'asset': self.asset})
+
+    def _merge_addresses(self, transaction, rows: List[Dict]):
+        """Create addresses and add the transfer counts and activity of a batch, once per block range"""
+        query = """
+        UNWIND $rows AS row
+        MERGE (addr:Address { address: row.address })
+          ON CREATE SET
+            addr.first_activity_timestamp = row.first_timestamp,
+            addr.first_activity_block_height = row.first_block_height
+        WITH addr, row
+        WHERE row.transfer_count > 0
+          AND coalesce(addr.last_activity_block_height, -1) < row.first_block_height
+        SET
+          addr.last_activity_timestamp = row.last_timestamp,
+          addr.last_activity_block_height = row.last_block_height,
+          addr.transfer_count = coalesce(addr.transfer_count, 0) + row.transfer_count
+        """
+        self._run_unwind(transaction, query, rows)
+
+    def _merge_transfers(self, transaction, rows: List[Dict]):
+        """Create or update TO edges with the summed transfers of a batch, once per block range"""
+        query = """
+        UNWIND $rows AS row
+        MATCH (sender:Address { address: row.from })
+        MATCH (receiver:Address { address: row.to })
+        MERGE (sender)-[r:TO { id: row.id, asset: $asset }]->(receiver)
+          ON CREATE SET
+              r.volume = 0.0,
+              r.transfer_count = 0,
+              r.first_activity_timestamp = row.first_timestamp,
+              r.first_activity_block_height = row.first_block_height,
+
+              sender.neighbor_count = coalesce(sender.neighbor_count, 0) + 1,
+              sender.unique_receivers = coalesce(sender.unique_receivers, 0) + 1,
+
+              receiver.neighbor_count = coalesce(receiver.neighbor_count, 0) + 1,
+              receiver.unique_senders = coalesce(receiver.unique_senders, 0) + 1
+        WITH r, row
+        WHERE coalesce(r.last_activity_block_height, -1) < row.first_block_height
+        SET
+            r.volume = r.volume + row.volume,
+            r.transfer_count = r.transfer_count + row.transfer_count,
+            r.last_activity_timestamp = row.last_timestamp,
+            r.last_activity_block_height = row.last_block_height
+        """
+        self._run_unwind(transaction, query, rows)
+
+    def _merge_period_transfers(self, transaction, rows: List[Dict]):
+        """Create or update monthly TO_PERIOD edges with the summed transfers of a batch, once per block range"""
+        query = """
+        UNWIND $rows AS row
+        MATCH (sender:Address { address: row.from })
+        MATCH (receiver:Address { address: row.to })
+        MERGE (sender)-[p:TO_PERIOD { id: row.id, asset: $asset, granularity: 'month', period_start: row.period_start }]->(receiver)
+          ON CREATE SET
+              p.period_end = row.period_end,
+              p.year_start = row.year_start,
+              p.year_end = row.year_end,
+              p.volume = 0.0,
+              p.transfer_count = 0,
+              p.first_activity_timestamp = row.first_timestamp,
+              p.first_activity_block_height = row.first_block_height
+        WITH p, row
+        WHERE coalesce(p.last_activity_block_height, -1) < row.first_block_height
+        SET
+            p.volume = p.volume + row.volume,
+            p.transfer_count = p.transfer_count + row.transfer_count,
+            p.last_activity_timestamp = row.last_timestamp,
+            p.last_activity_block_height = row.last_block_height
+        """
+        self._run_unwind(transaction, query, rows)
 
-            """
-            transaction.run(query, {
-                'block_height': event['block_height'],
-                'timestamp': timestamp,
-                'account': attrs['account'],
-                'asset': self.asset,
-                'amount': float(convert_to_decimal_units(
-                    attrs['free_balance'],
-                    self.network
-                ))
-            })
+    def compact_period_edges(self, cutoff_timestamp: int) -> int:
+        """
+        Fold monthly TO_PERIOD edges that start before a cutoff into yearly ones.
 
-    def _process_transfer_events(self, transaction, timestamp, events):
-        """Process Balances.Transfer events with consolidated relationship merge."""
-        for event in events:
-            attrs = event['attributes']
-            amount = float(convert_to_decimal_units(
-                attrs['amount'],
-                self.network
-            ))
-            query = """
-            MERGE (sender:Address { address: $from })
-              ON CREATE SET
-                sender.first_activity_timestamp = $timestamp,
-                sender.last_activity_timestamp = $timestamp,
-                sender.first_activity_block_height = $block_height,
-                sender.last_activity_block_height = $block_height,
-                sender.transfer_count = 1
-              SET 
-                sender.last_activity_timestamp = $timestamp, 
-                sender.last_activity_block_height = $block_height,
-                sender.transfer_count = coalesce(sender.transfer_count, 0) + 1
-
-            MERGE (receiver:Address { address: $to })
-              ON CREATE SET
-                receiver.first_activity_timestamp = $timestamp,
-                receiver.last_activity_timestamp = $timestamp,
-                receiver.first_activity_block_height = $block_height,
-                receiver.last_activity_block_height = $block_height,
-                receiver.transfer_count = 1
-              SET
-                receiver.last_activity_timestamp = $timestamp,
-                receiver.last_activity_block_height = $block_height,
-                receiver.transfer_count = coalesce(receiver.transfer_count, 0) + 1
-
-            MERGE (sender)-[r:TO { id: $to_id, asset: $asset }]->(receiver)
-              ON CREATE SET
-                  r.volume = $amount,
-                  r.transfer_count = 1,
-                  r.first_activity_timestamp = $timestamp,
-                  r.last_activity_timestamp = $timestamp,
-
-                  r.first_activity_block_height = $block_height,
-                  r.last_activity_block_height = $block_height,
-
-                  sender.neighbor_count = coalesce(sender.neighbor_count, 0) + 1,
-                  sender.unique_receivers = coalesce(sender.unique_receivers, 0) + 1,
-
-                  receiver.neighbor_count = coalesce(receiver.neighbor_count, 0) + 1,
-                  receiver.unique_senders = coalesce(receiver.unique_senders, 0) + 1
-
-              ON MATCH SET
-                  r.volume = r.volume + $amount,
-                  r.transfer_count = r.transfer_count + 1,
-                  r.last_activity_timestamp = $timestamp,
-                  r.last_activity_block_height = $block_height
+        Keeps the number of period edges per address pair bounded by the retained months
+        plus one per year. Each chunk of monthly edges is added to the yearly edges and
+        deleted in the same transaction, so a failed chunk never counts twice.
 
-            """
-            transaction.run(query, {
-                'block_height': event['block_height'],
-                'timestamp': timestamp,
-                'from': attrs['from'],
-                'to': attrs['to'],
-                'amount': amount,
-                'asset': self.asset,
-                'to_id': f"from-{attrs['from']}-to-{attrs['to']}-{self.asset}",
-            })
+        Args:
+            cutoff_timestamp: Monthly edges starting before this timestamp (ms) are compacted
+
+        Returns:
+            Number of monthly edges compacted
+        """
+        compacted = 0
+        while not self.terminate_event.is_set():
+            count = self._compact_period_edges_chunk(cutoff_timestamp)
+            compacted += count
+            if count < self.write_batch_rows:
+                break
+        return compacted
+
+    @infinite_retry_with_backoff
+    def _compact_period_edges_chunk(self, cutoff_timestamp: int) -> int:
+        query = """
+        MATCH (sender:Address)-[p:TO_PERIOD]->(receiver:Address)
+        WHERE p.period_start < $cutoff_timestamp AND p.granularity = 'month'
+        WITH sender, receiver, p
+        LIMIT $limit
+        WITH sender, receiver, p.id AS id, p.asset AS asset, p.year_start AS year_start, p.year_end AS year_end,
+             collect(p) AS buckets
+        MERGE (sender)-[y:TO_PERIOD { id: id, asset: asset, granularity: 'year', period_start: year_start }]->(receiver)
+          ON CREATE SET
+              y.period_end = year_end,
+              y.year_start = year_start,
+              y.year_end = year_end,
+              y.volume = 0.0,
+              y.transfer_count = 0
+        SET
+            y.volume = y.volume + reduce(volume = 0.0, b IN buckets | volume + b.volume),
+            y.transfer_count = y.transfer_count + reduce(count = 0, b IN buckets | count + b.transfer_count),
+            y.first_activity_timestamp = reduce(first = y.first_activity_timestamp, b IN buckets |
+                CASE WHEN first IS NULL OR b.first_activity_timestamp < first THEN b.first_activity_timestamp ELSE first END),
+            y.first_activity_block_height = reduce(first = y.first_activity_block_height, b IN buckets |
+                CASE WHEN first IS NULL OR b.first_activity_block_height < first THEN b.first_activity_block_height ELSE first END),
+            y.last_activity_timestamp = reduce(last = y.last_activity_timestamp, b IN buckets |
+                CASE WHEN last IS NULL OR b.last_activity_timestamp > last THEN b.last_activity_timestamp ELSE last END),
+            y.last_activity_block_height = reduce(last = y.last_activity_block_height, b IN buckets |
+                CASE WHEN last IS NULL OR b.last_activity_block_height > last THEN b.last_activity_block_height ELSE last END)
+        WITH buckets
+        UNWIND buckets AS bucket
+        DELETE bucket
+        RETURN count(*) AS compacted
+        """
+        with self.graph_database.session() as session:
+            with session.begin_transaction() as transaction:
+                record = transaction.run(query, {
+                    'cutoff_timestamp': cutoff_timestamp,
+                    'limit': self.write_batch_rows
+                }).single()
+                return record["compacted"] if record else 0
 
     def _process_network_specific_events(self, transaction, timestamp, events_by_type):
         """
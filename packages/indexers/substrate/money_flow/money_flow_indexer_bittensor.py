@@ -12,7 +12,9 @@ class BittensorMoneyFlowIndexer(BaseMoneyFlowIndexer):
     Handles Bittensor-specific events like NeuronRegistered and NetworkAdded
     to enhance address labeling in the graph database.
     """
-    
+
+    network_event_types = ['SubtensorModule.NeuronRegistered', 'SubtensorModule.NetworkAdded']
+
     def __init__(self, graph_database: Driver, network: str, indexer_metrics: IndexerMetrics):
         """
         Initialize the BittensorMoneyFlowIndexer.
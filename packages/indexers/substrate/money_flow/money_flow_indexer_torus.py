@@ -14,7 +14,9 @@ class TorusMoneyFlowIndexer(BaseMoneyFlowIndexer):
     Torus-specific implementation of the MoneyFlowIndexer.
     Handles Torus-specific events like AgentRegistered.
     """
-    
+
+    network_event_types = ['Torus0.AgentRegistered']
+
     def __init__(self, graph_database: Driver, network: str, indexer_metrics: IndexerMetrics ):
         """
         Initialize the TorusMoneyFlowIndexer.
@@ -56,7 +58,11 @@ class TorusMoneyFlowIndexer(BaseMoneyFlowIndexer):
             query = """
             MERGE (agent:Address { address: $agent })
             SET agent:Agent,
-                agent.labels = coalesce(agent.labels, []) + ['agent']
+                agent.labels = CASE
+                    WHEN NOT 'agent' IN coalesce(agent.labels, [])
+                    THEN coalesce(agent.labels, []) + ['agent']
+                    ELSE agent.labels
+                END
             """
             transaction.run(query, {
                 'agent': agent,
@@ -0,0 +1,169 @@
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
+
+from packages.indexers.base.decimal_utils import convert_to_decimal_units
+from packages.indexers.substrate import get_network_asset
+
+
+def _to_milliseconds(value: datetime) -> int:
+    return int(value.timestamp() * 1000)
+
+
+@lru_cache(maxsize=1024)
+def _month_bounds(year: int, month: int) -> Tuple[int, int, int, int]:
+    next_month = datetime(year + 1, 1, 1, tzinfo=timezone.utc) if month == 12 else datetime(year, month + 1, 1, tzinfo=timezone.utc)
+    return (
+        _to_milliseconds(datetime(year, month, 1, tzinfo=timezone.utc)),
+        _to_milliseconds(next_month),
+        _to_milliseconds(datetime(year, 1, 1, tzinfo=timezone.utc)),
+        _to_milliseconds(datetime(year + 1, 1, 1, tzinfo=timezone.utc))
+    )
+
+
+def get_period_bounds(timestamp: int) -> Tuple[int, int, int, int]:
+    """Get the UTC month and year a millisecond timestamp falls into
+
+    Returns:
+        Tuple of (period_start, period_end, year_start, year_end) in milliseconds
+    """
+    value = datetime.fromtimestamp(timestamp / 1000, tz=timezone.utc)
+    return _month_bounds(value.year, value.month)
+
+
+class MoneyFlowBatchReducer:
+    """
+    Reduces the money flow events of a block batch into graph deltas.
+
+    Balances.Endowed and Balances.Transfer events are collapsed into one delta per address
+    (transfer count, first and last activity) and one per (from, to) edge (volume, transfer
+    count, first and last activity), so the graph writer does one write per unique node and
+    edge of a batch however many transfers repeat between the same pair. With track_periods
+    the transfers are also reduced per (from, to, month) for TO_PERIOD edges. Blocks must be
+    added in block height order; a delta is a plain dictionary that can be serialized.
+    """
+
+    def __init__(self, network: str, track_periods: bool = False):
+        self.network = network
+        self.asset = get_network_asset(network)
+        self.track_periods = track_periods
+        self._reset()
+
+    def _reset(self):
+        self._addresses: Dict[str, Dict[str, Any]] = {}
+        self._transfers: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        self._periods: Dict[Tuple[str, str, int], Dict[str, Any]] = {}
+        self._start_height: Optional[int] = None
+        self._end_height: Optional[int] = None
+        self._events = 0
+
+    def __len__(self):
+        return self._events
+
+    def _address_row(self, address: str, timestamp: int, block_height: int) -> Dict[str, Any]:
+        row = self._addresses.get(address)
+        if row is None:
+            row = {
+                'address': address,
+                'transfer_count': 0,
+                'first_timestamp': timestamp,
+                'first_block_height': block_height,
+                'last_timestamp': timestamp,
+                'last_block_height': block_height
+            }
+            self._addresses[address] = row
+        return row
+
+    def add_block(self, block: Dict[str, Any], events_by_type: Dict[str, List[Dict[str, Any]]]):
+        """Add the Endowed and Transfer events of a block
+
+        Args:
+            block: Block with 'block_height' and 'timestamp'
+            events_by_type: Events of the block grouped by module.event_name
+        """
+        timestamp = block.get('timestamp')
+        block_height = block['block_height']
+        if self._start_height is None:
+            self._start_height = block_height
+        self._end_height = block_height
+
+        for event in events_by_type.get('Balances.Endowed', []):
+            self._address_row(event['attributes']['account'], timestamp, block_height)
+            self._events += 1
+
+        for event in events_by_type.get('Balances.Transfer', []):
+            attrs = event['attributes']
+            amount = float(convert_to_decimal_units(
+                attrs['amount'],
+                self.network
+            ))
+
+            for address in (attrs['from'], attrs['to']):
+                row = self._address_row(address, timestamp, block_height)
+                row['transfer_count'] += 1
+                row['last_timestamp'] = timestamp
+                row['last_block_height'] = block_height
+
+            edge = self._transfers.get((attrs['from'], attrs['to']))
+            if edge is None:
+                edge = {
+                    'id': f"from-{attrs['from']}-to-{attrs['to']}-{self.asset}",
+                    'from': attrs['from'],
+                    'to': attrs['to'],
+                    'volume': 0.0,
+                    'transfer_count': 0,
+                    'first_timestamp': timestamp,
+                    'first_block_height': block_height
+                }
+                self._transfers[(attrs['from'], attrs['to'])] = edge
+            edge['volume'] += amount
+            edge['transfer_count'] += 1
+            edge['last_timestamp'] = timestamp
+            edge['last_block_height'] = block_height
+
+            if self.track_periods:
+                self._add_period_transfer(edge, amount, timestamp, block_height)
+            self._events += 1
+
+    def _add_period_transfer(self, edge: Dict[str, Any], amount: float, timestamp: int, block_height: int):
+        period_start, period_end, year_start, year_end = get_period_bounds(timestamp)
+        key = (edge['from'], edge['to'], period_start)
+        period = self._periods.get(key)
+        if period is None:
+            period = {
+                'id': edge['id'],
+                'from': edge['from'],
+                'to': edge['to'],
+                'period_start': period_start,
+                'period_end': period_end,
+                'year_start': year_start,
+                'year_end': year_end,
+                'volume': 0.0,
+                'transfer_count': 0,
+                'first_timestamp': timestamp,
+                'first_block_height': block_height
+            }
+            self._periods[key] = period
+        period['volume'] += amount
+        period['transfer_count'] += 1
+        period['last_timestamp'] = timestamp
+        period['last_block_height'] = block_height
+
+    def drain(self) -> Dict[str, Any]:
+        """Return the delta of the blocks added since the last drain and reset the reducer
+
+        Returns:
+            Dictionary with start_height, end_height, events, and the 'addresses', 'transfers'
+            and 'periods' rows written by _merge_addresses, _merge_transfers and
+            _merge_period_transfers
+        """
+        delta = {
+            'start_height': self._start_height,
+            'end_height': self._end_height,
+            'events': self._events,
+            'addresses': list(self._addresses.values()),
+            'transfers': list(self._transfers.values()),
+            'periods': list(self._periods.values())
+        }
+        self._reset()
+        return delta
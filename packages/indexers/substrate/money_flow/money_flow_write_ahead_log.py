@@ -0,0 +1,91 @@
+import json
+import os
+from typing import Any, Dict, List
+
+from loguru import logger
+
+
+class MoneyFlowWriteAheadLog:
+    """
+    Local write-ahead buffer of prepared money flow batches.
+
+    The consumer appends one record per block batch, as produced by prepare_batch of the
+    money flow indexer, and keeps reading block_stream while a separate applier writes the
+    records to the graph in block order and removes them once committed. Records are JSON
+    files named after their batch id (first and checkpoint block heights), written to a
+    temporary file and renamed, with the directory fsynced after the rename, so a crash
+    never leaves a partial or lost record behind. Records that survive a restart are
+    applied again; apply_batch skips those the graph checkpoint already covers.
+    """
+
+    def __init__(self, directory: str, terminate_event, max_pending_batches: int = 1000):
+        """
+        Initialize the write-ahead log
+
+        Args:
+            directory: Directory holding the records, created if missing
+            terminate_event: Event to signal termination
+            max_pending_batches: Records buffered before append blocks until the applier catches up
+        """
+        self.directory = directory
+        self.terminate_event = terminate_event
+        self.max_pending_batches = max_pending_batches
+        # Highest block height read by the consumer, including ranges without money flow events
+        self.read_height = 0
+        os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def _file_name(record: Dict[str, Any]) -> str:
+        start_height, end_height = record['batch_id'].split('-')
+        return f"{int(start_height):012d}-{int(end_height):012d}.json"
+
+    def pending(self) -> List[str]:
+        """Get the file names of records not applied yet, in block order"""
+        return sorted(name for name in os.listdir(self.directory) if name.endswith('.json'))
+
+    def last_end_height(self) -> int:
+        """Get the checkpoint height of the newest buffered record, 0 if the log is empty"""
+        pending = self.pending()
+        return int(pending[-1][:-len('.json')].split('-')[1]) if pending else 0
+
+    def append(self, record: Dict[str, Any]):
+        """Durably buffer a record, waiting while the log is full
+
+        Args:
+            record: Batch record from prepare_batch
+        """
+        while len(self.pending()) >= self.max_pending_batches:
+            if self.terminate_event.wait(1):
+                raise RuntimeError("Termination requested while waiting for the write-ahead log to drain")
+
+        path = os.path.join(self.directory, self._file_name(record))
+        temp_path = f"{path}.tmp"
+        with open(temp_path, 'w') as file:
+            json.dump(record, file)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temp_path, path)
+        self._sync_directory()
+        self.read_height = max(self.read_height, record['checkpoint_height'])
+
+    def _sync_directory(self):
+        """Flush renames and removals in the directory, so they survive a crash of the host"""
+        directory_fd = os.open(self.directory, os.O_RDONLY)
+        try:
+            os.fsync(directory_fd)
+        finally:
+            os.close(directory_fd)
+
+    def load(self, name: str) -> Dict[str, Any]:
+        """Load a buffered record by file name"""
+        with open(os.path.join(self.directory, name)) as file:
+            return json.load(file)
+
+    def remove(self, name: str):
+        """Remove a record once it has been applied"""
+        try:
+            os.remove(os.path.join(self.directory, name))
+        except FileNotFoundError:
+            logger.warning("Write-ahead record already removed", extra={"record": name})
+            return
+        self._sync_directory()
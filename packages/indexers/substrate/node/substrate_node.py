@@ -72,6 +72,12 @@ def with_infinite_retry(method):
 
 
 class SubstrateNode(Node):
+    # Number of dedicated connections used to fan out bulk storage reads
+    storage_pool_size = 4
+    # Bulk reads of at least this many addresses scan the whole Torus0.StakingTo map once,
+    # smaller ones read the entries under each account holder's staker key prefix
+    staking_scan_min_addresses = 5000
+
     def __init__(self, network: str, node_ws_url: str, terminate_event):
         super().__init__()
         self.network = network  # Store network type
@@ -90,6 +96,7 @@ class SubstrateNode(Node):
         # Initialize substrate interfaces to None first
         self._get_block_data_substrate = None
         self._get_events_substrate = None
+        self._storage_substrates = []  # Created lazily on the first bulk storage read
         
         # Create fresh instances
         self._reinitialize_substrate_interfaces()
@@ -419,6 +426,14 @@ class SubstrateNode(Node):
                         network=self.network,
                     )
             
+            # Drop the storage read pool, it is recreated on the next bulk read
+            for substrate in self._storage_substrates:
+                try:
+                    substrate.close()
+                except Exception:
+                    pass
+            self._storage_substrates = []
+
             # Create new instances with a small delay to ensure clean connections
             time.sleep(1)
             self._get_block_data_substrate = SubstrateInterfaceFactory.create_substrate_interface(
@@ -551,6 +566,196 @@ class SubstrateNode(Node):
             )
             raise RuntimeError(f"Error querying storage at block {block_hash}: {e}")
 
+    @with_infinite_retry
+    def get_balances_at_block_bulk(self, block_hash: str, addresses: List[str], batch_size: int = 500) -> Dict[str, Dict[str, Any]]:
+        """
+        Query account data and staked balances of many addresses at a specific block with infinite retry
+
+        System.Account entries are read with query_multi (one state_queryStorageAt call per
+        batch of keys), with batches spread over a pool of dedicated connections. Staked
+        balances are read from the Torus0.StakingTo entries under the staker key prefix of
+        each account holder on the same connections, so the cost follows the number of
+        addresses rather than the size of the map. From staking_scan_min_addresses
+        addresses on, a single paged scan of the whole map is cheaper and used instead.
+
+        Args:
+            block_hash: The block hash to query at
+            addresses: Addresses to query
+            batch_size: Number of storage keys per query_multi call
+
+        Returns:
+            Dictionary mapping addresses to account data in the format of get_balances_at_block;
+            addresses without an account are omitted
+        """
+        try:
+            batches = [addresses[i:i + batch_size] for i in range(0, len(addresses), batch_size)]
+            if not batches:
+                return {}
+
+            if not self._storage_substrates:
+                self._storage_substrates = [
+                    SubstrateInterfaceFactory.create_substrate_interface(self.network, self.node_ws_url)
+                    for _ in range(self.storage_pool_size)
+                ]
+
+            scan_staking = len(addresses) >= self.staking_scan_min_addresses
+
+            # Each connection processes its share of the batches sequentially, connections run in parallel
+            pool_size = min(len(self._storage_substrates), len(batches))
+            futures = [
+                self.executor.submit(
+                    self._query_accounts_batches, self._storage_substrates[i], block_hash, batches[i::pool_size],
+                    not scan_staking
+                )
+                for i in range(pool_size)
+            ]
+
+            staked_balances = self._query_staked_balances(block_hash) if scan_staking else None
+
+            result = {}
+            for future in futures:
+                result.update(future.result())
+
+            if staked_balances is not None:
+                for address, account in result.items():
+                    account['data']['staked'] = staked_balances.get(address, 0)
+            return result
+
+        except Exception as e:
+            logger.error(
+                "Bulk storage query failed at block",
+                error=e,
+                block_hash=block_hash,
+                addresses_count=len(addresses),
+                endpoint=self.node_ws_url,
+                network=self.network,
+                rpc_method="state_queryStorageAt",
+                module="System",
+                storage_function="Account"
+            )
+            raise RuntimeError(f"Error querying storage in bulk at block {block_hash}: {e}")
+
+    def _query_accounts_batches(self, substrate: SubstrateInterface, block_hash: str, batches: List[List[str]],
+                                query_staking: bool = False) -> Dict[str, Dict[str, Any]]:
+        """Read System.Account for batches of addresses over one connection, and with query_staking
+        the staked balance of each account holder"""
+        accounts = {}
+        for batch in batches:
+            if self.terminate_event.is_set():
+                raise RuntimeError("Bulk storage query terminated")
+
+            storage_keys = [
+                substrate.create_storage_key("System", "Account", [address], block_hash=block_hash)
+                for address in batch
+            ]
+            key_addresses = {storage_key.to_hex(): address for storage_key, address in zip(storage_keys, batch)}
+
+            for storage_key, account_data in substrate.query_multi(storage_keys, block_hash=block_hash):
+                if account_data is None or not account_data.value:
+                    continue
+                address = key_addresses[storage_key.to_hex()]
+                accounts[address] = account_data.value
+                if query_staking:
+                    accounts[address]['data']['staked'] = self._query_staker_balance(substrate, block_hash, address)
+        return accounts
+
+    @staticmethod
+    def _query_staker_balance(substrate: SubstrateInterface, block_hash: str, address: str) -> int:
+        """Sum the Torus0.StakingTo entries under the staker key prefix of one address"""
+        result = substrate.query_map(
+            module="Torus0",
+            storage_function="StakingTo",
+            params=[address],
+            block_hash=block_hash,
+            page_size=1000
+        )
+        return sum(value.value for _, value in result)
+
+    def _query_staked_balances(self, block_hash: str) -> Dict[str, int]:
+        """Sum Torus0.StakingTo per staker with a single paged map scan"""
+        staked_balances = {}
+        result = self._get_block_data_substrate.query_map(
+            module="Torus0",
+            storage_function="StakingTo",
+            block_hash=block_hash,
+            page_size=1000
+        )
+        for key, value in result:
+            staker = key[0].value if isinstance(key, (tuple, list)) else key.value
+            staked_balances[staker] = staked_balances.get(staker, 0) + value.value
+        return staked_balances
+
+    @with_infinite_retry
+    def get_accounts_page_at_block(self, block_hash: str, start_key: Optional[str] = None,
+                                   page_size: int = 1000) -> Tuple[List[Tuple[str, Dict[str, Any]]], Optional[str]]:
+        """
+        Read one page of the System.Account map at a specific block with infinite retry
+
+        Keys are paged with state_getKeysPaged and their values fetched and decoded in bulk
+        with state_queryStorageAt, so the whole account set can be streamed page by page.
+
+        Args:
+            block_hash: The block hash to query at
+            start_key: Storage key to continue after, as returned by the previous page
+            page_size: Number of accounts per page
+
+        Returns:
+            Tuple of (list of (address, account data), start key of the next page or None after the last page)
+        """
+        try:
+            result = self._get_block_data_substrate.query_map(
+                module="System",
+                storage_function="Account",
+                block_hash=block_hash,
+                start_key=start_key,
+                page_size=page_size,
+                max_results=page_size
+            )
+
+            accounts = [(key.value, value.value) for key, value in result]
+            next_key = result.last_key if len(accounts) == page_size else None
+            return accounts, next_key
+
+        except Exception as e:
+            logger.error(
+                "Account map page query failed at block",
+                error=e,
+                block_hash=block_hash,
+                start_key=start_key,
+                endpoint=self.node_ws_url,
+                network=self.network,
+                rpc_method="state_getKeysPaged",
+                module="System",
+                storage_function="Account"
+            )
+            raise RuntimeError(f"Error querying account map page at block {block_hash}: {e}")
+
+    @with_infinite_retry
+    def get_staked_balances_at_block(self, block_hash: str) -> Dict[str, int]:
+        """
+        Get the total staked balance of every staker at a specific block with infinite retry
+
+        Args:
+            block_hash: The block hash to query at
+
+        Returns:
+            Dictionary mapping staker addresses to their summed Torus0.StakingTo amounts
+        """
+        try:
+            return self._query_staked_balances(block_hash)
+        except Exception as e:
+            logger.error(
+                "Staking map query failed at block",
+                error=e,
+                block_hash=block_hash,
+                endpoint=self.node_ws_url,
+                network=self.network,
+                rpc_method="state_getKeysPaged",
+                module="Torus0",
+                storage_function="StakingTo"
+            )
+            raise RuntimeError(f"Error querying staking map at block {block_hash}: {e}")
+
     @with_infinite_retry
     def get_token_decimals(self) -> int:
         """
@@ -0,0 +1,193 @@
+import argparse
+import signal
+import time
+import traceback
+from typing import List, Tuple
+
+import clickhouse_connect
+from loguru import logger
+
+from packages.indexers.base import (
+    get_clickhouse_connection_string, create_clickhouse_database, terminate_event, setup_logger
+)
+from packages.indexers.substrate import networks
+
+
+class PartitionOptimizer:
+    """
+    Periodically runs OPTIMIZE ... FINAL on cold partitions of ReplacingMergeTree tables.
+
+    Once a partition has been fully merged, FINAL reads of it are cheap, and reads that
+    skip FINAL (distinct-key counts, argMax/LIMIT 1 BY deduplication) see a single version
+    per row. Only partitions that have not been written to for cold_after_hours and still
+    have more than one active part are optimized, so the indexers' hot partitions are
+    never rewritten while they are being filled.
+    """
+
+    def __init__(self, connection_params, terminate_event, interval_seconds: int = 3600,
+                 cold_after_hours: int = 24, max_partitions_per_cycle: int = 4):
+        """
+        Initialize the partition optimizer
+
+        Args:
+            connection_params: ClickHouse connection parameters
+            terminate_event: Event to signal termination
+            interval_seconds: Seconds to wait between optimization cycles
+            cold_after_hours: Hours without writes after which a partition is considered cold
+            max_partitions_per_cycle: Maximum number of partitions optimized per cycle
+        """
+        self.database = connection_params['database']
+        self.terminate_event = terminate_event
+        self.interval_seconds = interval_seconds
+        self.cold_after_hours = cold_after_hours
+        self.max_partitions_per_cycle = max_partitions_per_cycle
+        self.client = clickhouse_connect.get_client(
+            host=connection_params['host'],
+            port=int(connection_params['port']),
+            username=connection_params['user'],
+            password=connection_params['password'],
+            database=connection_params['database'],
+            settings={
+                'max_execution_time': 0
+            }
+        )
+
+    def get_cold_partitions(self) -> List[Tuple[str, str]]:
+        """
+        Find cold, not yet fully merged partitions of ReplacingMergeTree tables, including
+        their Replicated variants
+
+        Returns:
+            List of (table, partition_id) tuples, oldest writes first
+        """
+        result = self.client.query('''
+            SELECT p.table, p.partition_id
+            FROM system.parts AS p
+            INNER JOIN system.tables AS t ON t.database = p.database AND t.name = p.table
+            WHERE p.database = {database:String}
+              AND p.active
+              AND t.engine LIKE '%ReplacingMergeTree'
+            GROUP BY p.table, p.partition_id
+            HAVING count() > 1
+               AND max(p.modification_time) < now() - toIntervalHour({cold_after_hours:UInt32})
+            ORDER BY max(p.modification_time)
+            LIMIT {limit:UInt32}
+        ''', {
+            'database': self.database,
+            'cold_after_hours': self.cold_after_hours,
+            'limit': self.max_partitions_per_cycle
+        })
+        return [(row[0], row[1]) for row in result.result_rows]
+
+    def optimize_cold_partitions(self) -> int:
+        """
+        Run one optimization cycle
+
+        Returns:
+            Number of partitions optimized
+        """
+        optimized = 0
+        for table, partition_id in self.get_cold_partitions():
+            if self.terminate_event.is_set():
+                break
+
+            start_time = time.time()
+            try:
+                self.client.command(f"OPTIMIZE TABLE `{table}` PARTITION ID '{partition_id}' FINAL")
+                optimized += 1
+                logger.info(
+                    "Optimized cold partition",
+                    extra={
+                        "table": table,
+                        "partition_id": partition_id,
+                        "duration_seconds": round(time.time() - start_time, 2)
+                    }
+                )
+            except Exception as e:
+                logger.error(
+                    "Failed to optimize partition",
+                    error=e,
+                    extra={"table": table, "partition_id": partition_id}
+                )
+        return optimized
+
+    def run(self):
+        """Run optimization cycles until termination is requested"""
+        while not self.terminate_event.is_set():
+            try:
+                optimized = self.optimize_cold_partitions()
+                if optimized:
+                    logger.info("Partition optimization cycle completed", extra={"partitions": optimized})
+            except Exception as e:
+                logger.error("Partition optimization cycle failed", error=e, traceback=traceback.format_exc())
+
+            self.terminate_event.wait(self.interval_seconds)
+
+    def close(self):
+        """Close the ClickHouse connection"""
+        if hasattr(self, 'client'):
+            self.client.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='ClickHouse Partition Optimizer')
+    parser.add_argument(
+        '--network',
+        type=str,
+        required=True,
+        choices=networks,
+        help='Network whose database should be optimized'
+    )
+    parser.add_argument(
+        '--interval-seconds',
+        type=int,
+        default=3600,
+        help='Seconds to wait between optimization cycles (default: 3600)'
+    )
+    parser.add_argument(
+        '--cold-after-hours',
+        type=int,
+        default=24,
+        help='Hours without writes after which a partition is optimized (default: 24)'
+    )
+    parser.add_argument(
+        '--max-partitions-per-cycle',
+        type=int,
+        default=4,
+        help='Maximum number of partitions optimized per cycle (default: 4)'
+    )
+    args = parser.parse_args()
+
+    service_name = f'substrate-{args.network}-partition-optimizer'
+    setup_logger(service_name)
+
+    def signal_handler(sig, frame):
+        logger.info("Shutdown signal received", extra={"signal": sig, "service": service_name})
+        terminate_event.set()
+
+    signal.signal(signal.SIGTERM, signal_handler)
+    signal.signal(signal.SIGINT, signal_handler)
+
+    partition_optimizer = None
+    try:
+        clickhouse_params = get_clickhouse_connection_string(args.network)
+        create_clickhouse_database(clickhouse_params)
+
+        partition_optimizer = PartitionOptimizer(
+            clickhouse_params,
+            terminate_event,
+            args.interval_seconds,
+            args.cold_after_hours,
+            args.max_partitions_per_cycle
+        )
+        partition_optimizer.run()
+    except Exception as e:
+        logger.error(
+            "Fatal startup error",
+            error=e,
+            traceback=traceback.format_exc(),
+            extra={"operation": "main_startup"}
+        )
+    finally:
+        if partition_optimizer:
+            partition_optimizer.close()
@@ -0,0 +1,157 @@
+import os
+import sys
+import threading
+
+import pytest
+
+# Add the project root to the Python path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from packages.indexers.substrate.money_flow.money_flow_indexer import BaseMoneyFlowIndexer
+from packages.indexers.substrate.money_flow.money_flow_write_ahead_log import MoneyFlowWriteAheadLog
+
+
+class FakeResult:
+    def __init__(self, record=None):
+        self._record = record
+
+    def single(self):
+        return self._record
+
+    def consume(self):
+        pass
+
+
+class FakeSession:
+    """Session and transaction of FakeGraph, recording statements and the checkpoint"""
+
+    def __init__(self, graph):
+        self.graph = graph
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+    def begin_transaction(self):
+        return self
+
+    def run(self, query, parameters=None):
+        self.graph.statements.append(query)
+        if 'g.block_height = $block_height' in query:
+            self.graph.block_height = parameters['block_height']
+        if 'AS last_block_height' in query and self.graph.block_height is not None:
+            return FakeResult({'last_block_height': self.graph.block_height})
+        return FakeResult()
+
+
+class FakeGraph:
+    """Stands in for the graph driver, keeping the GlobalState checkpoint between indexers"""
+
+    def __init__(self):
+        self.statements = []
+        self.block_height = None
+
+    def session(self):
+        return FakeSession(self)
+
+    def count(self, fragment):
+        return sum(1 for statement in self.statements if fragment in statement)
+
+
+class FakeMetrics:
+    def record_block_processed(self, block_height, processing_time):
+        pass
+
+
+def transfer_block(block_height, sender, receiver, amount):
+    return {
+        'block_height': block_height,
+        'timestamp': 1700000000000 + block_height * 6000,
+        'events': [{
+            'module_id': 'Balances',
+            'event_id': 'Transfer',
+            'attributes': {'from': sender, 'to': receiver, 'amount': amount}
+        }]
+    }
+
+
+def make_record(batch_id, checkpoint_height):
+    return {'batch_id': batch_id, 'checkpoint_height': checkpoint_height, 'addresses': [], 'transfers': []}
+
+
+def test_load_remove_and_last_end_height_round_trip(tmp_path):
+    """Records are listed in block order, loaded unchanged and removed once applied"""
+    write_ahead_log = MoneyFlowWriteAheadLog(str(tmp_path), threading.Event())
+    assert write_ahead_log.pending() == []
+    assert write_ahead_log.last_end_height() == 0
+
+    first, second = make_record('1-10', 10), make_record('11-125', 125)
+    write_ahead_log.append(second)
+    write_ahead_log.append(first)
+
+    assert write_ahead_log.pending() == ['000000000001-000000000010.json', '000000000011-000000000125.json']
+    assert write_ahead_log.last_end_height() == 125
+    assert write_ahead_log.read_height == 125
+    assert write_ahead_log.load('000000000001-000000000010.json') == first
+    assert not any(name.endswith('.tmp') for name in os.listdir(tmp_path))
+
+    write_ahead_log.remove('000000000001-000000000010.json')
+    assert write_ahead_log.pending() == ['000000000011-000000000125.json']
+    assert write_ahead_log.last_end_height() == 125
+
+    write_ahead_log.remove('000000000011-000000000125.json')
+    assert write_ahead_log.pending() == []
+    assert write_ahead_log.last_end_height() == 0
+
+    # Removing a record twice is tolerated
+    write_ahead_log.remove('000000000011-000000000125.json')
+
+    # A restarted consumer resumes from the records left on disk
+    write_ahead_log.append(first)
+    assert MoneyFlowWriteAheadLog(str(tmp_path), threading.Event()).last_end_height() == 10
+
+
+def test_append_stops_waiting_on_termination(tmp_path):
+    """A full log blocks append until the applier drains it or termination is requested"""
+    terminate_event = threading.Event()
+    write_ahead_log = MoneyFlowWriteAheadLog(str(tmp_path), terminate_event, max_pending_batches=1)
+    write_ahead_log.append(make_record('1-10', 10))
+
+    terminate_event.set()
+    with pytest.raises(RuntimeError):
+        write_ahead_log.append(make_record('11-20', 20))
+    assert write_ahead_log.pending() == ['000000000001-000000000010.json']
+
+
+def test_replayed_batch_is_applied_once(tmp_path):
+    """A record applied before a crash, but not removed, is skipped when replayed"""
+    graph = FakeGraph()
+    write_ahead_log = MoneyFlowWriteAheadLog(str(tmp_path), threading.Event())
+
+    indexer = BaseMoneyFlowIndexer(graph, 'torus', FakeMetrics())
+    blocks = [transfer_block(5, 'alice', 'bob', 10 ** 18), transfer_block(7, 'alice', 'bob', 2 * 10 ** 18)]
+    write_ahead_log.append(indexer.prepare_batch(blocks, 12))
+
+    name = write_ahead_log.pending()[0]
+    record = write_ahead_log.load(name)
+    assert record['batch_id'] == '5-12'
+    assert record['transfers'][0]['transfer_count'] == 2
+
+    with graph.session() as session:
+        indexer.write_batch(session, record)
+    assert graph.block_height == 12
+    assert graph.count('MERGE (sender)-[r:TO') == 1
+
+    # Crash before removal: a restarted applier loads the checkpoint and replays the record
+    restarted = BaseMoneyFlowIndexer(graph, 'torus', FakeMetrics())
+    with graph.session() as session:
+        for name in write_ahead_log.pending():
+            restarted.write_batch(session, write_ahead_log.load(name))
+            write_ahead_log.remove(name)
+
+    assert graph.count('MERGE (sender)-[r:TO') == 1
+    assert graph.count('MERGE (addr:Address') == 1
+    assert graph.block_height == 12
+    assert write_ahead_log.pending() == []